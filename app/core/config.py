@@ -16,10 +16,21 @@ class Settings(BaseSettings):
     CONFIG_DIR: str = os.path.join(DATA_DIR, "config")
     FIRMWARE_DIR: str = os.path.join(DATA_DIR, "firmware")
     LOG_DIR: str = os.path.join(DATA_DIR, "logs")
+    ANALYTICS_DIR: str = os.path.join(DATA_DIR, "analytics")
     
     # Klipper settings
     KLIPPER_REPO: str = "https://github.com/Klipper3d/klipper.git"
     KLIPPER_BRANCH: str = "master"
+    KLIPPER_FETCH_INTERVAL: int = 3600  # seconds between fetches of the shared checkout
+    INSTALLATION_RETENTION: int = 900   # seconds a finished installation keeps its log history and status
+
+    # WebSocket settings
+    WS_SEND_QUEUE_SIZE: int = 256       # queued messages per client
+    WS_OVERFLOW_POLICY: str = "coalesce"  # drop, coalesce or disconnect
+    WS_HEARTBEAT_INTERVAL: float = 20.0   # ping clients silent this long
+    WS_IDLE_TIMEOUT: float = 60.0         # close clients silent this long
+    # Shares broadcasts between workers: unix:///path or redis://host
+    EVENT_BUS_URL: str = "unix://" + os.path.join(DATA_DIR, "events.sock")
     
     # Default printer settings
     DEFAULT_MAX_VELOCITY: float = 300.0  # mm/s
@@ -0,0 +1,154 @@
+import asyncio
+import fcntl
+import os
+import re
+import shutil
+import time
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, List, Optional
+
+from app.core.config import settings
+from app.core.logging import LoggerMixin
+
+RunCommand = Callable[[List[str], str], Awaitable[None]]
+
+class KlipperSource(LoggerMixin):
+    """Shared Klipper checkout with a separate git worktree per installation.
+
+    The shared clone is only fetched when the last fetch is older than
+    ``fetch_interval`` seconds. All operations that touch the shared
+    repository run under one lock; builds in the worktrees run in parallel.
+    The lock is a file lock next to the clone, so it also holds between
+    the uvicorn workers.
+    """
+
+    # Seconds between attempts to take the file lock
+    LOCK_POLL_INTERVAL = 0.1
+
+    def __init__(self, firmware_dir: str, fetch_interval: int):
+        self.repo_dir = os.path.join(firmware_dir, "klipper")
+        self.worktree_root = os.path.join(firmware_dir, "worktrees")
+        self.lock_path = os.path.join(firmware_dir, "klipper.lock")
+        self.fetch_interval = fetch_interval
+        self._lock = asyncio.Lock()
+
+    @asynccontextmanager
+    async def _locked(self):
+        """Hold the repository lock of this process and of all others.
+
+        flock is polled without blocking so waiting stays cancellable and
+        does not occupy an executor thread.
+        """
+        async with self._lock:
+            os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+            fd = os.open(self.lock_path, os.O_CREAT | os.O_RDWR, 0o600)
+            try:
+                while True:
+                    try:
+                        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        await asyncio.sleep(self.LOCK_POLL_INTERVAL)
+                yield
+            finally:
+                # Closing the descriptor also releases the flock
+                os.close(fd)
+
+    def _is_stale(self) -> bool:
+        fetch_head = os.path.join(self.repo_dir, ".git", "FETCH_HEAD")
+        if not os.path.exists(fetch_head):
+            return True
+        return time.time() - os.path.getmtime(fetch_head) > self.fetch_interval
+
+    async def _update(self, run_command: RunCommand) -> bool:
+        """Clone the shared repository or fetch it if stale.
+
+        Returns whether the remote was contacted.
+        """
+        if not os.path.exists(self.repo_dir):
+            await run_command(
+                ["git", "clone", settings.KLIPPER_REPO, self.repo_dir],
+                os.path.dirname(self.repo_dir)
+            )
+            await self._fetch(run_command)
+        elif self._is_stale():
+            await self._fetch(run_command)
+        else:
+            self.logger.info("Klipper checkout is fresh, skipping fetch")
+            return False
+        return True
+
+    async def _fetch(self, run_command: RunCommand):
+        await run_command(["git", "fetch", "--tags", "origin"], self.repo_dir)
+
+    def worktree_path(self, installation_id: str) -> str:
+        return os.path.join(
+            self.worktree_root,
+            re.sub(r"[^\w.-]", "_", installation_id)
+        )
+
+    async def create_worktree(
+        self,
+        installation_id: str,
+        version: str,
+        run_command: RunCommand
+    ) -> str:
+        """Create a detached worktree of ``version`` for one installation."""
+        path = self.worktree_path(installation_id)
+
+        async with self._locked():
+            fetched = await self._update(run_command)
+            ref = await self._resolve_ref(version, run_command)
+            if ref is None and not fetched:
+                # A tag or branch published since the last fetch
+                self.logger.info(f"Klipper version {version} not found, fetching")
+                await self._fetch(run_command)
+                ref = await self._resolve_ref(version, run_command)
+            if ref is None:
+                raise ValueError(f"Unknown Klipper version: {version}")
+            if os.path.exists(path):
+                await self._remove(path, run_command)
+            os.makedirs(self.worktree_root, exist_ok=True)
+            await run_command(
+                ["git", "worktree", "add", "--detach", "--force", path, ref],
+                self.repo_dir
+            )
+        return path
+
+    async def _resolve_ref(
+        self,
+        version: str,
+        run_command: RunCommand
+    ) -> Optional[str]:
+        """Remote branch ``origin/<version>`` if there is one, else the tag or SHA.
+
+        The shared clone is only fetched, so branches exist solely as
+        remote-tracking refs. Returns None if ``version`` names no commit.
+        """
+        for ref in (f"origin/{version}", version):
+            try:
+                await run_command(
+                    ["git", "rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}"],
+                    self.repo_dir
+                )
+                return ref
+            except Exception:
+                continue
+        return None
+
+    async def remove_worktree(self, installation_id: str, run_command: RunCommand):
+        """Remove the worktree of an installation."""
+        path = self.worktree_path(installation_id)
+        async with self._locked():
+            await self._remove(path, run_command)
+
+    async def _remove(self, path: str, run_command: RunCommand):
+        try:
+            await run_command(
+                ["git", "worktree", "remove", "--force", path],
+                self.repo_dir
+            )
+        except Exception as e:
+            self.logger.warning(f"Failed to remove worktree {path}: {str(e)}")
+            shutil.rmtree(path, ignore_errors=True)
+            await run_command(["git", "worktree", "prune"], self.repo_dir)
@@ -4,12 +4,18 @@ from fastapi.responses import JSONResponse
 from typing import List
 import logging
 import os
+from pathlib import Path
 
-from app.routers import boards, config, installation
+from app.routers import analytics, boards, config, installation
 from app.core.config import settings
 from app.core.logging import setup_logging
-from app.websocket.connection import ConnectionManager
+from app.websocket.connection import manager
 from app.websocket.events import EventTypes
+from backend.app.core.event_bus import create_event_bus
+from backend.app.core.websocket import MessageEncoding
+from backend.app.monitoring.analytics import configure_analytics, get_analytics
+from backend.app.monitoring.error_tracking import error_tracker
+from backend.app.monitoring.middleware import RequestTimingMiddleware
 
 # Setup logging
 setup_logging()
@@ -30,20 +36,30 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# WebSocket connection manager
-manager = ConnectionManager()
+# Request timings by route template for Prometheus and the performance monitor
+app.add_middleware(RequestTimingMiddleware)
 
 # Include routers
 app.include_router(boards.router, prefix="/api/boards", tags=["boards"])
 app.include_router(config.router, prefix="/api/config", tags=["config"])
 app.include_router(installation.router, prefix="/api/install", tags=["installation"])
+app.include_router(analytics.router, prefix="/api/analytics", tags=["analytics"])
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+    # Clients opt in to compact log batches with ?encoding=columnar and
+    # resume after a reconnect with ?last_seq=<n>
+    encoding = MessageEncoding.negotiate(websocket.query_params.get("encoding"))
+    last_seq = websocket.query_params.get("last_seq")
+    await manager.connect(
+        websocket,
+        encoding,
+        int(last_seq) if last_seq and last_seq.isdigit() else None
+    )
     try:
         while True:
             data = await websocket.receive_json()
+            manager.touch(websocket)
             event_type = data.get("type")
             event_data = data.get("data")
 
@@ -63,7 +79,7 @@ async def websocket_endpoint(websocket: WebSocket):
         manager.disconnect(websocket)
     except Exception as e:
         logger.error(f"WebSocket error: {str(e)}")
-        await manager.disconnect(websocket)
+        manager.disconnect(websocket)
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
@@ -79,9 +95,17 @@ async def global_exception_handler(request, exc):
 @app.on_event("startup")
 async def startup_event():
     logger.info("Starting InnovateOS Klipper Installer API")
-    # Initialize any required services here
+    # Share websocket broadcasts between uvicorn workers
+    await manager.start_bus(create_event_bus(settings.EVENT_BUS_URL))
+    manager.start_reaper()
+    configure_analytics(Path(settings.ANALYTICS_DIR))
+    await error_tracker.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Shutting down InnovateOS Klipper Installer API")
-    # Cleanup any resources here
+    manager.stop_reaper()
+    await manager.close_bus()
+    # Write out batched analytics and error records
+    await get_analytics().close()
+    await error_tracker.stop()
@@ -0,0 +1,32 @@
+from fastapi import APIRouter
+from datetime import datetime, timezone
+from typing import Optional
+import logging
+
+from app.schemas.analytics import AnalyticsBatch, AnalyticsBatchResult
+from backend.app.monitoring.analytics import get_analytics
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+def _utc_isoformat(timestamp: Optional[datetime]) -> Optional[str]:
+    # Stored like server-side events: naive UTC in ISO format
+    if timestamp is None:
+        return None
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp.isoformat()
+
+@router.post("/events", response_model=AnalyticsBatchResult)
+async def ingest_events(batch: AnalyticsBatch):
+    """Record a batch of frontend events in one request"""
+    events = [
+        {
+            "event_type": event.event_type,
+            "user_id": event.user_id,
+            "timestamp": _utc_isoformat(event.timestamp),
+            "properties": event.properties
+        }
+        for event in batch.events
+    ]
+    return AnalyticsBatchResult(recorded=await get_analytics().track_events(events))
@@ -1,22 +1,41 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks, WebSocket
-from typing import Optional
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Request
+from fastapi.responses import StreamingResponse
+from typing import Dict, Optional
 import asyncio
+import functools
 import logging
 import os
-import subprocess
+import time
 
+from backend.app.core.process_runner import ResourceClass, process_runner
 from app.core.config import settings
+from app.core.klipper_source import KlipperSource
 from app.schemas.installation import InstallationRequest, InstallationStatus
+from app.websocket.connection import get_websocket_manager
 from app.websocket.events import EventTypes, LogLevel
+from app.websocket.log_stream import LogStream
 from app.core.logging import LoggerMixin
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Final installation states; their status is forgotten after the retention
+FINISHED_STATES = {"completed", "failed", "cancelled"}
+
 class InstallationManager(LoggerMixin):
     def __init__(self):
         self.installation_tasks = {}
+        self.log_streams: Dict[str, LogStream] = {}
+        # Monotonic time each finished installation ended
+        self.finished: Dict[str, float] = {}
+        self.statuses: Dict[str, dict] = {}
+        # Monotonic time at which a finished installation's status expires
+        self.status_expiry: Dict[str, float] = {}
         self.firmware_dir = settings.FIRMWARE_DIR
+        self.klipper_source = KlipperSource(
+            self.firmware_dir,
+            settings.KLIPPER_FETCH_INTERVAL
+        )
 
     async def start_installation(
         self,
@@ -83,48 +102,51 @@ class InstallationManager(LoggerMixin):
         websocket_manager
     ):
         """Run the installation process."""
+        log_stream = LogStream(websocket_manager, installation_id)
+        self.log_streams[installation_id] = log_stream
+        self.finished.pop(installation_id, None)
+        log_stream.start()
+        build_dir = None
         try:
-            # Step 1: Clone/Update Klipper repository
+            # Step 1: Prepare an isolated Klipper worktree
             await self._send_status(
                 websocket_manager,
+                installation_id,
                 "downloading",
                 "Downloading Klipper firmware"
             )
             
-            if not os.path.exists(os.path.join(self.firmware_dir, "klipper")):
-                await self._run_command(
-                    ["git", "clone", settings.KLIPPER_REPO],
-                    cwd=self.firmware_dir,
-                    websocket_manager=websocket_manager
-                )
-            else:
-                await self._run_command(
-                    ["git", "pull"],
-                    cwd=os.path.join(self.firmware_dir, "klipper"),
-                    websocket_manager=websocket_manager
-                )
+            run_command = functools.partial(self._run_command, log_stream=log_stream)
+            build_dir = await self.klipper_source.create_worktree(
+                installation_id,
+                request.firmware_version or settings.KLIPPER_BRANCH,
+                run_command
+            )
 
             # Step 2: Configure and build firmware
             await self._send_status(
                 websocket_manager,
+                installation_id,
                 "building",
                 "Building firmware"
             )
             
             # Generate Klipper config
-            config_path = os.path.join(self.firmware_dir, "klipper", ".config")
+            config_path = os.path.join(build_dir, ".config")
             self._generate_klipper_config(request.board_type, config_path)
             
             # Build firmware
             await self._run_command(
                 ["make"],
-                cwd=os.path.join(self.firmware_dir, "klipper"),
-                websocket_manager=websocket_manager
+                cwd=build_dir,
+                log_stream=log_stream,
+                resource=ResourceClass.CPU
             )
 
             # Step 3: Flash firmware
             await self._send_status(
                 websocket_manager,
+                installation_id,
                 "flashing",
                 "Flashing firmware"
             )
@@ -132,13 +154,15 @@ class InstallationManager(LoggerMixin):
             flash_command = self._get_flash_command(request.board_type, request.board_port)
             await self._run_command(
                 flash_command,
-                cwd=os.path.join(self.firmware_dir, "klipper"),
-                websocket_manager=websocket_manager
+                cwd=build_dir,
+                log_stream=log_stream,
+                resource=ResourceClass.USB
             )
 
             # Step 4: Complete
             await self._send_status(
                 websocket_manager,
+                installation_id,
                 "completed",
                 "Installation completed successfully"
             )
@@ -146,6 +170,7 @@ class InstallationManager(LoggerMixin):
         except asyncio.CancelledError:
             await self._send_status(
                 websocket_manager,
+                installation_id,
                 "cancelled",
                 "Installation cancelled"
             )
@@ -154,53 +179,44 @@ class InstallationManager(LoggerMixin):
             self.logger.error(f"Installation failed: {str(e)}")
             await self._send_status(
                 websocket_manager,
+                installation_id,
                 "failed",
                 f"Installation failed: {str(e)}"
             )
             raise
+        finally:
+            if build_dir:
+                try:
+                    await self.klipper_source.remove_worktree(installation_id, run_command)
+                except Exception as e:
+                    self.logger.error(f"Failed to clean up worktree: {str(e)}")
+            await log_stream.close()
 
     async def _run_command(
         self,
         command: list,
         cwd: str,
-        websocket_manager,
+        log_stream: LogStream,
+        resource: ResourceClass = ResourceClass.IO,
         timeout: Optional[int] = None
     ):
         """Run a shell command and stream output."""
-        process = await asyncio.create_subprocess_exec(
-            *command,
+        result = await process_runner.run(
+            command,
+            resource,
             cwd=cwd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
+            installation_id=log_stream.installation_id,
+            on_line=lambda line, is_stderr: log_stream.append(
+                line.strip(),
+                LogLevel.ERROR if is_stderr else LogLevel.INFO
+            ),
+            timeout=timeout
         )
 
-        async def read_stream(stream, level: LogLevel):
-            while True:
-                line = await stream.readline()
-                if not line:
-                    break
-                await self._send_log(
-                    websocket_manager,
-                    line.decode().strip(),
-                    level
-                )
-
-        await asyncio.gather(
-            read_stream(process.stdout, LogLevel.INFO),
-            read_stream(process.stderr, LogLevel.ERROR)
-        )
-
-        if timeout:
-            try:
-                await asyncio.wait_for(process.wait(), timeout)
-            except asyncio.TimeoutError:
-                process.kill()
-                raise Exception(f"Command timed out after {timeout} seconds")
-        else:
-            await process.wait()
-
-        if process.returncode != 0:
-            raise Exception(f"Command failed with exit code {process.returncode}")
+        if result.timed_out:
+            raise Exception(f"Command timed out after {timeout} seconds")
+        if result.returncode != 0:
+            raise Exception(f"Command failed with exit code {result.returncode}")
 
     def _generate_klipper_config(self, board_type: str, config_path: str):
         """Generate Klipper firmware configuration."""
@@ -229,6 +245,7 @@ class InstallationManager(LoggerMixin):
     async def _send_status(
         self,
         websocket_manager,
+        installation_id: str,
         status: str,
         message: str
     ):
@@ -236,26 +253,39 @@ class InstallationManager(LoggerMixin):
         await websocket_manager.broadcast_json({
             "type": EventTypes.INSTALLATION_STATUS,
             "data": {
+                "installation_id": installation_id,
                 "status": status,
                 "message": message
             }
         })
 
-    async def _send_log(
-        self,
-        websocket_manager,
-        message: str,
-        level: LogLevel
-    ):
-        """Send log message."""
-        await websocket_manager.broadcast_json({
-            "type": EventTypes.INSTALLATION_LOG,
-            "data": {
-                "message": message,
-                "level": level,
-                "timestamp": datetime.now().isoformat()
-            }
-        })
+    def track_status(self, message: dict):
+        """Remember the latest status of every installation, on any worker."""
+        if message.get("type") == EventTypes.INSTALLATION_STATUS:
+            data = message["data"]
+            installation_id = data["installation_id"]
+            self.statuses[installation_id] = data
+            if data["status"] in FINISHED_STATES:
+                self.status_expiry[installation_id] = (
+                    time.monotonic() + settings.INSTALLATION_RETENTION
+                )
+                asyncio.get_running_loop().call_later(
+                    settings.INSTALLATION_RETENTION, self._expire_statuses
+                )
+            else:
+                self.status_expiry.pop(installation_id, None)
+
+    def _expire_statuses(self):
+        """Forget statuses of installations finished before the retention."""
+        now = time.monotonic()
+        for installation_id, expiry in list(self.status_expiry.items()):
+            if expiry <= now:
+                del self.status_expiry[installation_id]
+                self.statuses.pop(installation_id, None)
+
+    def get_snapshot(self) -> dict:
+        """Latest status of every known installation."""
+        return {"installations": list(self.statuses.values())}
 
     async def _cleanup_installation(self, installation_id: str, task: asyncio.Task):
         """Clean up installation task."""
@@ -267,8 +297,50 @@ class InstallationManager(LoggerMixin):
             self.logger.error(f"Installation task failed: {str(e)}")
         finally:
             self.installation_tasks.pop(installation_id, None)
+            usage = process_runner.release(installation_id)
+            if usage:
+                self.logger.info(f"Installation {installation_id} resource usage: {usage}")
+            self.finished[installation_id] = time.monotonic()
+            asyncio.get_running_loop().call_later(
+                settings.INSTALLATION_RETENTION, self._prune_finished
+            )
+
+    def _prune_finished(self):
+        """Drop log history of installations finished before the retention.
+
+        Installations an SSE client is still following are kept and
+        checked again one retention period later.
+        """
+        cutoff = time.monotonic() - settings.INSTALLATION_RETENTION
+        watched = get_websocket_manager().watched_installations()
+        kept = False
+        for installation_id, finished in list(self.finished.items()):
+            if finished > cutoff:
+                continue
+            if installation_id in watched:
+                kept = True
+                continue
+            del self.finished[installation_id]
+            self.log_streams.pop(installation_id, None)
+        if kept:
+            asyncio.get_running_loop().call_later(
+                settings.INSTALLATION_RETENTION, self._prune_finished
+            )
+
+    def get_log_history(self, installation_id: str) -> list:
+        """Get buffered log lines of an installation."""
+        log_stream = self.log_streams.get(installation_id)
+        if not log_stream:
+            raise HTTPException(
+                status_code=404,
+                detail="Installation not found"
+            )
+        return list(log_stream.history)
 
 installation_manager = InstallationManager()
+# Reconnecting clients whose missed events are no longer buffered get this
+get_websocket_manager().snapshot_provider = installation_manager.get_snapshot
+get_websocket_manager().listeners.append(installation_manager.track_status)
 
 @router.post("/start")
 async def start_installation(
@@ -291,3 +363,45 @@ async def cancel_installation(installation_id: str):
     Cancel ongoing installation.
     """
     return await installation_manager.cancel_installation(installation_id)
+
+@router.get("/logs/{installation_id}")
+async def get_installation_logs(installation_id: str):
+    """
+    Get buffered log output of an installation.
+    """
+    return {"lines": installation_manager.get_log_history(installation_id)}
+
+@router.get("/events")
+async def installation_events(
+    request: Request,
+    installation_id: Optional[str] = None,
+    websocket_manager=Depends(get_websocket_manager)
+):
+    """
+    Stream installation status and log events as Server-Sent Events.
+
+    Read-only alternative to the websocket for dashboards. Browsers resume
+    from the Last-Event-ID header after a reconnect.
+    """
+    last_event_id = request.headers.get("last-event-id", "")
+    stream = websocket_manager.open_event_stream(
+        installation_id,
+        int(last_event_id) if last_event_id.isdigit() else None
+    )
+
+    async def body():
+        try:
+            async for frame in stream.frames(keepalive=settings.WS_HEARTBEAT_INTERVAL):
+                yield frame
+        finally:
+            websocket_manager.close_event_stream(stream)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Tell nginx not to buffer the stream
+            "X-Accel-Buffering": "no"
+        }
+    )
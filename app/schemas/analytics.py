@@ -0,0 +1,34 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+
+class AnalyticsEvent(BaseModel):
+    event_type: str = Field(
+        ...,
+        min_length=1,
+        max_length=100,
+        description="Name of the event, e.g. page_view"
+    )
+    user_id: Optional[str] = Field(
+        default=None,
+        description="Anonymous user identifier"
+    )
+    timestamp: Optional[datetime] = Field(
+        default=None,
+        description=(
+            "When the event happened (UTC); defaults to arrival time. "
+            "Future times are replaced by the arrival time, events older "
+            "than the analytics retention are dropped"
+        )
+    )
+    properties: Dict[str, Any] = Field(default_factory=dict)
+
+class AnalyticsBatch(BaseModel):
+    events: List[AnalyticsEvent] = Field(
+        ...,
+        max_length=500,
+        description="Events collected by the frontend since the last upload"
+    )
+
+class AnalyticsBatchResult(BaseModel):
+    recorded: int
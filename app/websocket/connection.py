@@ -1,38 +1,311 @@
 from fastapi import WebSocket
-from typing import List, Dict, Any
+from typing import Callable, List, Dict, Any, NamedTuple, Optional, Set
+import asyncio
 import logging
+import time
+
+from backend.app.core.event_bus import EventBus
+from backend.app.monitoring.metrics import metrics_collector
+from backend.app.core.websocket import (
+    ClientConnection,
+    MessageEncoding,
+    OverflowPolicy,
+    ReplayBuffer,
+    encode_message
+)
+from app.core.config import settings
+from app.websocket.event_stream import EventStream, sse_frame
+from app.websocket.events import EventTypes
 
 logger = logging.getLogger(__name__)
 
+class BroadcastEvent(NamedTuple):
+    """Encoded frames of one broadcast, as kept for replay"""
+    frames: Dict[MessageEncoding, str]
+    installation_id: Optional[str]
+
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+    def __init__(
+        self,
+        max_queue: int = 256,
+        policy: OverflowPolicy = OverflowPolicy.COALESCE,
+        replay_size: int = 1000,
+        heartbeat_interval: float = 20.0,
+        idle_timeout: float = 60.0
+    ):
+        self.max_queue = max_queue
+        self.policy = policy
+        # Registry of open connections with per-connection state
+        self.clients: Dict[WebSocket, ClientConnection] = {}
+        # Clients are pinged after heartbeat_interval seconds of silence and
+        # reaped after idle_timeout seconds
+        self.heartbeat_interval = heartbeat_interval
+        self.idle_timeout = idle_timeout
+        self.reaped_total = 0
+        self._reaper: Optional[asyncio.Task] = None
+        # Read-only Server-Sent Events subscribers; not pinged or reaped
+        self.event_streams: Dict[EventStream, ClientConnection] = {}
+        # Broadcasts are numbered and kept so reconnecting clients can catch up
+        self.replay = ReplayBuffer(replay_size)
+        self.snapshot_provider: Optional[Callable[[], Dict[str, Any]]] = None
+        # Called with every delivered event, e.g. to track state for snapshots
+        self.listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self.bus: Optional[EventBus] = None
+
+    async def start_bus(self, bus: Optional[EventBus]):
+        """Share broadcasts with the other worker processes through ``bus``."""
+        if bus is None:
+            return
+        await bus.start(self._deliver)
+        self.bus = bus
+
+    async def close_bus(self):
+        if self.bus is not None:
+            await self.bus.close()
+            self.bus = None
+
+    @property
+    def active_connections(self) -> List[WebSocket]:
+        return list(self.clients)
 
-    async def connect(self, websocket: WebSocket):
+    async def connect(
+        self,
+        websocket: WebSocket,
+        encoding: MessageEncoding = MessageEncoding.JSON,
+        last_seq: Optional[int] = None
+    ):
         await websocket.accept()
-        self.active_connections.append(websocket)
-        logger.info(f"Client connected. Total connections: {len(self.active_connections)}")
+        client = ClientConnection(
+            websocket,
+            max_queue=self.max_queue,
+            policy=self.policy,
+            on_close=self._on_client_closed,
+            encoding=encoding
+        )
+        self.clients[websocket] = client
+        client.start()
+        if last_seq is not None:
+            self._catch_up(client, last_seq)
+        metrics_collector.update_websocket_connections(len(self.clients))
+        logger.info(f"Client connected. Total connections: {len(self.clients)}")
+
+    def _catch_up(self, client: ClientConnection, last_seq: int):
+        """Send the broadcasts a client missed, or a snapshot if evicted."""
+        missed = self.replay.since(last_seq)
+        if missed is not None:
+            for event in missed:
+                client.send(event.frames.get(client.encoding, event.frames[MessageEncoding.JSON]))
+            return
+
+        client.send(self._snapshot())
+
+    def _snapshot(self) -> str:
+        return encode_message({
+            "type": EventTypes.SNAPSHOT.value,
+            "seq": self.replay.seq,
+            "data": self.snapshot_provider() if self.snapshot_provider else {}
+        })
+
+    def open_event_stream(
+        self,
+        installation_id: Optional[str] = None,
+        last_seq: Optional[int] = None
+    ) -> EventStream:
+        """Subscribe a Server-Sent Events client.
+
+        The stream starts with the events after ``last_seq`` (the
+        Last-Event-ID), or with a snapshot if there is no cursor or the gap
+        was already evicted.
+        """
+        stream = EventStream(installation_id)
+        # A stream that falls behind is closed and resumes via Last-Event-ID
+        client = ClientConnection(
+            stream,
+            max_queue=self.max_queue,
+            policy=OverflowPolicy.DISCONNECT,
+            on_close=lambda client: self.close_event_stream(client.websocket)
+        )
+        self.event_streams[stream] = client
+        client.start()
+
+        missed = self.replay.entries_since(last_seq) if last_seq is not None else None
+        if missed is None:
+            client.send(sse_frame(self.replay.seq, self._snapshot()))
+        else:
+            for seq, event in missed:
+                if stream.accepts(event.installation_id):
+                    client.send(sse_frame(seq, event.frames[MessageEncoding.JSON]))
+        return stream
+
+    def watched_installations(self) -> Set[str]:
+        """Installations an open event stream is filtered on."""
+        return {
+            stream.installation_id for stream in self.event_streams
+            if stream.installation_id is not None
+        }
+
+    def close_event_stream(self, stream: EventStream):
+        client = self.event_streams.pop(stream, None)
+        if client is not None:
+            client.close()
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
-        logger.info(f"Client disconnected. Total connections: {len(self.active_connections)}")
+        client = self.clients.pop(websocket, None)
+        if client is None:
+            return
+        client.close()
+        metrics_collector.update_websocket_connections(len(self.clients))
+        logger.info(f"Client disconnected. Total connections: {len(self.clients)}")
 
-    async def send_json(self, websocket: WebSocket, data: Dict[str, Any]):
-        try:
-            await websocket.send_json(data)
-        except Exception as e:
-            logger.error(f"Error sending message to client: {str(e)}")
-            await self.disconnect(websocket)
-
-    async def broadcast_json(self, data: Dict[str, Any]):
-        disconnected = []
-        for connection in self.active_connections:
+    def touch(self, websocket: WebSocket):
+        """Record a message from a client; any message counts as a pong."""
+        client = self.clients.get(websocket)
+        if client is not None:
+            client.touch()
+
+    def start_reaper(self):
+        if self._reaper is None:
+            self._reaper = asyncio.create_task(self._reap_loop())
+
+    def stop_reaper(self):
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+
+    async def _reap_loop(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
             try:
-                await connection.send_json(data)
+                self.reap()
             except Exception as e:
-                logger.error(f"Error broadcasting to client: {str(e)}")
-                disconnected.append(connection)
+                logger.error(f"Error reaping websocket connections: {str(e)}")
+
+    def reap(self) -> int:
+        """Ping quiet clients and close the ones that stopped answering.
+
+        Returns the number of reaped connections.
+        """
+        now = time.monotonic()
+        dead = []
+        quiet = []
+        for client in self.clients.values():
+            silence = now - client.last_seen
+            if silence > self.idle_timeout:
+                dead.append(client)
+            elif silence >= self.heartbeat_interval:
+                quiet.append(client)
+
+        if quiet:
+            ping = encode_message({"type": EventTypes.PING.value})
+            for client in quiet:
+                client.send(ping)
+
+        for client in dead:
+            # 1001: going away
+            client.evict(code=1001)
+        if dead:
+            self.reaped_total += len(dead)
+            metrics_collector.track_websocket_reaped(len(dead))
+            logger.info(f"Reaped {len(dead)} idle websocket connections")
+        return len(dead)
+
+    def _on_client_closed(self, client: ClientConnection):
+        # Called when the writer fails or the overflow policy evicts a client
+        self.disconnect(client.websocket)
+
+    async def send_json(self, websocket: WebSocket, data: Dict[str, Any]):
+        client = self.clients.get(websocket)
+        if client is not None:
+            client.send(data)
+
+    async def broadcast_json(self, data: Dict[str, Any], key: Optional[str] = None):
+        """Queue a message for every client without waiting for slow ones.
+
+        The message is encoded once and the same text frame is queued for
+        every client. Messages with the same ``key`` may be coalesced in a
+        client's queue.
+        """
+        await self.broadcast_variants({MessageEncoding.JSON: data}, key)
+
+    async def broadcast_variants(
+        self,
+        messages: Dict[MessageEncoding, Dict[str, Any]],
+        key: Optional[str] = None
+    ):
+        """Broadcast one event given in several encodings.
+
+        With an event bus the event goes to every worker process and is
+        delivered from there; otherwise it is delivered locally.
+        """
+        event = {
+            "messages": {encoding.value: message for encoding, message in messages.items()},
+            "key": key
+        }
+        if self.bus is not None:
+            await self.bus.publish(event)
+        else:
+            self._deliver(self.replay.seq + 1, event)
+
+    def _deliver(self, seq: int, event: Dict[str, Any]):
+        """Send an event to the local clients.
+
+        Every variant is stamped with the same sequence number, encoded once
+        and kept for replay. Each client gets the frame for its negotiated
+        encoding, falling back to JSON.
+        """
+        messages = {
+            MessageEncoding(encoding): message
+            for encoding, message in event["messages"].items()
+        }
+        frames = {
+            encoding: encode_message({**message, "seq": seq})
+            for encoding, message in messages.items()
+            if encoding == MessageEncoding.JSON or self._has_clients(encoding)
+        }
+        message = messages[MessageEncoding.JSON]
+        installation_id = (message.get("data") or {}).get("installation_id")
+        self.replay.record(seq, BroadcastEvent(frames, installation_id))
+        for listener in self.listeners:
+            listener(message)
+
+        key = event.get("key")
+        fallback = frames[MessageEncoding.JSON]
+        for client in list(self.clients.values()):
+            client.send(frames.get(client.encoding, fallback), key)
+
+        if self.event_streams:
+            # The SSE frame wraps the already encoded JSON frame
+            sse = sse_frame(seq, fallback)
+            for stream, client in list(self.event_streams.items()):
+                if stream.accepts(installation_id):
+                    client.send(sse)
+
+    async def broadcast_text(self, text: str, key: Optional[str] = None):
+        """Queue an already encoded message for all clients.
+
+        These frames are not sequenced and are not replayed.
+        """
+        for client in list(self.clients.values()):
+            client.send(text, key)
+
+    def _has_clients(self, encoding: MessageEncoding) -> bool:
+        return any(client.encoding == encoding for client in self.clients.values())
+
+    def uses_encoding(self, encoding: MessageEncoding) -> bool:
+        """Whether an event should be published in this encoding"""
+        # Clients of other workers may use it
+        return self.bus is not None or self._has_clients(encoding)
+
+    def get_client_metrics(self) -> List[Dict[str, Any]]:
+        """Queue depth and send latency of every connected client"""
+        return [client.get_metrics() for client in self.clients.values()]
+
+manager = ConnectionManager(
+    max_queue=settings.WS_SEND_QUEUE_SIZE,
+    policy=OverflowPolicy(settings.WS_OVERFLOW_POLICY),
+    heartbeat_interval=settings.WS_HEARTBEAT_INTERVAL,
+    idle_timeout=settings.WS_IDLE_TIMEOUT
+)
 
-        # Clean up disconnected clients
-        for connection in disconnected:
-            await self.disconnect(connection)
+def get_websocket_manager() -> ConnectionManager:
+    return manager
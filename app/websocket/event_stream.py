@@ -0,0 +1,39 @@
+from typing import AsyncIterator, Optional
+import asyncio
+
+def sse_frame(seq: int, data: str) -> str:
+    """Format an encoded message as a Server-Sent Event."""
+    return f"id: {seq}\ndata: {data}\n\n"
+
+class EventStream:
+    """A read-only Server-Sent Events subscriber.
+
+    It is fed through a ClientConnection like a websocket, so the same
+    queueing and overflow policy apply. Frames are handed over one at a
+    time; a slow HTTP client therefore fills its ClientConnection queue
+    instead of buffering here.
+    """
+
+    def __init__(self, installation_id: Optional[str] = None):
+        self.installation_id = installation_id
+        self._frames: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self.closed = False
+
+    def accepts(self, installation_id: Optional[str]) -> bool:
+        return self.installation_id is None or self.installation_id == installation_id
+
+    async def send_text(self, text: str):
+        await self._frames.put(text)
+
+    async def close(self, code: int = 1000):
+        self.closed = True
+
+    async def frames(self, keepalive: float) -> AsyncIterator[str]:
+        """Yield frames, with a comment every ``keepalive`` seconds of silence."""
+        # Ask EventSource to reconnect after 3 seconds
+        yield "retry: 3000\n\n"
+        while not self.closed:
+            try:
+                yield await asyncio.wait_for(self._frames.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
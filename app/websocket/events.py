@@ -3,6 +3,10 @@ from enum import Enum
 class EventTypes(str, Enum):
     INSTALLATION_STATUS = "installation_status"
     INSTALLATION_LOG = "installation_log"
+    INSTALLATION_LOG_BATCH = "installation_log_batch"
+    SNAPSHOT = "snapshot"
+    PING = "ping"
+    PONG = "pong"
     BOARD_DETECTED = "board_detected"
     CONFIG_UPDATED = "config_updated"
     ERROR = "error"
@@ -0,0 +1,118 @@
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+import asyncio
+import logging
+
+from app.websocket.events import EventTypes, LogLevel
+from backend.app.core.websocket import MessageEncoding
+
+logger = logging.getLogger(__name__)
+
+class LogStream:
+    """Batches installation log lines into websocket frames.
+
+    Lines are collected and flushed every ``flush_interval`` seconds or as
+    soon as ``max_batch`` lines are pending. Each frame is JSON-encoded
+    once and sent as text to every client. The last ``history_size``
+    lines are kept for clients that ask for the log history.
+    """
+
+    def __init__(
+        self,
+        websocket_manager,
+        installation_id: str,
+        flush_interval: float = 0.05,
+        max_batch: int = 200,
+        history_size: int = 2000
+    ):
+        self.websocket_manager = websocket_manager
+        self.installation_id = installation_id
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.history: Deque[Dict[str, Any]] = deque(maxlen=history_size)
+        self._pending: List[Dict[str, Any]] = []
+        self._wakeup = asyncio.Event()
+        self._closed = False
+        self._task: Optional[asyncio.Task] = None
+        self.frames_sent = 0
+
+    def start(self):
+        """Start the periodic flush task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Stop the flush task and send any pending lines."""
+        self._closed = True
+        self._wakeup.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        await self.flush()
+
+    def append(self, message: str, level: LogLevel):
+        """Queue a log line for the next frame."""
+        line = {"message": message, "level": level.value}
+        self._pending.append(line)
+        self.history.append(line)
+        if len(self._pending) >= self.max_batch:
+            self._wakeup.set()
+
+    async def _run(self):
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+    async def flush(self):
+        """Send all pending lines as a single frame."""
+        self._wakeup.clear()
+        if not self._pending:
+            return
+
+        lines, self._pending = self._pending, []
+        timestamp = datetime.now().isoformat()
+        messages = {
+            MessageEncoding.JSON: {
+                "type": EventTypes.INSTALLATION_LOG_BATCH.value,
+                "data": {
+                    "installation_id": self.installation_id,
+                    "timestamp": timestamp,
+                    "lines": lines
+                }
+            }
+        }
+        if self.websocket_manager.uses_encoding(MessageEncoding.COLUMNAR):
+            messages[MessageEncoding.COLUMNAR] = self._columnar_frame(lines, timestamp)
+
+        try:
+            await self.websocket_manager.broadcast_variants(messages)
+            self.frames_sent += 1
+        except Exception as e:
+            logger.error(f"Error streaming installation log: {str(e)}")
+
+    def _columnar_frame(self, lines: List[Dict[str, Any]], timestamp: str) -> Dict[str, Any]:
+        """Encode a batch as a message column and run-length encoded levels.
+
+        Build output is almost entirely one level, so the level column
+        usually collapses to a single ``[level, count]`` run.
+        """
+        levels: List[List[Any]] = []
+        for line in lines:
+            if levels and levels[-1][0] == line["level"]:
+                levels[-1][1] += 1
+            else:
+                levels.append([line["level"], 1])
+        return {
+            "type": EventTypes.INSTALLATION_LOG_BATCH.value,
+            "encoding": MessageEncoding.COLUMNAR.value,
+            "data": {
+                "installation_id": self.installation_id,
+                "timestamp": timestamp,
+                "messages": [line["message"] for line in lines],
+                "levels": levels
+            }
+        }
@@ -0,0 +1,283 @@
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Set
+
+from .websocket import encode_message
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # pragma: no cover - redis is optional
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+EventHandler = Callable[[int, Dict[str, Any]], None]
+
+class EventBus(ABC):
+    """Shares broadcast events between worker processes.
+
+    Every event published by any process is delivered to the handler of
+    every process, including the publisher, together with a sequence
+    number. All processes see the same events in the same order with the
+    same sequence numbers, so replay cursors are valid on every worker.
+    """
+
+    def __init__(self):
+        self.handler: Optional[EventHandler] = None
+
+    @abstractmethod
+    async def start(self, handler: EventHandler):
+        """Connect and deliver events to ``handler``; overrides call super()"""
+        self.handler = handler
+
+    @abstractmethod
+    async def publish(self, event: Dict[str, Any]):
+        """Send an event to all processes"""
+
+    @abstractmethod
+    async def close(self):
+        """Disconnect and release resources"""
+
+    def _deliver(self, seq: int, payload: bytes):
+        try:
+            self.handler(seq, json.loads(payload))
+        except Exception as e:
+            logger.error(f"Error delivering event {seq}: {str(e)}")
+
+class UnixSocketEventBus(EventBus):
+    """Event bus over a Unix socket broker run by one of the workers.
+
+    The worker holding the lock file serves the socket; every worker,
+    including the broker itself, connects as a client. The broker numbers
+    events in arrival order and forwards them to all clients. If the
+    broker process dies, its lock is released and the next worker to
+    reconnect takes over.
+
+    Publishing never waits for the broker: while disconnected, events are
+    kept in an outbox of at most ``max_outbox`` events, which is sent on
+    reconnect. When it is full the oldest event is dropped and counted in
+    ``dropped``.
+    """
+
+    # Drop a client whose unsent events exceed this many bytes
+    MAX_PEER_BUFFER = 8 * 1024 * 1024
+
+    def __init__(
+        self,
+        path: str,
+        reconnect_interval: float = 1.0,
+        connect_timeout: float = 5.0,
+        max_outbox: int = 1000
+    ):
+        super().__init__()
+        self.path = path
+        self.reconnect_interval = reconnect_interval
+        self.connect_timeout = connect_timeout
+        self.dropped = 0
+        self._outbox: Deque[bytes] = deque()
+        self._max_outbox = max_outbox
+        self._overflowed = False
+        self._lock_fd: Optional[int] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._peers: Set[asyncio.StreamWriter] = set()
+        self._seq = 0
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._connected = asyncio.Event()
+        self._closed = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, handler: EventHandler):
+        await super().start(handler)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._task = asyncio.create_task(self._run())
+        try:
+            await asyncio.wait_for(self._connected.wait(), self.connect_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Event bus at {self.path} not reachable yet")
+
+    def _try_lock(self) -> bool:
+        fd = os.open(self.path + ".lock", os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    async def _serve_if_leader(self):
+        if self._server is not None or not self._try_lock():
+            return
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        # Like ReplayBuffer: a restarted broker continues above old cursors
+        self._seq = time.time_ns() // 1_000_000
+        self._server = await asyncio.start_unix_server(self._handle_peer, self.path)
+        logger.info(f"Serving event bus at {self.path}")
+
+    async def _handle_peer(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._peers.add(writer)
+        try:
+            while True:
+                payload = await reader.readline()
+                if not payload:
+                    break
+                self._seq += 1
+                line = f"{self._seq} ".encode() + payload
+                for peer in list(self._peers):
+                    if peer.transport.get_write_buffer_size() > self.MAX_PEER_BUFFER:
+                        logger.warning("Dropping event bus client that stopped reading")
+                        self._peers.discard(peer)
+                        peer.close()
+                        continue
+                    peer.write(line)
+        except asyncio.CancelledError:
+            # Server shutting down; returning normally keeps asyncio's
+            # stream callback from logging the cancellation as an error
+            pass
+        except Exception as e:
+            logger.error(f"Event bus client error: {str(e)}")
+        finally:
+            self._peers.discard(writer)
+            writer.close()
+
+    async def _run(self):
+        while not self._closed:
+            await self._serve_if_leader()
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path)
+            except OSError:
+                await asyncio.sleep(self.reconnect_interval)
+                continue
+
+            # Sent before new events can bypass the outbox, keeping order
+            while self._outbox:
+                writer.write(self._outbox.popleft())
+            if self._overflowed:
+                logger.warning(f"Event bus reconnected, {self.dropped} events dropped so far")
+                self._overflowed = False
+            self._writer = writer
+            self._connected.set()
+            try:
+                await writer.drain()
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    seq, _, payload = line.partition(b" ")
+                    self._deliver(int(seq), payload)
+            except Exception as e:
+                logger.error(f"Event bus connection error: {str(e)}")
+            finally:
+                self._connected.clear()
+                self._writer = None
+                writer.close()
+            if not self._closed:
+                logger.warning("Lost connection to event bus, reconnecting")
+                await asyncio.sleep(self.reconnect_interval)
+
+    async def publish(self, event: Dict[str, Any]):
+        line = encode_message(event).encode() + b"\n"
+        if self._writer is not None:
+            self._writer.write(line)
+            await self._writer.drain()
+            return
+        if len(self._outbox) >= self._max_outbox:
+            if not self._overflowed:
+                logger.warning("Event bus outbox full, dropping oldest events")
+                self._overflowed = True
+            self._outbox.popleft()
+            self.dropped += 1
+        self._outbox.append(line)
+
+    async def close(self):
+        self._closed = True
+        if self._task is not None:
+            self._task.cancel()
+        if self._writer is not None:
+            self._writer.close()
+        if self._server is not None:
+            self._server.close()
+            for peer in list(self._peers):
+                peer.close()
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+
+class RedisEventBus(EventBus):
+    """Event bus over Redis pub/sub for workers on several hosts."""
+
+    # INCR and PUBLISH in one script so sequence order matches delivery order
+    PUBLISH_SCRIPT = """
+    if redis.call('EXISTS', KEYS[1]) == 0 then
+        redis.call('SET', KEYS[1], ARGV[2])
+    end
+    local seq = redis.call('INCR', KEYS[1])
+    redis.call('PUBLISH', KEYS[2], seq .. ' ' .. ARGV[1])
+    return seq
+    """
+
+    def __init__(self, url: str, channel: str = "klipper-installer:events"):
+        super().__init__()
+        if aioredis is None:
+            raise RuntimeError("The redis package is required for a redis:// event bus")
+        self.url = url
+        self.channel = channel
+        self.seq_key = f"{channel}:seq"
+        self._redis = None
+        self._pubsub = None
+        self._script = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, handler: EventHandler):
+        await super().start(handler)
+        self._redis = aioredis.from_url(self.url)
+        self._script = self._redis.register_script(self.PUBLISH_SCRIPT)
+        self._pubsub = self._redis.pubsub()
+        await self._pubsub.subscribe(self.channel)
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        async for message in self._pubsub.listen():
+            if message["type"] != "message":
+                continue
+            seq, _, payload = message["data"].partition(b" ")
+            self._deliver(int(seq), payload)
+
+    async def publish(self, event: Dict[str, Any]):
+        await self._script(
+            keys=[self.seq_key, self.channel],
+            args=[encode_message(event), time.time_ns() // 1_000_000]
+        )
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+        if self._pubsub is not None:
+            await self._pubsub.close()
+        if self._redis is not None:
+            await self._redis.close()
+
+def create_event_bus(url: str) -> Optional[EventBus]:
+    """Create the event bus for a URL.
+
+    ``unix:///path/to/socket`` shares events between the workers of one
+    host, ``redis://...`` between hosts. An empty URL disables the bus and
+    broadcasts stay within the process.
+    """
+    if not url:
+        return None
+    if url.startswith("unix://"):
+        return UnixSocketEventBus(url[len("unix://"):])
+    if url.startswith(("redis://", "rediss://")):
+        return RedisEventBus(url)
+    raise ValueError(f"Unsupported event bus URL: {url}")
@@ -0,0 +1,270 @@
+import asyncio
+import fcntl
+import logging
+import os
+import shutil
+import tempfile
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Callable, Deque, Dict, List, Optional
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - psutil is optional
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+class ResourceClass(str, Enum):
+    CPU = "cpu"   # compilers, make
+    IO = "io"     # git, downloads
+    USB = "usb"   # flash tools
+
+@dataclass
+class ResourceUsage:
+    processes: int = 0
+    wall_time: float = 0.0
+    user_time: float = 0.0
+    system_time: float = 0.0
+    max_rss: int = 0
+
+@dataclass
+class ProcessResult:
+    command: List[str]
+    returncode: int
+    duration: float
+    tail: List[str] = field(default_factory=list)
+    timed_out: bool = False
+
+    @property
+    def output(self) -> str:
+        return "\n".join(self.tail)
+
+class ProcessRunner:
+    """Runs external tools under global per-resource-class limits.
+
+    Every subprocess of the installer goes through one runner so parallel
+    installations cannot starve the API: each resource class has its own
+    limit, CPU-heavy builds run with lowered CPU and IO priority and may
+    be placed in a cgroup, resource usage is accounted per installation and
+    only a bounded tail of the output is kept.
+
+    The limits hold for the whole host, not per worker process: a running
+    command holds one of ``limits[resource]`` lock files in ``slot_dir``.
+    """
+
+    # Seconds between attempts to take a slot held by another process
+    SLOT_POLL_INTERVAL = 0.1
+
+    def __init__(
+        self,
+        limits: Optional[Dict[ResourceClass, int]] = None,
+        tail_lines: int = 200,
+        build_niceness: int = 10,
+        cgroup_dir: Optional[str] = None,
+        sample_interval: float = 1.0,
+        slot_dir: Optional[str] = None
+    ):
+        cpu_count = os.cpu_count() or 1
+        self.limits = {
+            ResourceClass.CPU: max(1, cpu_count - 1),
+            ResourceClass.IO: 2,
+            ResourceClass.USB: 1,
+        }
+        self.limits.update(limits or {})
+        self.tail_lines = tail_lines
+        self.build_niceness = build_niceness
+        self.cgroup_dir = cgroup_dir or os.environ.get("INSTALLER_BUILD_CGROUP")
+        self.slot_dir = slot_dir or os.environ.get("INSTALLER_SLOT_DIR") or os.path.join(
+            tempfile.gettempdir(), "klipper-installer-slots"
+        )
+        self.sample_interval = sample_interval
+        self.usage: Dict[str, ResourceUsage] = {}
+        self._semaphores: Dict[ResourceClass, asyncio.Semaphore] = {}
+
+    def _semaphore(self, resource: ResourceClass) -> asyncio.Semaphore:
+        if resource not in self._semaphores:
+            self._semaphores[resource] = asyncio.Semaphore(self.limits[resource])
+        return self._semaphores[resource]
+
+    @asynccontextmanager
+    async def _slot(self, resource: ResourceClass):
+        """Hold one of the host-wide slots of a resource class.
+
+        The semaphore queues the callers of this process, so only those
+        that could run locally poll for a slot held by another process.
+        """
+        async with self._semaphore(resource):
+            os.makedirs(self.slot_dir, exist_ok=True)
+            fd = self._try_slot(resource)
+            while fd is None:
+                await asyncio.sleep(self.SLOT_POLL_INTERVAL)
+                fd = self._try_slot(resource)
+            try:
+                yield
+            finally:
+                # Closing the descriptor releases the slot
+                os.close(fd)
+
+    def _try_slot(self, resource: ResourceClass) -> Optional[int]:
+        for index in range(self.limits[resource]):
+            path = os.path.join(self.slot_dir, f"{resource.value}.{index}.lock")
+            fd = os.open(path, os.O_CREAT | os.O_RDWR, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except BlockingIOError:
+                os.close(fd)
+        return None
+
+    def _wrap_command(self, command: List[str], resource: ResourceClass) -> List[str]:
+        """Lower scheduling priority of CPU-heavy commands"""
+        if resource != ResourceClass.CPU:
+            return command
+        prefix = []
+        if shutil.which("ionice"):
+            prefix += ["ionice", "-c", "3"]
+        if shutil.which("nice"):
+            prefix += ["nice", "-n", str(self.build_niceness)]
+        return prefix + command
+
+    def _place_in_cgroup(self, pid: int):
+        try:
+            with open(os.path.join(self.cgroup_dir, "cgroup.procs"), "w") as f:
+                f.write(str(pid))
+        except OSError as e:
+            logger.warning(f"Failed to move process {pid} to cgroup: {e}")
+
+    async def run(
+        self,
+        command: List[str],
+        resource: ResourceClass,
+        cwd: Optional[str] = None,
+        env: Optional[Dict[str, str]] = None,
+        installation_id: Optional[str] = None,
+        on_line: Optional[Callable[[str, bool], None]] = None,
+        timeout: Optional[float] = None
+    ) -> ProcessResult:
+        """Run a command and wait for it to finish.
+
+        ``on_line`` is called with each decoded output line and whether it
+        came from stderr.
+        """
+        async with self._slot(resource):
+            start = time.monotonic()
+            process = await asyncio.create_subprocess_exec(
+                *self._wrap_command(command, resource),
+                cwd=cwd,
+                env=env,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            if resource == ResourceClass.CPU and self.cgroup_dir:
+                self._place_in_cgroup(process.pid)
+
+            tail: Deque[str] = deque(maxlen=self.tail_lines)
+            sample = {"user": 0.0, "system": 0.0, "rss": 0}
+
+            async def read_stream(stream, is_stderr: bool):
+                while True:
+                    line = await stream.readline()
+                    if not line:
+                        break
+                    text = line.decode(errors="replace").rstrip()
+                    tail.append(text)
+                    if on_line:
+                        on_line(text, is_stderr)
+
+            async def sample_usage():
+                while True:
+                    self._sample(process.pid, sample)
+                    await asyncio.sleep(self.sample_interval)
+
+            async def communicate():
+                await asyncio.gather(
+                    read_stream(process.stdout, False),
+                    read_stream(process.stderr, True)
+                )
+                # Output closes when the process exits; sample before it is reaped
+                self._sample(process.pid, sample)
+                await process.wait()
+
+            sampler = asyncio.create_task(sample_usage())
+            timed_out = False
+            try:
+                await asyncio.wait_for(communicate(), timeout)
+            except asyncio.TimeoutError:
+                timed_out = True
+                self._kill(process)
+                await process.wait()
+            except BaseException:
+                # Cancelled, e.g. with its installation: releasing the
+                # slot must not leave the child running
+                self._kill(process)
+                await process.wait()
+                raise
+            finally:
+                sampler.cancel()
+
+            duration = time.monotonic() - start
+            self._account(installation_id, duration, sample)
+
+            return ProcessResult(
+                command=command,
+                returncode=process.returncode,
+                duration=duration,
+                tail=list(tail),
+                timed_out=timed_out
+            )
+
+    @staticmethod
+    def _kill(process: asyncio.subprocess.Process):
+        if process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+
+    def _sample(self, pid: int, sample: Dict):
+        """Sample CPU time and memory of a process and its children"""
+        if psutil is None:
+            return
+        try:
+            proc = psutil.Process(pid)
+            # Reaped children are included in children_user/children_system
+            times = proc.cpu_times()
+            sample["user"] = max(sample["user"], times.user + times.children_user)
+            sample["system"] = max(sample["system"], times.system + times.children_system)
+
+            rss = proc.memory_info().rss
+            for child in proc.children(recursive=True):
+                try:
+                    rss += child.memory_info().rss
+                except psutil.Error:
+                    continue
+            sample["rss"] = max(sample["rss"], rss)
+        except psutil.Error:
+            pass
+
+    def _account(self, installation_id: Optional[str], duration: float, sample: Dict):
+        if not installation_id:
+            return
+        usage = self.usage.setdefault(installation_id, ResourceUsage())
+        usage.processes += 1
+        usage.wall_time += duration
+        usage.user_time += sample["user"]
+        usage.system_time += sample["system"]
+        usage.max_rss = max(usage.max_rss, sample["rss"])
+
+    def get_usage(self, installation_id: str) -> Optional[ResourceUsage]:
+        """Accumulated resource usage of an installation"""
+        return self.usage.get(installation_id)
+
+    def release(self, installation_id: str) -> Optional[ResourceUsage]:
+        """Stop accounting for an installation and return its usage"""
+        return self.usage.pop(installation_id, None)
+
+process_runner = ProcessRunner()
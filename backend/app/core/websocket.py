@@ -0,0 +1,409 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, asdict
+from enum import Enum
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+def encode_message(message: Any) -> str:
+    """Encode a message once so the same text frame goes to every client"""
+    if orjson is not None:
+        return orjson.dumps(message).decode()
+    return json.dumps(message, separators=(",", ":"))
+
+class MessageEncoding(str, Enum):
+    """Frame encodings a client can negotiate when connecting"""
+    JSON = "json"          # one object per log line, works for every client
+    COLUMNAR = "columnar"  # log batches as parallel columns
+
+    @classmethod
+    def negotiate(cls, requested: Optional[str]) -> "MessageEncoding":
+        try:
+            return cls(requested)
+        except ValueError:
+            return cls.JSON
+
+class OverflowPolicy(str, Enum):
+    """What to do when a client's send queue is full"""
+    DROP = "drop"              # discard the oldest queued message
+    COALESCE = "coalesce"      # replace a queued message with the same key
+    DISCONNECT = "disconnect"  # evict the slow client
+
+@dataclass
+class ClientMetrics:
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+    sent: int = 0
+    dropped: int = 0
+    coalesced: int = 0
+    last_send_latency: float = 0.0
+    max_send_latency: float = 0.0
+
+class ClientConnection:
+    """A websocket with a bounded outbound queue and its own writer task.
+
+    ``send`` never waits for the network: messages are queued and written
+    by the writer task, so a slow client only delays itself. With the
+    coalesce policy a queued message is replaced by a newer one with the
+    same key, so a lagging client only gets the latest status. When the
+    queue is full the oldest message is dropped, or with the disconnect
+    policy the client is evicted. A client whose current write has been
+    blocked for longer than ``send_timeout`` is evicted on the next send.
+    Send latency is measured from enqueue to completed write.
+    """
+
+    def __init__(
+        self,
+        websocket,
+        max_queue: int = 256,
+        policy: OverflowPolicy = OverflowPolicy.COALESCE,
+        send_timeout: Optional[float] = 10.0,
+        on_close: Optional[Callable[["ClientConnection"], None]] = None,
+        encoding: MessageEncoding = MessageEncoding.JSON
+    ):
+        self.websocket = websocket
+        self.encoding = encoding
+        self.max_queue = max_queue
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.on_close = on_close
+        self.metrics = ClientMetrics()
+        self.closed = False
+        self.connected_at = time.monotonic()
+        self.last_seen = self.connected_at
+        self._queue: Deque[Tuple[Any, Optional[str], float]] = deque()
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task: Optional[asyncio.Task] = None
+        self._send_started: Optional[float] = None
+
+    def start(self):
+        """Start the writer task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._writer())
+
+    def send(self, message: Any, key: Optional[str] = None) -> bool:
+        """Queue a message without waiting.
+
+        Strings are sent as text frames, everything else as JSON. Returns
+        False if the client was closed or evicted by the overflow policy.
+        """
+        if self.closed:
+            return False
+
+        now = time.monotonic()
+        if (
+            self.send_timeout is not None
+            and self._send_started is not None
+            and now - self._send_started > self.send_timeout
+        ):
+            # Checked on enqueue instead of wrapping every write in wait_for
+            logger.warning("Evicting stalled websocket client")
+            self.evict()
+            return False
+
+        entry = (message, key, now)
+        if key is not None and self.policy == OverflowPolicy.COALESCE:
+            for i, (_, queued_key, enqueued_at) in enumerate(self._queue):
+                if queued_key == key:
+                    # Keep the queue position and age of the replaced message
+                    self._queue[i] = (message, key, enqueued_at)
+                    self.metrics.coalesced += 1
+                    return True
+
+        if len(self._queue) >= self.max_queue:
+            if self.policy == OverflowPolicy.DISCONNECT:
+                logger.warning("Evicting slow websocket client: send queue full")
+                self.evict()
+                return False
+            self._queue.popleft()
+            self.metrics.dropped += 1
+
+        self._queue.append(entry)
+        self._update_depth()
+        self._idle.clear()
+        self._wakeup.set()
+        return True
+
+    def _update_depth(self):
+        self.metrics.queue_depth = len(self._queue)
+        self.metrics.max_queue_depth = max(
+            self.metrics.max_queue_depth, self.metrics.queue_depth
+        )
+
+    async def _write(self, message: Any):
+        if isinstance(message, str):
+            await self.websocket.send_text(message)
+        else:
+            await self.websocket.send_json(message)
+
+    async def _writer(self):
+        while not self.closed:
+            if not self._queue:
+                self._idle.set()
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            message, _, enqueued_at = self._queue.popleft()
+            self._update_depth()
+            self._send_started = time.monotonic()
+            try:
+                await self._write(message)
+            except Exception as e:
+                logger.error(f"Error sending to websocket client: {str(e)}")
+                self.evict()
+                break
+            finally:
+                self._send_started = None
+
+            latency = time.monotonic() - enqueued_at
+            self.metrics.sent += 1
+            self.metrics.last_send_latency = latency
+            self.metrics.max_send_latency = max(self.metrics.max_send_latency, latency)
+        self._idle.set()
+
+    async def drain(self):
+        """Wait until all queued messages have been written."""
+        await self._idle.wait()
+
+    def touch(self):
+        """Record that the peer showed signs of life"""
+        self.last_seen = time.monotonic()
+
+    def evict(self, code: int = 1013):
+        """Close the client and its socket so the browser reconnects.
+
+        The default code 1013 asks the browser to try again later.
+        """
+        self.close()
+        asyncio.create_task(self._close_socket(code))
+
+    async def _close_socket(self, code: int):
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+    def close(self):
+        """Stop the writer task and drop pending messages."""
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.clear()
+        self._update_depth()
+        self._wakeup.set()
+        self._idle.set()
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+        if self.on_close:
+            self.on_close(self)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return asdict(self.metrics)
+
+class ReplayBuffer:
+    """Recent frames of one stream, indexed by sequence number.
+
+    Sequence numbers start at the current time in milliseconds, so a
+    cursor from before a server restart is older than anything in the new
+    buffer and always falls back to a snapshot.
+    """
+
+    def __init__(self, size: int = 1000):
+        self.seq = time.time_ns() // 1_000_000
+        self._frames: Deque[Tuple[int, Any]] = deque(maxlen=size)
+
+    def next_seq(self) -> int:
+        self.seq += 1
+        return self.seq
+
+    def reset(self) -> int:
+        """Start over after a state reset; older cursors get a snapshot"""
+        self._frames.clear()
+        return self.next_seq()
+
+    def append(self, seq: int, frame: Any):
+        self._frames.append((seq, frame))
+
+    def record(self, seq: int, frame: Any):
+        """Store a frame numbered elsewhere, e.g. by an event bus"""
+        if seq != self.seq + 1:
+            # Numbering restarted; older frames cannot be replayed
+            self._frames.clear()
+        self.seq = seq
+        self._frames.append((seq, frame))
+
+    def entries_since(self, last_seq: int) -> Optional[List[Tuple[int, Any]]]:
+        """``(seq, frame)`` pairs after ``last_seq``, or None if some were
+        already evicted"""
+        if last_seq > self.seq:
+            return None
+        if last_seq == self.seq:
+            return []
+        if not self._frames or self._frames[0][0] > last_seq + 1:
+            return None
+        start = last_seq + 1 - self._frames[0][0]
+        return list(self._frames)[start:]
+
+    def since(self, last_seq: int) -> Optional[List[Any]]:
+        """Frames after ``last_seq``, or None if some were already evicted"""
+        entries = self.entries_since(last_seq)
+        if entries is None:
+            return None
+        return [frame for _, frame in entries]
+
+GLOBAL_TOPIC = "global"
+BOARDS_TOPIC = "boards"
+
+def installation_topic(installation_id: str) -> str:
+    return f"installation:{installation_id}"
+
+def is_valid_topic(topic: str) -> bool:
+    return topic in (GLOBAL_TOPIC, BOARDS_TOPIC) or (
+        topic.startswith("installation:") and len(topic) > len("installation:")
+    )
+
+class WebSocketManager:
+    """Topic based publish/subscribe over websocket clients.
+
+    Clients subscribe to topics such as one installation, board events or
+    the global feed. Publishing encodes the message once and only touches
+    the subscribers of that topic. Every topic keeps its recent frames so
+    a reconnecting client can resume from its last sequence number.
+    """
+
+    def __init__(
+        self,
+        max_queue: int = 256,
+        policy: OverflowPolicy = OverflowPolicy.COALESCE,
+        replay_size: int = 1000,
+        max_topics: int = 100
+    ):
+        self.max_queue = max_queue
+        self.policy = policy
+        self.replay_size = replay_size
+        self.max_topics = max_topics
+        self.clients: Dict[Any, ClientConnection] = {}
+        self.topics: Dict[str, Set[Any]] = {}
+        self.subscriptions: Dict[Any, Set[str]] = {}
+        self.replay: "OrderedDict[str, ReplayBuffer]" = OrderedDict()
+
+    async def connect(self, websocket, topics: Iterable[str] = ()):
+        await websocket.accept()
+        client = ClientConnection(
+            websocket,
+            max_queue=self.max_queue,
+            policy=self.policy,
+            on_close=self._on_client_closed
+        )
+        self.clients[websocket] = client
+        self.subscriptions[websocket] = set()
+        client.start()
+        for topic in topics:
+            self.subscribe(websocket, topic)
+
+    def disconnect(self, websocket):
+        """Remove a client and all of its subscriptions"""
+        client = self.clients.pop(websocket, None)
+        for topic in self.subscriptions.pop(websocket, set()):
+            subscribers = self.topics.get(topic)
+            if subscribers is not None:
+                subscribers.discard(websocket)
+                if not subscribers:
+                    del self.topics[topic]
+        if client is not None:
+            client.close()
+
+    def _on_client_closed(self, client: ClientConnection):
+        self.disconnect(client.websocket)
+
+    def subscribe(self, websocket, topic: str) -> bool:
+        if websocket not in self.clients or not is_valid_topic(topic):
+            return False
+        self.topics.setdefault(topic, set()).add(websocket)
+        self.subscriptions[websocket].add(topic)
+        return True
+
+    def unsubscribe(self, websocket, topic: str):
+        self.subscriptions.get(websocket, set()).discard(topic)
+        subscribers = self.topics.get(topic)
+        if subscribers is not None:
+            subscribers.discard(websocket)
+            if not subscribers:
+                del self.topics[topic]
+
+    def send(self, websocket, message: Dict[str, Any]):
+        """Queue a message for a single client"""
+        client = self.clients.get(websocket)
+        if client is not None:
+            client.send(message)
+
+    def _replay_buffer(self, topic: str) -> ReplayBuffer:
+        if topic not in self.replay:
+            self.replay[topic] = ReplayBuffer(self.replay_size)
+            if len(self.replay) > self.max_topics:
+                # Forget the topic that was published to least recently
+                self.replay.popitem(last=False)
+        return self.replay[topic]
+
+    def topic_seq(self, topic: str) -> int:
+        """Sequence number of the last message published to a topic"""
+        return self._replay_buffer(topic).seq
+
+    def resume(self, websocket, topic: str, last_seq: int) -> bool:
+        """Queue the frames a client missed since ``last_seq``.
+
+        Returns False if the gap was already evicted and the client needs a
+        snapshot instead.
+        """
+        client = self.clients.get(websocket)
+        frames = self._replay_buffer(topic).since(last_seq)
+        if client is None or frames is None:
+            return False
+        for frame in frames:
+            client.send(frame)
+        return True
+
+    def publish(self, topic: str, message: Dict[str, Any], key: Optional[str] = None) -> int:
+        """Queue a message for the subscribers of a topic.
+
+        The message is stamped with the topic and its next sequence number
+        and kept for replay. Returns the number of clients it was queued
+        for.
+        """
+        buffer = self._replay_buffer(topic)
+        self.replay.move_to_end(topic)
+        seq = buffer.next_seq()
+        frame = encode_message({**message, "topic": topic, "seq": seq})
+        buffer.append(seq, frame)
+
+        subscribers = self.topics.get(topic)
+        if not subscribers:
+            return 0
+
+        # Copy: evicting a slow client modifies the topic set
+        subscribers = list(subscribers)
+        for websocket in subscribers:
+            client = self.clients.get(websocket)
+            if client is not None:
+                client.send(frame, key)
+        return len(subscribers)
+
+    def get_client_metrics(self) -> List[Dict[str, Any]]:
+        return [client.get_metrics() for client in self.clients.values()]
+
+websocket_manager = WebSocketManager()
+
+def get_websocket_manager() -> WebSocketManager:
+    return websocket_manager
@@ -1,6 +1,6 @@
 import serial
 import serial.tools.list_ports
-from typing import List, Optional, Dict
+from typing import Callable, List, Optional, Dict
 import logging
 import json
 import os
@@ -32,8 +32,27 @@ class BoardManager:
 
     def __init__(self):
         self.detected_boards: Dict[str, Board] = {}
+        self.board_callbacks: List[Callable] = []
         self._load_board_configs()
 
+    def register_board_callback(self, callback: Callable):
+        """Register callback for boards being connected or disconnected"""
+        if callback not in self.board_callbacks:
+            self.board_callbacks.append(callback)
+
+    def unregister_board_callback(self, callback: Callable):
+        """Remove a previously registered callback"""
+        if callback in self.board_callbacks:
+            self.board_callbacks.remove(callback)
+
+    def _notify_board_event(self, event: str, board: Board):
+        """Notify all registered callbacks of a connected or disconnected board"""
+        for callback in self.board_callbacks:
+            try:
+                callback(event, board)
+            except Exception as e:
+                logger.error(f"Error in board callback: {e}")
+
     def _load_board_configs(self):
         """Load board configurations from JSON file"""
         config_path = Path(__file__).parent / "board_configs.json"
@@ -45,7 +64,12 @@ class BoardManager:
             self.board_configs = {}
 
     def detect_boards(self) -> List[Board]:
-        """Detect all connected printer boards"""
+        """Detect all connected printer boards
+
+        Boards that appeared or disappeared since the previous scan are
+        reported to the board callbacks.
+        """
+        previous = dict(self.detected_boards)
         self.detected_boards.clear()
         
         for port in serial.tools.list_ports.comports():
@@ -68,6 +92,13 @@ class BoardManager:
             except Exception as e:
                 logger.error(f"Error detecting board on port {port}: {e}")
 
+        for port, board in self.detected_boards.items():
+            if port not in previous:
+                self._notify_board_event("connected", board)
+        for port, board in previous.items():
+            if port not in self.detected_boards:
+                self._notify_board_event("disconnected", board)
+
         return list(self.detected_boards.values())
 
     async def test_connection(self, port: str) -> bool:
@@ -172,3 +203,4 @@ class BoardManager:
     def cleanup(self):
         """Cleanup resources"""
         self.detected_boards.clear()
+        self.board_callbacks.clear()
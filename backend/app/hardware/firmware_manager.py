@@ -1,4 +1,3 @@
-import asyncio
 import logging
 import os
 import shutil
@@ -7,6 +6,7 @@ from typing import Optional, Dict, List
 import aiohttp
 import git
 from dataclasses import dataclass
+from ..core.process_runner import ResourceClass, process_runner
 
 logger = logging.getLogger(__name__)
 
@@ -71,7 +71,13 @@ class FirmwareManager:
             logger.error(f"Failed to download firmware: {e}")
             return None
 
-    async def build_firmware(self, version: str, board_type: str, config: Dict) -> Optional[Path]:
+    async def build_firmware(
+        self,
+        version: str,
+        board_type: str,
+        config: Dict,
+        installation_id: Optional[str] = None
+    ) -> Optional[Path]:
         """Build firmware for specific board"""
         try:
             source_dir = self.firmware_dir / version
@@ -88,20 +94,21 @@ class FirmwareManager:
             self._generate_config(config_path, config)
 
             # Build firmware
-            proc = await asyncio.create_subprocess_exec(
-                "./scripts/build.sh",
+            result = await process_runner.run(
+                ["./scripts/build.sh"],
+                ResourceClass.CPU,
                 cwd=source_dir,
                 env={
                     "KCONFIG_CONFIG": str(config_path),
                     "PYTHONPATH": str(source_dir)
-                }
+                },
+                installation_id=installation_id
             )
-            await proc.wait()
 
-            if proc.returncode == 0:
+            if result.returncode == 0:
                 return build_dir / "out/klipper.bin"
             else:
-                logger.error("Firmware build failed")
+                logger.error(f"Firmware build failed: {result.output}")
                 return None
         except Exception as e:
             logger.error(f"Failed to build firmware: {e}")
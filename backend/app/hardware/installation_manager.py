@@ -1,14 +1,31 @@
 import asyncio
+import hashlib
+import json
 import logging
 from typing import Optional, Dict, List, Callable
 from pathlib import Path
 from datetime import datetime
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
+from ..core.process_runner import process_runner
 from .board_manager import BoardManager, Board
 from .firmware_manager import FirmwareManager
+from .stage_estimator import StageEstimator
 
 logger = logging.getLogger(__name__)
 
+# Installation stages in execution order
+INSTALLATION_STAGES = ["downloading", "building", "verifying", "preparing", "flashing"]
+
+def _artifact_checksum(artifact: Path) -> str:
+    """Checksum of a file artifact; directories are only checked for existence"""
+    if artifact.is_dir():
+        return "directory"
+    digest = hashlib.sha256()
+    with open(artifact, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
 @dataclass
 class InstallationStatus:
     id: str
@@ -19,23 +36,36 @@ class InstallationStatus:
     start_time: datetime
     end_time: Optional[datetime] = None
     error: Optional[str] = None
+    eta_seconds: Optional[float] = None
+    estimate_key: Optional[str] = None
+    stage_start_time: Optional[datetime] = None
 
 class InstallationManager:
     def __init__(
         self,
         board_manager: BoardManager,
         firmware_manager: FirmwareManager,
-        work_dir: Path
+        work_dir: Path,
+        stage_estimator: Optional[StageEstimator] = None
     ):
         self.board_manager = board_manager
         self.firmware_manager = firmware_manager
         self.work_dir = work_dir
+        self.stage_estimator = stage_estimator or StageEstimator(
+            work_dir / "stage_durations.json"
+        )
         self.active_installations: Dict[str, InstallationStatus] = {}
         self.status_callbacks: List[Callable] = []
 
     def register_status_callback(self, callback: Callable):
         """Register callback for status updates"""
-        self.status_callbacks.append(callback)
+        if callback not in self.status_callbacks:
+            self.status_callbacks.append(callback)
+
+    def unregister_status_callback(self, callback: Callable):
+        """Remove a previously registered callback"""
+        if callback in self.status_callbacks:
+            self.status_callbacks.remove(callback)
 
     def _notify_status_update(self, status: InstallationStatus):
         """Notify all registered callbacks of status update"""
@@ -61,7 +91,8 @@ class InstallationManager:
                 status="starting",
                 progress=0,
                 message="Starting installation",
-                start_time=datetime.now()
+                start_time=datetime.now(),
+                estimate_key=self._estimate_key(board, version)
             )
             
             self.active_installations[installation_id] = status
@@ -84,30 +115,46 @@ class InstallationManager:
         config: Dict,
         version: str
     ):
-        """Run installation process"""
+        """Run installation process, skipping stages with a valid checkpoint"""
         try:
             status = self.active_installations[installation_id]
+            checkpoint = self._load_checkpoint(installation_id) or {
+                "id": installation_id,
+                "board": asdict(board),
+                "config": config,
+                "version": version,
+                "stages": {}
+            }
 
             # Step 1: Download firmware
-            self._update_status(status, "downloading", 10, "Downloading firmware")
-            firmware_dir = await self.firmware_manager.download_firmware(version)
+            firmware_dir = self._checkpoint_artifact(checkpoint, "downloading")
             if not firmware_dir:
-                raise Exception("Failed to download firmware")
+                self._update_status(status, "downloading", 10, "Downloading firmware")
+                firmware_dir = await self.firmware_manager.download_firmware(version)
+                if not firmware_dir:
+                    raise Exception("Failed to download firmware")
+                self._save_checkpoint(checkpoint, "downloading", firmware_dir)
 
             # Step 2: Build firmware
-            self._update_status(status, "building", 30, "Building firmware")
-            firmware_path = await self.firmware_manager.build_firmware(
-                version, board.board_type, config
-            )
+            firmware_path = self._checkpoint_artifact(checkpoint, "building")
             if not firmware_path:
-                raise Exception("Failed to build firmware")
+                self._update_status(status, "building", 30, "Building firmware")
+                firmware_path = await self.firmware_manager.build_firmware(
+                    version, board.board_type, config, installation_id
+                )
+                if not firmware_path:
+                    raise Exception("Failed to build firmware")
+                self._save_checkpoint(checkpoint, "building", firmware_path)
 
             # Step 3: Verify firmware
-            self._update_status(status, "verifying", 50, "Verifying firmware")
-            if not await self.firmware_manager.verify_firmware(firmware_path):
-                raise Exception("Firmware verification failed")
+            if not self._checkpoint_artifact(checkpoint, "verifying"):
+                self._update_status(status, "verifying", 50, "Verifying firmware")
+                if not await self.firmware_manager.verify_firmware(firmware_path):
+                    raise Exception("Firmware verification failed")
+                self._save_checkpoint(checkpoint, "verifying", firmware_path)
 
-            # Step 4: Prepare board
+            # Step 4: Prepare board. Bootloader state does not survive a
+            # failed flash, so this stage is never checkpointed.
             self._update_status(status, "preparing", 70, "Preparing board")
             if not await self.board_manager.prepare_for_update(board):
                 raise Exception("Failed to prepare board")
@@ -121,6 +168,7 @@ class InstallationManager:
             self._update_status(
                 status, "completed", 100, "Installation completed successfully"
             )
+            self._remove_checkpoint(installation_id)
 
         except Exception as e:
             logger.error(f"Installation failed: {e}")
@@ -131,6 +179,111 @@ class InstallationManager:
         finally:
             status.end_time = datetime.now()
             self._notify_status_update(status)
+            usage = process_runner.release(installation_id)
+            if usage:
+                logger.info(f"Installation {installation_id} resource usage: {usage}")
+
+    def _checkpoint_path(self, installation_id: str) -> Path:
+        return self.work_dir / "checkpoints" / f"{installation_id}.json"
+
+    def _load_checkpoint(self, installation_id: str) -> Optional[Dict]:
+        """Load persisted stage checkpoints of an installation"""
+        path = self._checkpoint_path(installation_id)
+        try:
+            if path.exists():
+                with open(path) as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to load checkpoint for {installation_id}: {e}")
+        return None
+
+    def _save_checkpoint(self, checkpoint: Dict, stage: str, artifact: Path):
+        """Persist a completed stage together with its artifact"""
+        try:
+            checkpoint["stages"][stage] = {
+                "artifact": str(artifact),
+                "checksum": _artifact_checksum(artifact),
+                "completed_at": datetime.now().isoformat()
+            }
+            path = self._checkpoint_path(checkpoint["id"])
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(checkpoint, f)
+            tmp_path.replace(path)
+        except Exception as e:
+            logger.error(f"Failed to save checkpoint for {checkpoint['id']}: {e}")
+
+    def _remove_checkpoint(self, installation_id: str):
+        try:
+            self._checkpoint_path(installation_id).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _checkpoint_artifact(self, checkpoint: Dict, stage: str) -> Optional[Path]:
+        """Artifact of a checkpointed stage if it is still valid"""
+        entry = checkpoint["stages"].get(stage)
+        if not entry:
+            return None
+
+        artifact = Path(entry["artifact"])
+        if not artifact.exists() or _artifact_checksum(artifact) != entry["checksum"]:
+            logger.info(f"Checkpoint for stage {stage} is stale, rerunning")
+            # Later stages depend on this artifact
+            for later in INSTALLATION_STAGES[INSTALLATION_STAGES.index(stage):]:
+                checkpoint["stages"].pop(later, None)
+            return None
+        return artifact
+
+    async def resume_installation(self, installation_id: str) -> bool:
+        """Resume a failed or interrupted installation from its first incomplete stage"""
+        try:
+            status = self.active_installations.get(installation_id)
+            if status and status.status not in ["failed", "cancelled"]:
+                return False
+
+            checkpoint = self._load_checkpoint(installation_id)
+            if not checkpoint:
+                return False
+
+            board = Board(**checkpoint["board"])
+            version = checkpoint["version"]
+            status = InstallationStatus(
+                id=installation_id,
+                board=board,
+                status="starting",
+                progress=0,
+                message="Resuming installation",
+                start_time=datetime.now(),
+                estimate_key=self._estimate_key(board, version)
+            )
+            self.active_installations[installation_id] = status
+            self._notify_status_update(status)
+
+            asyncio.create_task(
+                self._run_installation(
+                    installation_id, board, checkpoint["config"], version
+                )
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Failed to resume installation: {e}")
+            return False
+
+    def _estimate_key(self, board: Board, version: str) -> str:
+        """Build the stage estimator key for an installation"""
+        board_config = self.board_manager.get_board_config(board.board_type) or {}
+        cache_hit = (
+            self.firmware_manager.get_cached_firmware(version, board.board_type) is not None
+            or (self.firmware_manager.firmware_dir / version).exists()
+        )
+        return StageEstimator.make_key(
+            board.board_type,
+            board_config.get("mcu"),
+            version,
+            board_config.get("flash_method"),
+            cache_hit
+        )
 
     def _update_status(
         self,
@@ -141,19 +294,52 @@ class InstallationManager:
         error: Optional[str] = None
     ):
         """Update installation status"""
+        now = datetime.now()
+
+        # Record how long the previous stage took
+        if status.status in INSTALLATION_STAGES and status.stage_start_time:
+            if new_status != "failed" and new_status != "cancelled":
+                self.stage_estimator.record(
+                    status.estimate_key,
+                    status.status,
+                    (now - status.stage_start_time).total_seconds()
+                )
+
         status.status = new_status
         status.progress = progress
         status.message = message
         status.error = error
+        status.stage_start_time = now if new_status in INSTALLATION_STAGES else None
+        self._refresh_estimate(status)
         self._notify_status_update(status)
 
+    def _refresh_estimate(self, status: InstallationStatus):
+        """Recompute ETA and progress from historical stage durations"""
+        if status.status not in INSTALLATION_STAGES or not status.estimate_key:
+            status.eta_seconds = 0.0 if status.status == "completed" else None
+            return
+
+        elapsed = (datetime.now() - status.stage_start_time).total_seconds()
+        status.eta_seconds, status.progress = self.stage_estimator.eta(
+            status.estimate_key,
+            INSTALLATION_STAGES,
+            status.status,
+            elapsed
+        )
+
     def get_status(self, installation_id: str) -> Optional[InstallationStatus]:
         """Get status of specific installation"""
-        return self.active_installations.get(installation_id)
+        status = self.active_installations.get(installation_id)
+        if status:
+            self._refresh_estimate(status)
+        return status
 
     def get_all_statuses(self) -> List[InstallationStatus]:
         """Get status of all installations"""
-        return list(self.active_installations.values())
+        statuses = list(self.active_installations.values())
+        for status in statuses:
+            self._refresh_estimate(status)
+        return statuses
 
     async def cancel_installation(self, installation_id: str) -> bool:
         """Cancel ongoing installation"""
@@ -185,6 +371,14 @@ class InstallationManager:
             for installation_id in to_remove:
                 del self.active_installations[installation_id]
 
+            # Checkpoints of installations that were never resumed
+            checkpoint_dir = self.work_dir / "checkpoints"
+            if checkpoint_dir.exists():
+                for path in checkpoint_dir.glob("*.json"):
+                    age = current_time - datetime.fromtimestamp(path.stat().st_mtime)
+                    if age.days >= max_age_days:
+                        path.unlink()
+
         except Exception as e:
             logger.error(f"Failed to cleanup installations: {e}")
 
@@ -0,0 +1,129 @@
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Fallback durations in seconds for stages that were never observed
+DEFAULT_STAGE_DURATIONS = {
+    "downloading": 60.0,
+    "building": 180.0,
+    "verifying": 1.0,
+    "preparing": 5.0,
+    "flashing": 30.0,
+}
+
+
+class StageEstimator:
+    """EWMA estimator for installation stage durations.
+
+    Durations are recorded per (board type, MCU, version, flash method,
+    cache hit/miss) key. Lookups fall back to the same key without the
+    version, then to the stage average over all keys, then to defaults.
+    """
+
+    def __init__(self, data_path: Path, alpha: float = 0.3):
+        self.data_path = data_path
+        self.alpha = alpha
+        self.durations: Dict[str, Dict[str, Dict[str, float]]] = {}
+        self._load()
+
+    @staticmethod
+    def make_key(
+        board_type: Optional[str],
+        mcu: Optional[str],
+        version: str,
+        flash_method: Optional[str],
+        cache_hit: bool
+    ) -> str:
+        """Build the lookup key for an installation"""
+        return "|".join([
+            board_type or "unknown",
+            mcu or "unknown",
+            version,
+            flash_method or "unknown",
+            "hit" if cache_hit else "miss"
+        ])
+
+    @staticmethod
+    def _versionless(key: str) -> str:
+        parts = key.split("|")
+        if len(parts) == 5:
+            parts[2] = "*"
+        return "|".join(parts)
+
+    def _load(self):
+        """Load recorded durations from disk"""
+        try:
+            if self.data_path.exists():
+                with open(self.data_path) as f:
+                    self.durations = json.load(f)
+        except Exception as e:
+            logger.warning(f"Failed to load stage durations: {e}")
+            self.durations = {}
+
+    def save(self):
+        """Persist recorded durations to disk"""
+        try:
+            self.data_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.data_path.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(self.durations, f)
+            tmp_path.replace(self.data_path)
+        except Exception as e:
+            logger.error(f"Failed to save stage durations: {e}")
+
+    def _update(self, key: str, stage: str, duration: float):
+        entry = self.durations.setdefault(key, {}).get(stage)
+        if entry is None:
+            self.durations[key][stage] = {"ewma": duration, "count": 1}
+        else:
+            entry["ewma"] += self.alpha * (duration - entry["ewma"])
+            entry["count"] += 1
+
+    def record(self, key: str, stage: str, duration: float):
+        """Record an observed stage duration"""
+        if duration < 0:
+            return
+        self._update(key, stage, duration)
+        self._update(self._versionless(key), stage, duration)
+        self.save()
+
+    def estimate(self, key: str, stage: str) -> float:
+        """Estimated duration of a stage in seconds"""
+        for lookup in (key, self._versionless(key)):
+            entry = self.durations.get(lookup, {}).get(stage)
+            if entry:
+                return entry["ewma"]
+
+        observed = [
+            stages[stage]["ewma"]
+            for lookup, stages in self.durations.items()
+            if "*" not in lookup and stage in stages
+        ]
+        if observed:
+            return sum(observed) / len(observed)
+        return DEFAULT_STAGE_DURATIONS.get(stage, 10.0)
+
+    def eta(
+        self,
+        key: str,
+        stages: List[str],
+        current_stage: str,
+        elapsed_in_stage: float
+    ) -> Tuple[float, int]:
+        """Remaining seconds and progress percent for a running installation"""
+        if current_stage not in stages:
+            return 0.0, 0
+
+        estimates = [self.estimate(key, stage) for stage in stages]
+        index = stages.index(current_stage)
+        current = estimates[index]
+
+        # Never report a stage as finished before it actually is
+        done = sum(estimates[:index]) + min(elapsed_in_stage, current * 0.95)
+        remaining = max(current - elapsed_in_stage, 0.0) + sum(estimates[index + 1:])
+        total = done + remaining
+        progress = int(100 * done / total) if total > 0 else 0
+        return remaining, min(progress, 99)
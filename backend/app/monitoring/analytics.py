@@ -1,20 +1,90 @@
 from typing import Dict, Optional, List
 import logging
-import json
 from datetime import datetime, timedelta
-import aiofiles
 from pathlib import Path
 import asyncio
-from collections import defaultdict
+
+from .batch_writer import BatchWriter, FsyncPolicy
+from .rollups import HourlyRollups
+from .segments import SegmentLog
+from .user_index import UserIndex
 
 logger = logging.getLogger(__name__)
 
 class UserAnalytics:
-    def __init__(self, data_dir: Path):
+    def __init__(
+        self,
+        data_dir: Path,
+        flush_interval: float = 1.0,
+        fsync: FsyncPolicy = FsyncPolicy.INTERVAL,
+        retention: timedelta = timedelta(days=90),
+        max_clock_skew: timedelta = timedelta(minutes=5)
+    ):
         self.data_dir = data_dir
-        self.events_path = data_dir / "events.log"
-        self.sessions_path = data_dir / "sessions.log"
+        self.retention = retention
+        self.max_clock_skew = max_clock_skew
         self.data_dir.mkdir(parents=True, exist_ok=True)
+        # One writer for both streams, so a batch costs one thread hop
+        self.writer = BatchWriter(flush_interval=flush_interval, fsync=fsync)
+        self.events = SegmentLog(data_dir / "events", writer=self.writer)
+        self.sessions = SegmentLog(data_dir / "sessions", writer=self.writer)
+        self.events.import_legacy(data_dir / "events.log")
+        self.sessions.import_legacy(data_dir / "sessions.log")
+        self.rollups = HourlyRollups(data_dir / "rollups.json", retention=retention)
+        self.user_index = UserIndex(data_dir / "users.db")
+        self._indexes_loaded = False
+        self._indexes_lock = asyncio.Lock()
+
+    async def _load_indexes(self):
+        """Restore rollups and user index, replaying records they miss
+
+        Records are only replayed by the first process to attach; those
+        added by running workers reach the shared checkpoint through them.
+        """
+        if self._indexes_loaded:
+            return
+        async with self._indexes_lock:
+            if self._indexes_loaded:
+                return
+            if await self.rollups.attach():
+                await self._replay()
+            await self.rollups.checkpoint()
+            self.user_index.commit()
+            self._indexes_loaded = True
+
+    async def _replay(self):
+        rollups_through = self.rollups.events_through
+        index_through = self.user_index.indexed_through()
+        through = min(rollups_through or "", index_through or "")
+        async for record in self.events.read(
+            start=datetime.fromisoformat(through) if through else None
+        ):
+            if rollups_through is None or record["timestamp"] > rollups_through:
+                self.rollups.add_event(record)
+            if index_through is None or record["timestamp"] > index_through:
+                self.user_index.add(record)
+
+        through = self.rollups.sessions_through
+        async for record in self.sessions.read(
+            start=datetime.fromisoformat(through) if through else None
+        ):
+            if through is None or record["timestamp"] > through:
+                self.rollups.add_session(record)
+
+    async def flush(self):
+        """Write segment sidecars, the rollup checkpoint and the user index"""
+        await self.events.flush()
+        await self.sessions.flush()
+        if self._indexes_loaded:
+            await self.rollups.checkpoint()
+            self.user_index.commit()
+
+    async def close(self):
+        """Flush everything and stop the background writer"""
+        await self.flush()
+        await self.writer.close()
+        self.rollups.close()
+        self.user_index.close()
 
     async def track_event(
         self,
@@ -31,11 +101,61 @@ class UserAnalytics:
                 "properties": properties or {}
             }
             
-            async with aiofiles.open(self.events_path, "a") as f:
-                await f.write(json.dumps(event_data) + "\n")
+            await self._load_indexes()
+            await self.events.append(event_data)
+            self.rollups.add_event(event_data)
+            self.user_index.add(event_data)
+            await self.rollups.maybe_checkpoint()
         except Exception as e:
             logger.error(f"Failed to track event: {e}")
 
+    def _client_timestamp(self, timestamp: Optional[str], now: datetime) -> Optional[str]:
+        """Arrival time for missing or future timestamps, None if too old
+
+        Client clocks cannot be trusted: a timestamp in the future would
+        route all later records into its segment and move the replay
+        watermarks of rollups and user index past them.
+        """
+        if not timestamp:
+            return now.isoformat()
+        parsed = datetime.fromisoformat(timestamp)
+        if parsed > now + self.max_clock_skew:
+            return now.isoformat()
+        if parsed < now - self.retention:
+            return None
+        return timestamp
+
+    async def track_events(self, events: List[Dict]) -> int:
+        """Track a batch of events sent by the frontend
+
+        Each event has ``event_type`` and optionally ``user_id``,
+        ``properties`` and an ISO ``timestamp``. Timestamps in the future
+        are replaced by the arrival time, events older than ``retention``
+        are dropped. Returns the number of events recorded.
+        """
+        recorded = 0
+        try:
+            await self._load_indexes()
+            now = datetime.utcnow()
+            for event in events:
+                timestamp = self._client_timestamp(event.get("timestamp"), now)
+                if timestamp is None:
+                    continue
+                event_data = {
+                    "timestamp": timestamp,
+                    "event_type": event["event_type"],
+                    "user_id": event.get("user_id"),
+                    "properties": event.get("properties") or {}
+                }
+                await self.events.append(event_data)
+                self.rollups.add_event(event_data)
+                self.user_index.add(event_data)
+                recorded += 1
+            await self.rollups.maybe_checkpoint()
+        except Exception as e:
+            logger.error(f"Failed to track events: {e}")
+        return recorded
+
     async def track_session(
         self,
         user_id: str,
@@ -53,8 +173,10 @@ class UserAnalytics:
                 "properties": properties or {}
             }
             
-            async with aiofiles.open(self.sessions_path, "a") as f:
-                await f.write(json.dumps(session_data) + "\n")
+            await self._load_indexes()
+            await self.sessions.append(session_data)
+            self.rollups.add_session(session_data)
+            await self.rollups.maybe_checkpoint()
         except Exception as e:
             logger.error(f"Failed to track session: {e}")
 
@@ -62,41 +184,10 @@ class UserAnalytics:
         self,
         time_range: timedelta = timedelta(days=7)
     ) -> Dict:
-        """Get event statistics"""
+        """Get event statistics, in whole hours, from the hourly rollups"""
         try:
-            stats = {
-                "total_events": 0,
-                "event_types": defaultdict(int),
-                "unique_users": set(),
-                "hourly_distribution": defaultdict(int)
-            }
-            
-            cutoff_time = datetime.utcnow() - time_range
-            
-            async with aiofiles.open(self.events_path, "r") as f:
-                async for line in f:
-                    try:
-                        event = json.loads(line)
-                        event_time = datetime.fromisoformat(event["timestamp"])
-                        
-                        if event_time < cutoff_time:
-                            continue
-                        
-                        stats["total_events"] += 1
-                        stats["event_types"][event["event_type"]] += 1
-                        
-                        if event["user_id"]:
-                            stats["unique_users"].add(event["user_id"])
-                        
-                        hour = event_time.hour
-                        stats["hourly_distribution"][hour] += 1
-                    except json.JSONDecodeError:
-                        continue
-            
-            # Convert sets to counts
-            stats["unique_users"] = len(stats["unique_users"])
-            
-            return dict(stats)
+            await self._load_indexes()
+            return self.rollups.event_stats(datetime.utcnow() - time_range)
         except Exception as e:
             logger.error(f"Failed to get event stats: {e}")
             return {
@@ -110,64 +201,10 @@ class UserAnalytics:
         self,
         time_range: timedelta = timedelta(days=7)
     ) -> Dict:
-        """Get session statistics"""
+        """Get session statistics, in whole hours, from the hourly rollups"""
         try:
-            stats = {
-                "total_sessions": 0,
-                "unique_users": set(),
-                "session_duration": [],
-                "bounce_rate": 0
-            }
-            
-            sessions = defaultdict(list)
-            cutoff_time = datetime.utcnow() - time_range
-            
-            async with aiofiles.open(self.sessions_path, "r") as f:
-                async for line in f:
-                    try:
-                        session = json.loads(line)
-                        session_time = datetime.fromisoformat(session["timestamp"])
-                        
-                        if session_time < cutoff_time:
-                            continue
-                        
-                        session_id = session["session_id"]
-                        sessions[session_id].append(session)
-                        
-                        if session["user_id"]:
-                            stats["unique_users"].add(session["user_id"])
-                    except json.JSONDecodeError:
-                        continue
-            
-            # Calculate session metrics
-            for session_id, events in sessions.items():
-                stats["total_sessions"] += 1
-                
-                if len(events) == 1:
-                    stats["bounce_rate"] += 1
-                    continue
-                
-                # Sort events by timestamp
-                events.sort(key=lambda x: datetime.fromisoformat(x["timestamp"]))
-                
-                # Calculate duration
-                start_time = datetime.fromisoformat(events[0]["timestamp"])
-                end_time = datetime.fromisoformat(events[-1]["timestamp"])
-                duration = (end_time - start_time).total_seconds()
-                stats["session_duration"].append(duration)
-            
-            # Calculate averages and rates
-            stats["unique_users"] = len(stats["unique_users"])
-            stats["bounce_rate"] = (
-                stats["bounce_rate"] / stats["total_sessions"]
-                if stats["total_sessions"] > 0 else 0
-            )
-            stats["avg_session_duration"] = (
-                sum(stats["session_duration"]) / len(stats["session_duration"])
-                if stats["session_duration"] else 0
-            )
-            
-            return stats
+            await self._load_indexes()
+            return self.rollups.session_stats(datetime.utcnow() - time_range)
         except Exception as e:
             logger.error(f"Failed to get session stats: {e}")
             return {
@@ -177,29 +214,29 @@ class UserAnalytics:
                 "avg_session_duration": 0
             }
 
-    async def get_user_journey(self, user_id: str) -> List[Dict]:
-        """Get user journey/flow through the application"""
+    async def get_user_journey(
+        self,
+        user_id: str,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[Dict]:
+        """Get user journey/flow through the application, oldest first"""
         try:
-            journey = []
-            
-            async with aiofiles.open(self.events_path, "r") as f:
-                async for line in f:
-                    try:
-                        event = json.loads(line)
-                        if event["user_id"] == user_id:
-                            journey.append({
-                                "timestamp": event["timestamp"],
-                                "event_type": event["event_type"],
-                                "properties": event["properties"]
-                            })
-                    except json.JSONDecodeError:
-                        continue
-            
-            # Sort by timestamp
-            journey.sort(key=lambda x: datetime.fromisoformat(x["timestamp"]))
-            return journey
+            await self._load_indexes()
+            return self.user_index.journey(user_id, limit, offset)
         except Exception as e:
             logger.error(f"Failed to get user journey: {e}")
             return []
 
-analytics = UserAnalytics(Path("data/analytics"))
+_analytics: Optional[UserAnalytics] = None
+
+def configure_analytics(data_dir: Path) -> UserAnalytics:
+    """Create the shared instance under ``data_dir``; called on startup"""
+    global _analytics
+    _analytics = UserAnalytics(data_dir)
+    return _analytics
+
+def get_analytics() -> UserAnalytics:
+    if _analytics is None:
+        raise RuntimeError("Analytics used before configure_analytics()")
+    return _analytics
@@ -0,0 +1,127 @@
+from typing import Dict, List, Optional, Tuple
+import logging
+import os
+import time
+import asyncio
+from enum import Enum
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+class FsyncPolicy(str, Enum):
+    """When written batches are forced to disk"""
+    NEVER = "never"        # leave it to the page cache
+    BATCH = "batch"        # after every batch
+    INTERVAL = "interval"  # at most once per fsync_interval
+
+class BatchWriter:
+    """Appends lines to files in batches from a background task.
+
+    ``write()`` only queues the line. The writer task collects up to
+    ``max_batch`` lines, or whatever arrived within ``flush_interval``
+    seconds, and appends them with one open per file and one thread-pool
+    hop per batch instead of one per line. ``flush()`` waits until every
+    line queued so far is written; ``close()`` flushes and stops the task.
+    """
+
+    def __init__(
+        self,
+        max_batch: int = 500,
+        flush_interval: float = 1.0,
+        fsync: FsyncPolicy = FsyncPolicy.INTERVAL,
+        fsync_interval: float = 30.0
+    ):
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.fsync = FsyncPolicy(fsync)
+        self.fsync_interval = fsync_interval
+        self._pending: List[Tuple[Path, str]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flushed: Optional[asyncio.Condition] = None
+        self._queued = 0
+        self._written = 0
+        self._last_fsync = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def _start(self):
+        self._wakeup = asyncio.Event()
+        self._flushed = asyncio.Condition()
+        self._task = asyncio.create_task(self._run())
+
+    def write(self, path: Path, line: str):
+        """Queue a line (including its newline) to be appended to ``path``"""
+        if self._closed:
+            raise RuntimeError("BatchWriter is closed")
+        if self._task is None:
+            self._start()
+        self._pending.append((path, line))
+        self._queued += 1
+        if len(self._pending) >= self.max_batch:
+            self._wakeup.set()
+
+    @property
+    def pending(self) -> int:
+        return self._queued - self._written
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self._write_pending(final=self._closed)
+            if self._closed and not self._pending:
+                return
+
+    async def _write_pending(self, final: bool = False):
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        sync = self.fsync == FsyncPolicy.BATCH or (
+            final and self.fsync != FsyncPolicy.NEVER
+        ) or (
+            self.fsync == FsyncPolicy.INTERVAL and
+            time.monotonic() - self._last_fsync >= self.fsync_interval
+        )
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                None, self._append_batch, batch, sync
+            )
+        except Exception as e:
+            logger.error(f"Failed to write {len(batch)} records: {e}")
+        if sync:
+            self._last_fsync = time.monotonic()
+        self._written += len(batch)
+        async with self._flushed:
+            self._flushed.notify_all()
+
+    @staticmethod
+    def _append_batch(batch: List[Tuple[Path, str]], sync: bool):
+        lines: Dict[Path, List[str]] = {}
+        for path, line in batch:
+            lines.setdefault(path, []).append(line)
+        for path, chunk in lines.items():
+            with open(path, "a") as f:
+                f.write("".join(chunk))
+                if sync:
+                    f.flush()
+                    os.fsync(f.fileno())
+
+    async def flush(self):
+        """Wait until everything queued so far is on disk (or in the page cache)"""
+        if self._task is None:
+            return
+        target = self._queued
+        async with self._flushed:
+            self._wakeup.set()
+            await self._flushed.wait_for(lambda: self._written >= target or self._task.done())
+
+    async def close(self):
+        """Write the remaining lines and stop the writer task"""
+        self._closed = True
+        if self._task is None:
+            return
+        self._wakeup.set()
+        await self._task
@@ -0,0 +1,124 @@
+from typing import Dict, List, Set
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+
+_FRAME = re.compile(r'File "([^"]+)", line \d+, in (\S+)')
+_VOLATILE = re.compile(r"0x[0-9a-fA-F]+|\d+")
+
+def fingerprint(error_data: Dict) -> str:
+    """Identify repeats of the same failure.
+
+    Built from exception type, component and the stack frames without
+    line numbers. Errors without a stack fall back to the message with
+    numbers and addresses masked, so "port /dev/ttyUSB0" and
+    "port /dev/ttyUSB1" group together.
+    """
+    frames = _FRAME.findall(error_data.get("stacktrace") or "")
+    if frames:
+        location = "|".join(f"{path}:{function}" for path, function in frames)
+    else:
+        location = _VOLATILE.sub("#", error_data.get("message") or "")
+    key = f"{error_data['error_type']}|{error_data['component']}|{location}"
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+@dataclass
+class ErrorGroup:
+    fingerprint: str
+    first: Dict
+    count: int = 1
+    first_seen: str = ""
+    last_seen: str = ""
+    # Occurrences and users since the last count update
+    pending: int = 0
+    users: Set[str] = field(default_factory=set)
+
+    def to_dict(self) -> Dict:
+        return {
+            "fingerprint": self.fingerprint,
+            "error_type": self.first["error_type"],
+            "component": self.first["component"],
+            "message": self.first["message"],
+            "count": self.count,
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen
+        }
+
+class ErrorGroups:
+    """Collapses repeated errors into counted groups.
+
+    The first occurrence of a fingerprint is passed through in full.
+    Repeats only increment the group; ``collect()`` turns the repeats of
+    each group into one count update record per ``report_interval``.
+    Least recently seen groups beyond ``max_groups`` are dropped after
+    reporting their pending count.
+    """
+
+    MAX_USERS = 100
+
+    def __init__(self, report_interval: float = 60.0, max_groups: int = 1000):
+        self.report_interval = report_interval
+        self.max_groups = max_groups
+        self.groups: "OrderedDict[str, ErrorGroup]" = OrderedDict()
+        self._last_report = time.monotonic()
+
+    def record(self, error_data: Dict) -> List[Dict]:
+        """Count an error; returns the records to write and forward now"""
+        key = fingerprint(error_data)
+        group = self.groups.get(key)
+        if group is not None:
+            group.count += 1
+            group.pending += 1
+            group.last_seen = error_data["timestamp"]
+            if error_data.get("user_id") and len(group.users) < self.MAX_USERS:
+                group.users.add(error_data["user_id"])
+            self.groups.move_to_end(key)
+            return []
+
+        records = [{**error_data, "fingerprint": key, "occurrences": 1}]
+        self.groups[key] = ErrorGroup(
+            fingerprint=key,
+            first=error_data,
+            first_seen=error_data["timestamp"],
+            last_seen=error_data["timestamp"]
+        )
+        while len(self.groups) > self.max_groups:
+            _, evicted = self.groups.popitem(last=False)
+            if evicted.pending:
+                records.append(self._update(evicted))
+        return records
+
+    def collect(self, force: bool = False) -> List[Dict]:
+        """Count updates for groups with repeats, once per report_interval"""
+        if not force and time.monotonic() - self._last_report < self.report_interval:
+            return []
+        self._last_report = time.monotonic()
+        return [self._update(group) for group in self.groups.values() if group.pending]
+
+    @staticmethod
+    def _update(group: ErrorGroup) -> Dict:
+        first = group.first
+        update = {
+            "timestamp": datetime.utcnow().isoformat(),
+            "error_type": first["error_type"],
+            "message": first["message"],
+            "component": first["component"],
+            "user_id": None,
+            "users": sorted(group.users),
+            "environment": first.get("environment"),
+            "fingerprint": group.fingerprint,
+            "occurrences": group.pending,
+            "count": group.count,
+            "first_seen": group.first_seen,
+            "last_seen": group.last_seen
+        }
+        group.pending = 0
+        group.users = set()
+        return update
+
+    def summary(self) -> List[Dict]:
+        """All groups, most recently seen first"""
+        return [group.to_dict() for group in reversed(self.groups.values())]
@@ -5,18 +5,56 @@ import json
 import time
 from datetime import datetime
 from pathlib import Path
+import aiofiles
 import aiohttp
 import asyncio
 
+from .batch_writer import BatchWriter
+from .error_groups import ErrorGroups
+from .log_tail import ComponentIndex, line_at, reverse_lines
+from .metrics import metrics_collector
+
 logger = logging.getLogger(__name__)
 
 class ErrorTracker:
-    def __init__(self, log_dir: Path, sentry_dsn: Optional[str] = None):
+    """Logs errors and forwards them to Sentry.
+
+    Repeats of an error with the same fingerprint are not logged or sent
+    individually; they are counted in its group and reported as one
+    count update per ``group_report_interval``.
+
+    Errors are queued (at most ``max_queue``; more are dropped and
+    counted) and processed up to ``max_batch`` at a time: one log write
+    and one POST of all records per batch. Failed POSTs are retried
+    ``max_retries`` times with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        log_dir: Path,
+        sentry_dsn: Optional[str] = None,
+        group_report_interval: float = 60.0,
+        max_queue: int = 10000,
+        max_batch: int = 100,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5,
+        send_timeout: float = 10.0
+    ):
         self.log_dir = log_dir
         self.sentry_dsn = sentry_dsn
         self.error_log_path = log_dir / "errors.log"
-        self.error_queue: asyncio.Queue = asyncio.Queue()
+        self.error_queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.max_batch = max_batch
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.send_timeout = send_timeout
+        self.dropped = 0
         self.processing = False
+        self._processor: Optional[asyncio.Task] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.writer = BatchWriter()
+        self.component_index = ComponentIndex()
+        self.groups = ErrorGroups(group_report_interval)
         
         # Ensure log directory exists
         self.log_dir.mkdir(parents=True, exist_ok=True)
@@ -24,12 +62,35 @@ class ErrorTracker:
     async def start(self):
         """Start error processing"""
         self.processing = True
-        asyncio.create_task(self._process_error_queue())
+        self._processor = asyncio.create_task(self._process_error_queue())
+
+    async def stop(self, timeout: float = 10.0):
+        """Stop error processing
 
-    async def stop(self):
-        """Stop error processing"""
+        Waits up to ``timeout`` seconds for a running processor to drain
+        the queue. Whatever is still queued afterwards, or was queued
+        without a processor, is grouped and written directly.
+        """
+        if self._processor is not None and not self._processor.done():
+            try:
+                await asyncio.wait_for(self.error_queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(
+                    f"Error queue not drained on stop, {self.error_queue.qsize()} left"
+                )
         self.processing = False
-        await self.error_queue.join()
+        if self._processor is not None:
+            self._processor.cancel()
+        records = []
+        while not self.error_queue.empty():
+            records.extend(self.groups.record(self.error_queue.get_nowait()))
+            self.error_queue.task_done()
+        records.extend(self.groups.collect(force=True))
+        await self._emit(records)
+        await self.writer.close()
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
 
     async def track_error(
         self,
@@ -41,7 +102,14 @@ class ErrorTracker:
         """Track an error occurrence"""
         try:
             error_data = self._prepare_error_data(error, component, user_id, context)
-            await self.error_queue.put(error_data)
+            try:
+                self.error_queue.put_nowait(error_data)
+            except asyncio.QueueFull:
+                # Never block the caller on error reporting
+                self.dropped += 1
+                metrics_collector.track_errors_dropped(1)
+            metrics_collector.update_error_queue_depth(self.error_queue.qsize())
+            metrics_collector.track_error(error_data["error_type"], component)
             
             # Log error immediately
             logger.error(
@@ -64,7 +132,9 @@ class ErrorTracker:
             "timestamp": datetime.utcnow().isoformat(),
             "error_type": type(error).__name__,
             "message": str(error),
-            "stacktrace": traceback.format_exc(),
+            "stacktrace": "".join(
+                traceback.format_exception(type(error), error, error.__traceback__)
+            ),
             "component": component,
             "user_id": user_id,
             "context": context or {},
@@ -72,80 +142,158 @@ class ErrorTracker:
         }
 
     async def _process_error_queue(self):
-        """Process queued errors"""
+        """Process queued errors in batches"""
         while self.processing:
+            batch = []
             try:
-                error_data = await self.error_queue.get()
-                
-                # Write to local log
-                await self._write_to_log(error_data)
-                
-                # Send to Sentry if configured
-                if self.sentry_dsn:
-                    await self._send_to_sentry(error_data)
-                
-                self.error_queue.task_done()
+                try:
+                    batch.append(await asyncio.wait_for(
+                        self.error_queue.get(), self.groups.report_interval
+                    ))
+                except asyncio.TimeoutError:
+                    pass
+                while batch and len(batch) < self.max_batch and not self.error_queue.empty():
+                    batch.append(self.error_queue.get_nowait())
+                metrics_collector.update_error_queue_depth(self.error_queue.qsize())
+
+                # Only the first occurrence of a fingerprint is emitted
+                records = []
+                for error_data in batch:
+                    records.extend(self.groups.record(error_data))
+                records.extend(self.groups.collect())
+                await self._emit(records)
             except Exception as e:
                 logger.error(f"Error processing error queue: {e}")
-            await asyncio.sleep(0.1)
+            finally:
+                for _ in batch:
+                    self.error_queue.task_done()
 
-    async def _write_to_log(self, error_data: Dict):
-        """Write error to local log file"""
+    async def _emit(self, records: List[Dict]):
+        """Write records to the local log and send them to Sentry"""
+        if not records:
+            return
+        await self._write_to_log(records)
+        
+        # Send to Sentry if configured
+        if self.sentry_dsn:
+            await self._send_to_sentry(records)
+
+    def get_queue_stats(self) -> Dict:
+        """Depth of the error queue and errors dropped because it was full"""
+        return {
+            "depth": self.error_queue.qsize(),
+            "max_size": self.error_queue.maxsize,
+            "dropped": self.dropped
+        }
+
+    def get_error_groups(self) -> List[Dict]:
+        """Fingerprinted error groups with counts, most recently seen first"""
+        return self.groups.summary()
+
+    async def _write_to_log(self, records: List[Dict]):
+        """Write errors to local log file"""
         try:
-            async with aiofiles.open(self.error_log_path, "a") as f:
-                await f.write(json.dumps(error_data) + "\n")
+            self.writer.write(
+                self.error_log_path,
+                "".join(json.dumps(error_data) + "\n" for error_data in records)
+            )
         except Exception as e:
             logger.error(f"Failed to write error to log: {e}")
 
-    async def _send_to_sentry(self, error_data: Dict):
-        """Send error to Sentry"""
+    def _get_session(self) -> aiohttp.ClientSession:
+        # One pooled session for the tracker's lifetime
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=4),
+                timeout=aiohttp.ClientTimeout(total=self.send_timeout)
+            )
+        return self._session
+
+    async def _send_to_sentry(self, records: List[Dict]):
+        """Send a batch of errors to Sentry, retrying with backoff"""
         if not self.sentry_dsn:
             return
 
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._get_session().post(
                     self.sentry_dsn,
-                    json=error_data,
+                    json=records,
                     headers={"Content-Type": "application/json"}
                 ) as response:
-                    if response.status != 200:
-                        logger.error(
-                            f"Failed to send error to Sentry: {response.status}"
-                        )
-        except Exception as e:
-            logger.error(f"Failed to send error to Sentry: {e}")
+                    if response.status < 300:
+                        return
+                    if response.status != 429 and response.status < 500:
+                        # Rejected; retrying would not help
+                        logger.error(f"Failed to send errors to Sentry: {response.status}")
+                        return
+                    reason = f"status {response.status}"
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                reason = str(e) or type(e).__name__
+            if attempt < self.max_retries:
+                await asyncio.sleep(self.retry_backoff * 2 ** attempt)
+        logger.error(
+            f"Failed to send {len(records)} errors to Sentry after "
+            f"{self.max_retries + 1} attempts: {reason}"
+        )
 
     async def get_recent_errors(
         self,
         limit: int = 100,
         component: Optional[str] = None
     ) -> List[Dict]:
-        """Get recent errors from log"""
+        """Get the most recent errors from log, newest first"""
         try:
-            errors = []
-            async with aiofiles.open(self.error_log_path, "r") as f:
-                async for line in f:
-                    try:
-                        error = json.loads(line)
-                        if component and error["component"] != component:
-                            continue
-                        errors.append(error)
-                        if len(errors) >= limit:
-                            break
-                    except json.JSONDecodeError:
-                        continue
-            return errors
+            await self.writer.flush()
+            return await asyncio.get_running_loop().run_in_executor(
+                None, self._read_recent_errors, limit, component
+            )
         except Exception as e:
             logger.error(f"Failed to get recent errors: {e}")
             return []
 
+    def _read_recent_errors(self, limit: int, component: Optional[str]) -> List[Dict]:
+        if not self.error_log_path.exists():
+            return []
+        errors = []
+        end = None
+        if component:
+            # Indexed lines first, then scan backwards from where the index ends
+            self.component_index.update(self.error_log_path)
+            for offset in self.component_index.recent(component):
+                if len(errors) >= limit:
+                    return errors
+                error = self._parse_error(line_at(self.error_log_path, offset))
+                if error is not None and error.get("component") == component:
+                    errors.append(error)
+            end = self.component_index.scan_from(component)
+            needle = json.dumps({"component": component})[1:-1].encode()
+
+        for _, line in reverse_lines(self.error_log_path, end):
+            if len(errors) >= limit:
+                break
+            if component and needle not in line:
+                continue
+            error = self._parse_error(line)
+            if error is None or (component and error.get("component") != component):
+                continue
+            errors.append(error)
+        return errors
+
+    @staticmethod
+    def _parse_error(line: bytes) -> Optional[Dict]:
+        try:
+            return json.loads(line)
+        except json.JSONDecodeError:
+            return None
+
     async def get_error_stats(
         self,
         time_range: int = 3600
     ) -> Dict:
         """Get error statistics for the specified time range"""
         try:
+            await self.writer.flush()
             stats = {
                 "total_errors": 0,
                 "error_types": {},
@@ -167,21 +315,24 @@ class ErrorTracker:
                         if error_time < cutoff_time:
                             continue
                         
-                        stats["total_errors"] += 1
+                        # Count updates of error groups stand for several errors
+                        occurrences = error.get("occurrences", 1)
+                        stats["total_errors"] += occurrences
                         
                         # Track error types
                         error_type = error["error_type"]
                         stats["error_types"][error_type] = \
-                            stats["error_types"].get(error_type, 0) + 1
+                            stats["error_types"].get(error_type, 0) + occurrences
                         
                         # Track components
                         component = error["component"]
                         stats["components"][component] = \
-                            stats["components"].get(component, 0) + 1
+                            stats["components"].get(component, 0) + occurrences
                         
                         # Track affected users
                         if error["user_id"]:
                             stats["users_affected"].add(error["user_id"])
+                        stats["users_affected"].update(error.get("users", ()))
                     except json.JSONDecodeError:
                         continue
             
@@ -0,0 +1,92 @@
+from typing import Deque, Dict, Iterator, Optional, Tuple
+import json
+import mmap
+import os
+import threading
+from collections import deque
+from pathlib import Path
+
+def reverse_lines(path: Path, end: Optional[int] = None) -> Iterator[Tuple[int, bytes]]:
+    """Yield ``(offset, line)`` of a JSON lines file, last line first.
+
+    The file is memory-mapped and scanned backwards from ``end`` (default:
+    end of file), so reading the last N lines costs O(N) regardless of the
+    file size. A trailing line without newline, still being written, is
+    skipped.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            pos = size if end is None else min(end, size)
+            if pos == size and m[pos - 1:pos] != b"\n":
+                pos = m.rfind(b"\n", 0, pos) + 1
+            while pos > 0:
+                start = m.rfind(b"\n", 0, pos - 1) + 1
+                yield start, m[start:pos]
+                pos = start
+
+def line_at(path: Path, offset: int) -> bytes:
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return f.readline()
+
+class ComponentIndex:
+    """Byte offsets of the most recent log lines per component.
+
+    The index follows the file forward: ``update()`` parses only the lines
+    appended since the previous call, whichever process wrote them. It
+    starts at the end of the file as found on the first update, and keeps
+    the last ``max_entries`` offsets per component; older matches are
+    found by a backward scan from ``scan_from(component)``.
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self.offsets: Dict[str, Deque[int]] = {}
+        self.start: Optional[int] = None
+        self.covered = 0
+        self._lock = threading.Lock()
+
+    def update(self, path: Path):
+        with self._lock:
+            size = path.stat().st_size if path.exists() else 0
+            if self.start is None or size < self.covered:
+                # First use, or the log was truncated or rotated
+                self.offsets.clear()
+                self.start = self.covered = size
+                return
+            if size == self.covered:
+                return
+            with open(path, "rb") as f:
+                f.seek(self.covered)
+                offset = self.covered
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        component = json.loads(line)["component"]
+                    except (ValueError, KeyError, TypeError):
+                        component = None
+                    if isinstance(component, str):
+                        entries = self.offsets.get(component)
+                        if entries is None:
+                            entries = self.offsets[component] = deque(maxlen=self.max_entries)
+                        entries.append(offset)
+                    offset += len(line)
+                self.covered = offset
+
+    def recent(self, component: str) -> Iterator[int]:
+        """Indexed offsets of a component, newest first"""
+        with self._lock:
+            entries = list(self.offsets.get(component, ()))
+        return reversed(entries)
+
+    def scan_from(self, component: str) -> int:
+        """Offset below which the index may be missing lines of ``component``"""
+        with self._lock:
+            entries = self.offsets.get(component)
+            if entries is not None and len(entries) == self.max_entries:
+                return entries[0]
+            return self.start or 0
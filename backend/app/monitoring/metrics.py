@@ -1,11 +1,83 @@
-from prometheus_client import Counter, Histogram, Gauge, Info
-from typing import Dict, Optional
+from prometheus_client import Counter, Histogram, Gauge, Info, REGISTRY
+from prometheus_client.core import GaugeMetricFamily
+from typing import Callable, Dict, Optional
 import psutil
 import time
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Windows of the error_rate gauges, in seconds
+ERROR_RATE_WINDOWS = {"1m": 60, "5m": 300, "15m": 900}
+
+class SlidingWindowCounter:
+    """Event counts in a ring of per-second buckets.
+
+    ``increment()`` is O(1); ``count(window)`` sums the last ``window``
+    seconds in O(window). Each bucket remembers which second it holds, so
+    buckets left over from an earlier pass round the ring are ignored
+    without having to be cleared.
+    """
+
+    def __init__(self, size: int = 900, clock: Callable[[], float] = time.time):
+        self.size = size
+        self.clock = clock
+        self.counts = [0] * size
+        self.seconds = [-1] * size
+
+    def increment(self, amount: int = 1):
+        second = int(self.clock())
+        index = second % self.size
+        if self.seconds[index] != second:
+            self.seconds[index] = second
+            self.counts[index] = 0
+        self.counts[index] += amount
+
+    def count(self, window: int) -> int:
+        """Events in the last ``window`` seconds, including the current one"""
+        now = int(self.clock())
+        total = 0
+        for second in range(now - min(window, self.size) + 1, now + 1):
+            index = second % self.size
+            if self.seconds[index] == second:
+                total += self.counts[index]
+        return total
+
+    def rate(self, window: int) -> float:
+        """Events per minute over the last ``window`` seconds"""
+        return self.count(window) * 60 / window
+
+class ErrorRateCollector:
+    """Exports error rates per window, computed when scraped"""
+
+    def __init__(self, total: SlidingWindowCounter, components: Dict[str, SlidingWindowCounter]):
+        self.total = total
+        self.components = components
+
+    def describe(self):
+        return [
+            GaugeMetricFamily('error_rate', 'Errors per minute', labels=['window']),
+            GaugeMetricFamily(
+                'component_error_rate',
+                'Errors per minute by component',
+                labels=['window', 'component']
+            )
+        ]
+
+    def collect(self):
+        total = GaugeMetricFamily('error_rate', 'Errors per minute', labels=['window'])
+        by_component = GaugeMetricFamily(
+            'component_error_rate',
+            'Errors per minute by component',
+            labels=['window', 'component']
+        )
+        for name, window in ERROR_RATE_WINDOWS.items():
+            total.add_metric([name], self.total.rate(window))
+            for component, counter in list(self.components.items()):
+                by_component.add_metric([name, component], counter.rate(window))
+        yield total
+        yield by_component
+
 class MetricsCollector:
     def __init__(self):
         # System Metrics
@@ -55,9 +127,20 @@ class MetricsCollector:
             'Total number of errors',
             ['type', 'component']
         )
-        self.error_rate = Gauge(
-            'error_rate',
-            'Rate of errors per minute'
+        # error_rate and component_error_rate gauges over sliding windows
+        window = max(ERROR_RATE_WINDOWS.values())
+        self.error_counter = SlidingWindowCounter(window)
+        self.component_error_counters: Dict[str, SlidingWindowCounter] = {}
+        REGISTRY.register(
+            ErrorRateCollector(self.error_counter, self.component_error_counters)
+        )
+        self.error_queue_depth = Gauge(
+            'error_queue_depth',
+            'Errors waiting to be logged and forwarded'
+        )
+        self.errors_dropped_total = Counter(
+            'errors_dropped_total',
+            'Errors dropped because the error queue was full'
         )
 
         # Performance Metrics
@@ -72,6 +155,17 @@ class MetricsCollector:
             'Total HTTP requests',
             ['method', 'endpoint', 'status']
         )
+        self._request_series: Dict[tuple, tuple] = {}
+
+        # WebSocket Metrics
+        self.websocket_connections = Gauge(
+            'websocket_connections',
+            'Number of open websocket connections'
+        )
+        self.websocket_reaped_total = Counter(
+            'websocket_reaped_total',
+            'Websocket connections closed by the heartbeat reaper'
+        )
 
         # Version Info
         self.version_info = Info(
@@ -122,43 +216,62 @@ class MetricsCollector:
         """Track error occurrence"""
         try:
             self.errors_total.labels(type=error_type, component=component).inc()
-            self._update_error_rate()
+            self.error_counter.increment()
+            counter = self.component_error_counters.get(component)
+            if counter is None:
+                counter = self.component_error_counters[component] = \
+                    SlidingWindowCounter(self.error_counter.size)
+            counter.increment()
         except Exception as e:
             logger.error(f"Error tracking error: {e}")
 
-    def _update_error_rate(self):
-        """Update error rate calculation"""
-        try:
-            # Calculate error rate over last minute
-            current_time = time.time()
-            one_minute_ago = current_time - 60
-            
-            recent_errors = sum(
-                1 for t in self.errors_total._value.values()
-                if t > one_minute_ago
-            )
-            
-            self.error_rate.set(recent_errors / 60)
-        except Exception as e:
-            logger.error(f"Error updating error rate: {e}")
+    def get_error_rates(self) -> Dict[str, Dict[str, float]]:
+        """Errors per minute per window, in total and by component"""
+        return {
+            name: {
+                "total": self.error_counter.rate(window),
+                "components": {
+                    component: counter.rate(window)
+                    for component, counter in self.component_error_counters.items()
+                }
+            }
+            for name, window in ERROR_RATE_WINDOWS.items()
+        }
+
+    def update_error_queue_depth(self, depth: int):
+        """Update the number of queued errors"""
+        self.error_queue_depth.set(depth)
+
+    def track_errors_dropped(self, count: int):
+        """Track errors dropped because the queue was full"""
+        self.errors_dropped_total.inc(count)
 
     def track_request(self, method: str, endpoint: str, status: int, duration: float):
         """Track HTTP request metrics"""
         try:
-            self.request_duration.labels(
-                method=method,
-                endpoint=endpoint
-            ).observe(duration)
-            
-            self.request_total.labels(
-                method=method,
-                endpoint=endpoint,
-                status=status
-            ).inc()
+            # labels() costs more than the observation itself; callers
+            # keep the label values bounded, so the children are cached
+            key = (method, endpoint, status)
+            series = self._request_series.get(key)
+            if series is None:
+                series = self._request_series[key] = (
+                    self.request_duration.labels(method=method, endpoint=endpoint),
+                    self.request_total.labels(method=method, endpoint=endpoint, status=status)
+                )
+            series[0].observe(duration)
+            series[1].inc()
         except Exception as e:
             logger.error(f"Error tracking request: {e}")
             self.errors_total.labels(type='tracking', component='request').inc()
 
+    def update_websocket_connections(self, count: int):
+        """Update open websocket connections count"""
+        self.websocket_connections.set(count)
+
+    def track_websocket_reaped(self, count: int):
+        """Track connections closed by the heartbeat reaper"""
+        self.websocket_reaped_total.inc(count)
+
     def set_version(self, version: str, build: str):
         """Set application version information"""
         try:
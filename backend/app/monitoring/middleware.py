@@ -0,0 +1,78 @@
+from typing import Optional, Set
+import logging
+from time import perf_counter
+
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .metrics import MetricsCollector, metrics_collector
+from .performance import PerformanceMonitor, performance_monitor
+
+logger = logging.getLogger(__name__)
+
+class RequestTimingMiddleware:
+    """Times HTTP requests for MetricsCollector and PerformanceMonitor.
+
+    Requests are labelled with the path template of the matched route
+    (``/api/install/{installation_id}/status``), never the raw path, so
+    ids do not create new label values. Requests matching no route are
+    labelled ``UNMATCHED``. After ``max_routes`` distinct templates,
+    further ones are labelled ``OTHER``.
+    """
+
+    UNMATCHED = "<unmatched>"
+    OTHER = "<other>"
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        metrics: Optional[MetricsCollector] = None,
+        performance: Optional[PerformanceMonitor] = None,
+        max_routes: int = 100
+    ):
+        self.app = app
+        self.metrics = metrics or metrics_collector
+        self.performance = performance or performance_monitor
+        self.max_routes = max_routes
+        self.routes: Set[str] = set()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = perf_counter() - start
+            route = self._route_label(scope)
+            method = scope["method"]
+            self.metrics.track_request(method, route, status, duration)
+            self.performance.track_request(route, method, duration, status)
+
+    def _route_label(self, scope: Scope) -> str:
+        # The router stores the matched route in the scope; older Starlette
+        # versions do not, so match against the router's routes instead
+        route = scope.get("route")
+        if route is None and "router" in scope:
+            for candidate in scope["router"].routes:
+                if candidate.matches(scope)[0] == Match.FULL:
+                    route = candidate
+                    break
+        template = getattr(route, "path", None)
+        if template is None:
+            return self.UNMATCHED
+        if template not in self.routes:
+            if len(self.routes) >= self.max_routes:
+                return self.OTHER
+            self.routes.add(template)
+        return template
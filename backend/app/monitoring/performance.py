@@ -4,22 +4,32 @@ import time
 import asyncio
 import psutil
 from datetime import datetime, timedelta
-from collections import deque
+from collections import defaultdict
 import statistics
 
+from .timeseries import SampleRing, TimeSeries, merge_summaries
+
 logger = logging.getLogger(__name__)
 
 class PerformanceMonitor:
-    def __init__(self, window_size: int = 3600):
+    """Keeps request and system metrics in fixed-interval time series.
+
+    ``window_size`` seconds of history are kept at ``interval`` second
+    resolution, plus the last raw response times of each endpoint for
+    percentiles.
+    """
+
+    def __init__(self, window_size: int = 3600, interval: float = 10.0):
         self.window_size = window_size  # 1 hour default
+        self.interval = interval
+        buckets = max(int(window_size // interval), 1)
         
         # Performance metrics storage
-        self.response_times = deque(maxlen=window_size)
-        self.cpu_usage = deque(maxlen=window_size)
-        self.memory_usage = deque(maxlen=window_size)
-        self.request_rates = deque(maxlen=window_size)
+        self.response_times = TimeSeries(interval, buckets)
+        self.cpu_usage = TimeSeries(interval, buckets)
+        self.memory_usage = TimeSeries(interval, buckets)
         
-        # Endpoint specific metrics
+        # Endpoint specific metrics, last minute at one second resolution
         self.endpoint_metrics: Dict[str, Dict] = {}
         
         # Background task for collecting system metrics
@@ -43,11 +53,11 @@ class PerformanceMonitor:
             try:
                 # CPU Usage
                 cpu_percent = psutil.cpu_percent(interval=1)
-                self.cpu_usage.append((time.time(), cpu_percent))
+                self.cpu_usage.add(cpu_percent)
 
                 # Memory Usage
                 memory = psutil.virtual_memory()
-                self.memory_usage.append((time.time(), memory.percent))
+                self.memory_usage.add(memory.percent)
 
                 # Wait before next collection
                 await asyncio.sleep(1)
@@ -66,55 +76,54 @@ class PerformanceMonitor:
         try:
             timestamp = time.time()
             
-            # Overall response times
-            self.response_times.append((timestamp, duration))
+            # Overall response times; their counts are the request rate
+            self.response_times.add(duration, timestamp)
             
-            # Update request rate
-            self.request_rates.append(timestamp)
-            
-            # Update endpoint specific metrics
-            if endpoint not in self.endpoint_metrics:
-                self.endpoint_metrics[endpoint] = {
-                    "response_times": deque(maxlen=self.window_size),
-                    "status_codes": deque(maxlen=self.window_size),
-                    "methods": deque(maxlen=self.window_size)
+            # Update endpoint specific metrics, one series per method and
+            # status code; the endpoint totals are merged when read
+            metrics = self.endpoint_metrics.get(endpoint)
+            if metrics is None:
+                metrics = self.endpoint_metrics[endpoint] = {
+                    "requests": {},
+                    "recent_response_times": SampleRing()
                 }
             
-            metrics = self.endpoint_metrics[endpoint]
-            metrics["response_times"].append((timestamp, duration))
-            metrics["status_codes"].append((timestamp, status_code))
-            metrics["methods"].append((timestamp, method))
+            series = metrics["requests"].get((method, status_code))
+            if series is None:
+                series = metrics["requests"][(method, status_code)] = TimeSeries(1.0, 60)
+            series.add(duration, timestamp)
+            metrics["recent_response_times"].add(duration, timestamp)
         except Exception as e:
             logger.error(f"Error tracking request: {e}")
 
+    @staticmethod
+    def _p95(samples: List[float]) -> float:
+        if len(samples) < 2:
+            return samples[0] if samples else 0
+        return statistics.quantiles(samples, n=20)[18]
+
     def get_current_metrics(self) -> Dict:
         """Get current performance metrics"""
         try:
             current_time = time.time()
             cutoff_time = current_time - 60  # Last minute
             
-            # Calculate request rate
-            recent_requests = sum(
-                1 for t in self.request_rates
-                if t > cutoff_time
-            )
-            
-            # Get recent response times
-            recent_response_times = [
-                duration for t, duration in self.response_times
-                if t > cutoff_time
-            ]
+            response_times = self.response_times.summary(60)
             
             metrics = {
-                "request_rate": recent_requests / 60,  # requests per second
+                "request_rate": response_times["count"] / 60,  # requests per second
                 "response_time": {
-                    "avg": statistics.mean(recent_response_times) if recent_response_times else 0,
-                    "p95": statistics.quantiles(recent_response_times, n=20)[18] if recent_response_times else 0,
-                    "max": max(recent_response_times) if recent_response_times else 0
+                    "avg": response_times["mean"],
+                    "p95": self._p95([
+                        sample
+                        for metrics in list(self.endpoint_metrics.values())
+                        for sample in metrics["recent_response_times"].since(cutoff_time)
+                    ]),
+                    "max": response_times["max"]
                 },
                 "system": {
-                    "cpu": self.cpu_usage[-1][1] if self.cpu_usage else 0,
-                    "memory": self.memory_usage[-1][1] if self.memory_usage else 0
+                    "cpu": self.cpu_usage.last or 0,
+                    "memory": self.memory_usage.last or 0
                 }
             }
             
@@ -130,39 +139,28 @@ class PerformanceMonitor:
                 return {}
             
             metrics = self.endpoint_metrics[endpoint]
-            current_time = time.time()
-            cutoff_time = current_time - 60
-            
-            # Get recent data
-            recent_times = [
-                duration for t, duration in metrics["response_times"]
-                if t > cutoff_time
-            ]
-            
-            recent_status = [
-                status for t, status in metrics["status_codes"]
-                if t > cutoff_time
-            ]
-            
-            recent_methods = [
-                method for t, method in metrics["methods"]
-                if t > cutoff_time
-            ]
+            cutoff_time = time.time() - 60
+            
+            # Merge the last minute of each method/status code series
+            status_codes = defaultdict(int)
+            methods = defaultdict(int)
+            summaries = []
+            for (method, status_code), series in metrics["requests"].items():
+                summary = series.summary(60)
+                if summary["count"]:
+                    status_codes[str(status_code)] += summary["count"]
+                    methods[method] += summary["count"]
+                    summaries.append(summary)
+            response_times = merge_summaries(summaries)
             
             return {
                 "response_time": {
-                    "avg": statistics.mean(recent_times) if recent_times else 0,
-                    "p95": statistics.quantiles(recent_times, n=20)[18] if recent_times else 0,
-                    "max": max(recent_times) if recent_times else 0
-                },
-                "status_codes": {
-                    str(status): recent_status.count(status)
-                    for status in set(recent_status)
+                    "avg": response_times["mean"],
+                    "p95": self._p95(metrics["recent_response_times"].since(cutoff_time)),
+                    "max": response_times["max"]
                 },
-                "methods": {
-                    method: recent_methods.count(method)
-                    for method in set(recent_methods)
-                }
+                "status_codes": dict(status_codes),
+                "methods": dict(methods)
             }
         except Exception as e:
             logger.error(f"Error getting endpoint metrics: {e}")
@@ -170,44 +168,30 @@ class PerformanceMonitor:
 
     def get_performance_history(
         self,
-        duration: timedelta = timedelta(hours=1)
+        duration: timedelta = timedelta(hours=1),
+        points: int = 60
     ) -> Dict:
-        """Get historical performance data"""
+        """Get historical performance data, downsampled to ``points`` intervals"""
         try:
-            current_time = time.time()
-            cutoff_time = current_time - duration.total_seconds()
-            
-            # Prepare time series data
-            time_series = []
-            interval = duration.total_seconds() / 60  # 60 data points
-            
-            for i in range(60):
-                start_time = cutoff_time + (i * interval)
-                end_time = start_time + interval
-                
-                # Get data for this interval
-                response_times = [
-                    duration for t, duration in self.response_times
-                    if start_time <= t < end_time
-                ]
-                
-                cpu = [
-                    usage for t, usage in self.cpu_usage
-                    if start_time <= t < end_time
-                ]
-                
-                memory = [
-                    usage for t, usage in self.memory_usage
-                    if start_time <= t < end_time
-                ]
-                
-                time_series.append({
-                    "timestamp": datetime.fromtimestamp(start_time).isoformat(),
-                    "response_time": statistics.mean(response_times) if response_times else 0,
-                    "cpu_usage": statistics.mean(cpu) if cpu else 0,
-                    "memory_usage": statistics.mean(memory) if memory else 0,
-                    "request_count": len(response_times)
-                })
+            end_time = time.time()
+            start_time = end_time - duration.total_seconds()
+            interval = duration.total_seconds() / points
+            
+            response_times = self.response_times.history(start_time, end_time, points)
+            cpu = self.cpu_usage.history(start_time, end_time, points)
+            memory = self.memory_usage.history(start_time, end_time, points)
+            
+            time_series = [
+                {
+                    "timestamp": datetime.fromtimestamp(start_time + i * interval).isoformat(),
+                    "response_time": response_times[i]["mean"],
+                    "response_time_max": response_times[i]["max"],
+                    "cpu_usage": cpu[i]["mean"],
+                    "memory_usage": memory[i]["mean"],
+                    "request_count": response_times[i]["count"]
+                }
+                for i in range(points)
+            ]
             
             return {
                 "interval": interval,
@@ -0,0 +1,344 @@
+from typing import Dict, Iterator, Optional, Tuple
+import logging
+import json
+import os
+import fcntl
+import time
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+def hour_key(timestamp: str) -> str:
+    """``YYYY-MM-DDTHH`` bucket of an ISO timestamp, without parsing it"""
+    return timestamp[:13]
+
+def hour_keys(start: datetime, end: datetime) -> Iterator[str]:
+    """Bucket keys of the hours from ``start`` up to and including ``end``"""
+    hour = start.replace(minute=0, second=0, microsecond=0)
+    while hour <= end:
+        yield hour.strftime("%Y-%m-%dT%H")
+        hour += timedelta(hours=1)
+
+def add_event(events: Dict[str, Dict], event: Dict):
+    bucket = events.get(hour_key(event["timestamp"]))
+    if bucket is None:
+        bucket = events[hour_key(event["timestamp"])] = {
+            "total": 0,
+            "event_types": defaultdict(int),
+            "users": set()
+        }
+    bucket["total"] += 1
+    bucket["event_types"][event["event_type"]] += 1
+    if event["user_id"]:
+        bucket["users"].add(event["user_id"])
+
+def add_session(sessions: Dict[str, Dict[str, list]], session: Dict):
+    timestamp = session["timestamp"]
+    bucket = sessions.setdefault(hour_key(timestamp), {})
+    entry = bucket.get(session["session_id"])
+    if entry is None:
+        # [first, last, records, user]
+        bucket[session["session_id"]] = [timestamp, timestamp, 1, session["user_id"]]
+    else:
+        entry[0] = min(entry[0], timestamp)
+        entry[1] = max(entry[1], timestamp)
+        entry[2] += 1
+
+def merge_events(into: Dict[str, Dict], events: Dict[str, Dict]):
+    for key, bucket in events.items():
+        target = into.get(key)
+        if target is None:
+            target = into[key] = {
+                "total": 0,
+                "event_types": defaultdict(int),
+                "users": set()
+            }
+        target["total"] += bucket["total"]
+        for event_type, count in bucket["event_types"].items():
+            target["event_types"][event_type] += count
+        target["users"] |= bucket["users"]
+
+def merge_sessions(into: Dict[str, Dict[str, list]], sessions: Dict[str, Dict[str, list]]):
+    for key, bucket in sessions.items():
+        target = into.setdefault(key, {})
+        for session_id, (first, last, records, user_id) in bucket.items():
+            entry = target.get(session_id)
+            if entry is None:
+                target[session_id] = [first, last, records, user_id]
+            else:
+                entry[0] = min(entry[0], first)
+                entry[1] = max(entry[1], last)
+                entry[2] += records
+
+def latest(a: Optional[str], b: Optional[str]) -> Optional[str]:
+    return max(a or "", b or "") or None
+
+class HourlyRollups:
+    """Event and session aggregates per hour, kept up to date on write.
+
+    Event buckets hold the total, the count per event type and the users
+    seen; session buckets hold first/last timestamp and record count per
+    session. Stats over a time range merge the buckets of that range
+    instead of parsing raw records, at the granularity of whole hours.
+    Buckets older than ``retention`` are dropped on checkpoint.
+
+    The rollups are checkpointed to ``path`` together with the timestamp
+    of the last record of each stream they include, so records written
+    after the last checkpoint can be replayed from the segments on load.
+
+    Several worker processes share the checkpoint. Each one keeps the
+    records it added since its last checkpoint as a delta; a checkpoint
+    merges that delta into the file under an exclusive lock and adopts the
+    merged result, so workers also see each other's records. Records past
+    the watermarks are only replayed by a process that has the checkpoint
+    to itself (see ``attach``): records of a live worker are merged by
+    that worker, and replaying them as well would count them twice.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        checkpoint_interval: float = 60.0,
+        retention: timedelta = timedelta(days=90)
+    ):
+        self.path = path
+        self.checkpoint_interval = checkpoint_interval
+        self.retention = retention
+        self.events: Dict[str, Dict] = {}
+        self.sessions: Dict[str, Dict[str, list]] = {}
+        self.events_through: Optional[str] = None
+        self.sessions_through: Optional[str] = None
+        # Records added since the last checkpoint, merged into the file
+        self._new_events: Dict[str, Dict] = {}
+        self._new_sessions: Dict[str, Dict[str, list]] = {}
+        self._last_checkpoint = time.monotonic()
+        self._dirty = False
+        self._checkpoint_lock = asyncio.Lock()
+        # Held shared by every attached process, exclusively while replaying
+        self._attach_fd: Optional[int] = None
+        self._exclusive = False
+
+    def add_event(self, event: Dict):
+        add_event(self.events, event)
+        add_event(self._new_events, event)
+        self.events_through = latest(self.events_through, event["timestamp"])
+        self._dirty = True
+
+    def add_session(self, session: Dict):
+        add_session(self.sessions, session)
+        add_session(self._new_sessions, session)
+        self.sessions_through = latest(self.sessions_through, session["timestamp"])
+        self._dirty = True
+
+    def _window(self, since: datetime) -> Iterator[str]:
+        # Up to the next hour, for timestamps slightly ahead of our clock
+        return hour_keys(since, datetime.utcnow() + timedelta(hours=1))
+
+    def event_stats(self, since: datetime) -> Dict:
+        event_types = defaultdict(int)
+        hourly_distribution = defaultdict(int)
+        users = set()
+        total = 0
+        for key in self._window(since):
+            bucket = self.events.get(key)
+            if bucket is None:
+                continue
+            total += bucket["total"]
+            for event_type, count in bucket["event_types"].items():
+                event_types[event_type] += count
+            users |= bucket["users"]
+            hourly_distribution[int(key[11:13])] += bucket["total"]
+        return {
+            "total_events": total,
+            "event_types": event_types,
+            "unique_users": len(users),
+            "hourly_distribution": hourly_distribution
+        }
+
+    def session_stats(self, since: datetime) -> Dict:
+        sessions: Dict[str, list] = {}
+        for key in self._window(since):
+            bucket = self.sessions.get(key)
+            if bucket is None:
+                continue
+            for session_id, (first, last, records, user_id) in bucket.items():
+                entry = sessions.get(session_id)
+                if entry is None:
+                    sessions[session_id] = [first, last, records, user_id]
+                else:
+                    entry[0] = min(entry[0], first)
+                    entry[1] = max(entry[1], last)
+                    entry[2] += records
+
+        durations = [
+            (datetime.fromisoformat(last) - datetime.fromisoformat(first)).total_seconds()
+            for first, last, records, _ in sessions.values()
+            if records > 1
+        ]
+        bounces = sum(1 for entry in sessions.values() if entry[2] == 1)
+        total = len(sessions)
+        return {
+            "total_sessions": total,
+            "unique_users": len({entry[3] for entry in sessions.values() if entry[3]}),
+            "session_duration": durations,
+            "bounce_rate": bounces / total if total > 0 else 0,
+            "avg_session_duration": sum(durations) / len(durations) if durations else 0
+        }
+
+    async def attach(self) -> bool:
+        """Load the checkpoint as one of the processes writing it
+
+        Returns True if no other process has it attached. Only then must
+        the caller replay the records past the watermarks, followed by a
+        checkpoint, which lets the other processes attach.
+        """
+        fd = os.open(str(self.path.with_suffix(".attach")), os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            self._exclusive = True
+        except BlockingIOError:
+            # Waits while another process replays
+            await asyncio.get_running_loop().run_in_executor(
+                None, fcntl.flock, fd, fcntl.LOCK_SH
+            )
+        self._attach_fd = fd
+        self.load()
+        return self._exclusive
+
+    def _share(self):
+        if self._exclusive:
+            fcntl.flock(self._attach_fd, fcntl.LOCK_SH)
+            self._exclusive = False
+
+    def close(self):
+        """Detach without a checkpoint, as if the process ended"""
+        if self._attach_fd is not None:
+            os.close(self._attach_fd)
+            self._attach_fd = None
+            self._exclusive = False
+
+    def load(self) -> bool:
+        """Restore the last checkpoint; False if there is none"""
+        data = self._read()
+        if data is None:
+            return False
+        self.events, self.sessions, self.events_through, self.sessions_through = data
+        return True
+
+    def _read(self) -> Optional[Tuple]:
+        try:
+            data = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.error(f"Ignoring unreadable analytics rollups: {e}")
+            return None
+        events = {
+            key: {
+                "total": bucket["total"],
+                "event_types": defaultdict(int, bucket["event_types"]),
+                "users": set(bucket["users"])
+            }
+            for key, bucket in data["events"].items()
+        }
+        return events, data["sessions"], data["events_through"], data["sessions_through"]
+
+    def prune(self, now: Optional[datetime] = None):
+        """Drop buckets older than ``retention``"""
+        if self._prune(self.events, self.sessions, now):
+            self._dirty = True
+
+    def _prune(self, events: Dict, sessions: Dict, now: Optional[datetime] = None) -> bool:
+        cutoff = hour_key(((now or datetime.utcnow()) - self.retention).isoformat())
+        pruned = False
+        for buckets in (events, sessions):
+            for key in [key for key in buckets if key < cutoff]:
+                del buckets[key]
+                pruned = True
+        return pruned
+
+    async def checkpoint(self):
+        """Merge the records added since the last checkpoint into the file
+
+        Reading, merging and writing the file run in the default executor
+        under the file lock. Afterwards the merged rollups, plus whatever
+        was added in the meantime, replace the in-memory ones.
+        """
+        self._last_checkpoint = time.monotonic()
+        async with self._checkpoint_lock:
+            try:
+                self.prune()
+                if not self._dirty:
+                    return
+                new = (self._new_events, self._new_sessions)
+                self._new_events, self._new_sessions = {}, {}
+                self._dirty = False
+                try:
+                    merged = await asyncio.get_running_loop().run_in_executor(
+                        None,
+                        self._merge,
+                        *new,
+                        self.events_through,
+                        self.sessions_through
+                    )
+                except Exception:
+                    merge_events(self._new_events, new[0])
+                    merge_sessions(self._new_sessions, new[1])
+                    self._dirty = True
+                    raise
+                events, sessions, events_through, sessions_through = merged
+                merge_events(events, self._new_events)
+                merge_sessions(sessions, self._new_sessions)
+                self.events, self.sessions = events, sessions
+                self.events_through = latest(events_through, self.events_through)
+                self.sessions_through = latest(sessions_through, self.sessions_through)
+            finally:
+                self._share()
+
+    def _merge(
+        self,
+        new_events: Dict,
+        new_sessions: Dict,
+        events_through: Optional[str],
+        sessions_through: Optional[str]
+    ) -> Tuple:
+        fd = os.open(str(self.path.with_suffix(".lock")), os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            events, sessions, file_events_through, file_sessions_through = (
+                self._read() or ({}, {}, None, None)
+            )
+            merge_events(events, new_events)
+            merge_sessions(sessions, new_sessions)
+            self._prune(events, sessions)
+            events_through = latest(file_events_through, events_through)
+            sessions_through = latest(file_sessions_through, sessions_through)
+            self._write({
+                "events": {
+                    key: {
+                        "total": bucket["total"],
+                        "event_types": dict(bucket["event_types"]),
+                        "users": sorted(bucket["users"])
+                    }
+                    for key, bucket in events.items()
+                },
+                "sessions": sessions,
+                "events_through": events_through,
+                "sessions_through": sessions_through
+            })
+            return events, sessions, events_through, sessions_through
+        finally:
+            # Closing the descriptor releases the lock
+            os.close(fd)
+
+    def _write(self, data: Dict):
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data))
+        tmp.replace(self.path)
+
+    async def maybe_checkpoint(self):
+        if time.monotonic() - self._last_checkpoint >= self.checkpoint_interval:
+            await self.checkpoint()
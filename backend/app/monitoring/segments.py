@@ -0,0 +1,211 @@
+from typing import AsyncIterator, Dict, List, Optional
+import logging
+import json
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+import aiofiles
+
+from .batch_writer import BatchWriter
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Segment:
+    """An append-only log file plus the range of timestamps it holds"""
+    path: Path
+    min_ts: Optional[datetime] = None
+    max_ts: Optional[datetime] = None
+    count: int = 0
+    size: int = 0
+
+    @property
+    def meta_path(self) -> Path:
+        return self.path.with_suffix(".meta.json")
+
+    def add(self, timestamp: datetime, size: int):
+        if self.min_ts is None or timestamp < self.min_ts:
+            self.min_ts = timestamp
+        if self.max_ts is None or timestamp > self.max_ts:
+            self.max_ts = timestamp
+        self.count += 1
+        self.size += size
+
+    def overlaps(self, start: Optional[datetime], end: Optional[datetime]) -> bool:
+        if self.count == 0:
+            return False
+        if start is not None and self.max_ts < start:
+            return False
+        if end is not None and self.min_ts > end:
+            return False
+        return True
+
+    def within(self, start: Optional[datetime], end: Optional[datetime]) -> bool:
+        return (
+            (start is None or self.min_ts >= start) and
+            (end is None or self.max_ts <= end)
+        )
+
+    def to_meta(self) -> Dict:
+        return {
+            "min_ts": self.min_ts.isoformat() if self.min_ts else None,
+            "max_ts": self.max_ts.isoformat() if self.max_ts else None,
+            "count": self.count,
+            "size": self.size
+        }
+
+    @classmethod
+    def from_meta(cls, path: Path, meta: Dict) -> "Segment":
+        return cls(
+            path=path,
+            min_ts=datetime.fromisoformat(meta["min_ts"]) if meta["min_ts"] else None,
+            max_ts=datetime.fromisoformat(meta["max_ts"]) if meta["max_ts"] else None,
+            count=meta["count"],
+            size=meta["size"]
+        )
+
+class SegmentLog:
+    """JSON lines split into daily segments with min/max timestamp sidecars.
+
+    Records go to ``<directory>/<YYYY-MM-DD>-<nnn>.log``; a new segment is
+    started when the UTC day changes or the current one reaches
+    ``max_segment_bytes``. Each segment has a ``.meta.json`` sidecar with
+    its first and last timestamp and record count, so a range query only
+    opens the segments that overlap the range.
+
+    Sidecars are written when a segment is rolled and every
+    ``meta_interval`` records. A sidecar whose size does not match its
+    segment (e.g. after a crash) is rebuilt by scanning that one segment.
+
+    Records are written through ``writer``, which can be shared between
+    several logs.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        max_segment_bytes: int = 16 * 1024 * 1024,
+        meta_interval: int = 100,
+        writer: Optional[BatchWriter] = None
+    ):
+        self.directory = directory
+        self.writer = writer or BatchWriter()
+        self.max_segment_bytes = max_segment_bytes
+        self.meta_interval = meta_interval
+        self.segments: List[Segment] = []
+        self._loaded = False
+        self._unsaved = 0
+        self._lock = asyncio.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def import_legacy(self, path: Path):
+        """Adopt a single pre-segment log file as the oldest segment"""
+        target = self.directory / "0000-legacy.log"
+        if path.exists() and not target.exists():
+            path.rename(target)
+            logger.info(f"Moved {path} into {self.directory}")
+
+    async def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        for path in sorted(self.directory.glob("*.log")):
+            segment = None
+            try:
+                meta = json.loads(path.with_suffix(".meta.json").read_text())
+                segment = Segment.from_meta(path, meta)
+            except (OSError, ValueError, KeyError):
+                pass
+            if segment is None or segment.size != path.stat().st_size:
+                segment = await self._rebuild(path)
+            self.segments.append(segment)
+
+    async def _rebuild(self, path: Path) -> Segment:
+        segment = Segment(path)
+        async with aiofiles.open(path, "r") as f:
+            async for line in f:
+                size = len(line.encode())
+                try:
+                    timestamp = datetime.fromisoformat(json.loads(line)["timestamp"])
+                except (ValueError, KeyError, TypeError):
+                    segment.size += size
+                    continue
+                segment.add(timestamp, size)
+        self._save_meta(segment)
+        return segment
+
+    def _save_meta(self, segment: Segment):
+        tmp = segment.meta_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(segment.to_meta()))
+        tmp.replace(segment.meta_path)
+        self._unsaved = 0
+
+    def _segment_for(self, timestamp: datetime, size: int) -> Segment:
+        day = timestamp.strftime("%Y-%m-%d")
+        current = self.segments[-1] if self.segments else None
+        if current is not None and current.path.name[:10] > day:
+            # Late record for an earlier day; the sidecar range covers it
+            return current
+        if current is not None and current.path.name.startswith(day + "-"):
+            if current.size + size <= self.max_segment_bytes or current.count == 0:
+                return current
+            index = int(current.path.stem.rsplit("-", 1)[1]) + 1
+        else:
+            index = 0
+        if current is not None and self._unsaved:
+            self._save_meta(current)
+        segment = Segment(self.directory / f"{day}-{index:03d}.log")
+        self.segments.append(segment)
+        return segment
+
+    async def append(self, record: Dict):
+        """Append a record; ``record["timestamp"]`` must be an ISO timestamp"""
+        line = json.dumps(record) + "\n"
+        size = len(line.encode())
+        timestamp = datetime.fromisoformat(record["timestamp"])
+        async with self._lock:
+            await self._load()
+            segment = self._segment_for(timestamp, size)
+            self.writer.write(segment.path, line)
+            segment.add(timestamp, size)
+            self._unsaved += 1
+            if self._unsaved >= self.meta_interval:
+                self._save_meta(segment)
+
+    async def flush(self):
+        """Write queued records and the sidecar of the current segment"""
+        await self.writer.flush()
+        async with self._lock:
+            if self.segments and self._unsaved:
+                self._save_meta(self.segments[-1])
+
+    async def read(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> AsyncIterator[Dict]:
+        """Yield the records with ``start <= timestamp <= end``
+
+        Segments outside the range are not opened; records of segments
+        lying completely inside it are yielded without checking their
+        timestamps.
+        """
+        await self._load()
+        await self.writer.flush()
+        for segment in list(self.segments):
+            if not segment.overlaps(start, end):
+                continue
+            check = not segment.within(start, end)
+            async with aiofiles.open(segment.path, "r") as f:
+                async for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if check:
+                        timestamp = datetime.fromisoformat(record["timestamp"])
+                        if (start is not None and timestamp < start) or \
+                                (end is not None and timestamp > end):
+                            continue
+                    yield record
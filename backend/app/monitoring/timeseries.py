@@ -0,0 +1,179 @@
+from typing import Callable, Dict, List, Optional
+import math
+import time
+from array import array
+
+class TimeSeries:
+    """Ring of fixed-width time buckets holding count, sum, min and max.
+
+    ``add()`` is O(1); ``summary()`` and ``history()`` are O(buckets) in
+    the queried range. Each bucket records which interval it holds, so
+    buckets from an earlier pass round the ring are ignored without being
+    cleared. All columns are flat arrays: about 36 bytes per bucket, e.g.
+    13 KB for an hour at 10 second resolution.
+
+    The current bucket is accumulated in plain attributes and written to
+    the arrays when the next bucket starts or the series is read, which
+    keeps ``add()`` cheap enough for every request.
+    """
+
+    def __init__(
+        self,
+        interval: float = 10.0,
+        buckets: int = 360,
+        clock: Callable[[], float] = time.time
+    ):
+        self.interval = interval
+        self.size = buckets
+        self.clock = clock
+        self.ids = array("q", [-1]) * buckets
+        self.counts = array("I", [0]) * buckets
+        self.sums = array("d", [0.0]) * buckets
+        self.mins = array("d", [0.0]) * buckets
+        self.maxs = array("d", [0.0]) * buckets
+        self.last: Optional[float] = None
+        # The bucket currently being filled
+        self._bucket = -1
+        self._count = 0
+        self._sum = 0.0
+        self._min = math.inf
+        self._max = -math.inf
+
+    def add(self, value: float, timestamp: Optional[float] = None):
+        bucket = int((self.clock() if timestamp is None else timestamp) // self.interval)
+        if bucket != self._bucket:
+            if bucket < self._bucket:
+                self._add_late(bucket, value)
+                return
+            self._seal()
+            self._bucket = bucket
+            self._count = 0
+            self._sum = 0.0
+            self._min = math.inf
+            self._max = -math.inf
+        self._count += 1
+        self._sum += value
+        if value < self._min:
+            self._min = value
+        if value > self._max:
+            self._max = value
+        self.last = value
+
+    def _seal(self):
+        """Write the current bucket to the arrays"""
+        if self._count:
+            index = self._bucket % self.size
+            self.ids[index] = self._bucket
+            self.counts[index] = self._count
+            self.sums[index] = self._sum
+            self.mins[index] = self._min
+            self.maxs[index] = self._max
+
+    def _add_late(self, bucket: int, value: float):
+        # A sample for an earlier bucket, e.g. after a clock step
+        if bucket <= self._bucket - self.size:
+            return
+        index = bucket % self.size
+        if self.ids[index] != bucket:
+            self.ids[index] = bucket
+            self.counts[index] = 1
+            self.sums[index] = value
+            self.mins[index] = value
+            self.maxs[index] = value
+        else:
+            self.counts[index] += 1
+            self.sums[index] += value
+            self.mins[index] = min(self.mins[index], value)
+            self.maxs[index] = max(self.maxs[index], value)
+
+    def _buckets(self, first: int, last: int):
+        """Indexes of the filled buckets from ``first`` to ``last``"""
+        self._seal()
+        for bucket in range(max(first, last - self.size + 1), last + 1):
+            index = bucket % self.size
+            if self.ids[index] == bucket:
+                yield bucket, index
+
+    def summary(self, window: float) -> Dict:
+        """Count, sum, mean, min and max over the last ``window`` seconds
+
+        Covers whole buckets: the current one and as many before it as
+        make up ``window``.
+        """
+        last = int(self.clock() // self.interval)
+        first = last - math.ceil(window / self.interval) + 1
+        count, total = 0, 0.0
+        low, high = math.inf, -math.inf
+        for _, index in self._buckets(first, last):
+            count += self.counts[index]
+            total += self.sums[index]
+            low = min(low, self.mins[index])
+            high = max(high, self.maxs[index])
+        return {
+            "count": count,
+            "sum": total,
+            "mean": total / count if count else 0,
+            "min": low if count else 0,
+            "max": high if count else 0
+        }
+
+    def history(self, start: float, end: float, points: int) -> List[Dict]:
+        """Downsample [start, end) into ``points`` equal intervals"""
+        step = (end - start) / points
+        counts = [0] * points
+        sums = [0.0] * points
+        mins = [math.inf] * points
+        maxs = [-math.inf] * points
+        first = int(start // self.interval)
+        last = math.ceil(end / self.interval) - 1
+        for bucket, index in self._buckets(first, last):
+            # A bucket counts towards the point its start falls in
+            point = min(max(int((bucket * self.interval - start) // step), 0), points - 1)
+            counts[point] += self.counts[index]
+            sums[point] += self.sums[index]
+            mins[point] = min(mins[point], self.mins[index])
+            maxs[point] = max(maxs[point], self.maxs[index])
+        return [
+            {
+                "count": counts[i],
+                "mean": sums[i] / counts[i] if counts[i] else 0,
+                "min": mins[i] if counts[i] else 0,
+                "max": maxs[i] if counts[i] else 0
+            }
+            for i in range(points)
+        ]
+
+def merge_summaries(summaries: List[Dict]) -> Dict:
+    """Combine ``TimeSeries.summary()`` results of several series"""
+    counted = [summary for summary in summaries if summary["count"]]
+    count = sum(summary["count"] for summary in counted)
+    total = sum(summary["sum"] for summary in counted)
+    return {
+        "count": count,
+        "sum": total,
+        "mean": total / count if count else 0,
+        "min": min((summary["min"] for summary in counted), default=0),
+        "max": max((summary["max"] for summary in counted), default=0)
+    }
+
+class SampleRing:
+    """The last ``size`` raw samples with timestamps, for percentiles"""
+
+    def __init__(self, size: int = 256, clock: Callable[[], float] = time.time):
+        self.size = size
+        self.clock = clock
+        self.times = array("d", [-math.inf]) * size
+        self.values = array("d", [0.0]) * size
+        self.position = 0
+
+    def add(self, value: float, timestamp: Optional[float] = None):
+        index = self.position % self.size
+        self.times[index] = self.clock() if timestamp is None else timestamp
+        self.values[index] = value
+        self.position += 1
+
+    def since(self, cutoff: float) -> List[float]:
+        return [
+            value for t, value in zip(self.times, self.values)
+            if t > cutoff
+        ]
@@ -0,0 +1,82 @@
+from typing import Dict, List, Optional, Tuple
+import logging
+import json
+import sqlite3
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+class UserIndex:
+    """SQLite table of events by (user_id, timestamp) for journey lookups.
+
+    Rows are collected in memory and inserted in one transaction once
+    ``batch_size`` have accumulated, before a lookup, or on ``commit()``.
+    The table is derived from the event segments: ``indexed_through()``
+    tells the caller from which timestamp on to replay after a crash.
+    """
+
+    def __init__(self, path: Path, batch_size: int = 500):
+        self.path = path
+        self.batch_size = batch_size
+        self._pending: List[Tuple[str, str, str, str]] = []
+        self._db = sqlite3.connect(str(path))
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS journey ("
+            "user_id TEXT NOT NULL, timestamp TEXT NOT NULL, "
+            "event_type TEXT NOT NULL, properties TEXT NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS journey_user_time "
+            "ON journey (user_id, timestamp)"
+        )
+        self._db.commit()
+
+    def add(self, event: Dict):
+        if not event["user_id"]:
+            return
+        self._pending.append((
+            event["user_id"],
+            event["timestamp"],
+            event["event_type"],
+            json.dumps(event["properties"])
+        ))
+        if len(self._pending) >= self.batch_size:
+            self.commit()
+
+    def commit(self):
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        with self._db:
+            self._db.executemany("INSERT INTO journey VALUES (?, ?, ?, ?)", rows)
+
+    def indexed_through(self) -> Optional[str]:
+        self.commit()
+        return self._db.execute("SELECT MAX(timestamp) FROM journey").fetchone()[0]
+
+    def journey(
+        self,
+        user_id: str,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[Dict]:
+        """Events of one user, oldest first"""
+        self.commit()
+        rows = self._db.execute(
+            "SELECT timestamp, event_type, properties FROM journey "
+            "WHERE user_id = ? ORDER BY timestamp LIMIT ? OFFSET ?",
+            (user_id, -1 if limit is None else limit, offset)
+        )
+        return [
+            {
+                "timestamp": timestamp,
+                "event_type": event_type,
+                "properties": json.loads(properties)
+            }
+            for timestamp, event_type, properties in rows
+        ]
+
+    def close(self):
+        self.commit()
+        self._db.close()
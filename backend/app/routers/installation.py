@@ -1,15 +1,25 @@
 from fastapi import APIRouter, WebSocket, HTTPException, Depends
 from typing import List, Optional
 from pydantic import BaseModel
+from dataclasses import asdict
 from datetime import datetime
 import logging
 from ..hardware.installation_manager import InstallationManager, InstallationStatus
 from ..hardware.board_manager import Board
-from ..core.websocket import WebSocketManager
+from ..core.websocket import (
+    BOARDS_TOPIC,
+    GLOBAL_TOPIC,
+    WebSocketManager,
+    get_websocket_manager,
+    installation_topic
+)
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Final installation states, also announced on the global feed
+FINISHED_STATES = {"completed", "failed", "cancelled"}
+
 class InstallationRequest(BaseModel):
     board: Board
     config: dict
@@ -25,6 +35,7 @@ class InstallationStatusResponse(BaseModel):
     start_time: datetime
     end_time: Optional[datetime]
     error: Optional[str]
+    eta_seconds: Optional[float] = None
 
 @router.post("/installation/start")
 async def start_installation(
@@ -75,7 +86,8 @@ async def get_installation_status(
         message=status.message,
         start_time=status.start_time,
         end_time=status.end_time,
-        error=status.error
+        error=status.error,
+        eta_seconds=status.eta_seconds
     )
 
 @router.post("/installation/{installation_id}/cancel")
@@ -94,6 +106,22 @@ async def cancel_installation(
         
     return {"status": "cancelled"}
 
+@router.post("/installation/{installation_id}/resume")
+async def resume_installation(
+    installation_id: str,
+    installation_manager: InstallationManager = Depends()
+) -> InstallationResponse:
+    """Resume a failed or interrupted installation"""
+    success = await installation_manager.resume_installation(installation_id)
+
+    if not success:
+        raise HTTPException(
+            status_code=400,
+            detail="Installation cannot be resumed"
+        )
+
+    return InstallationResponse(installation_id=installation_id)
+
 @router.get("/installation/active")
 async def get_active_installations(
     installation_manager: InstallationManager = Depends()
@@ -108,58 +136,139 @@ async def get_active_installations(
             message=status.message,
             start_time=status.start_time,
             end_time=status.end_time,
-            error=status.error
+            error=status.error,
+            eta_seconds=status.eta_seconds
         )
         for status in statuses
     ]
 
+def _status_message(status: InstallationStatus) -> dict:
+    return {
+        "type": "status_update",
+        "installation_id": status.id,
+        "status": status.status,
+        "progress": status.progress,
+        "message": status.message,
+        "error": status.error,
+        "eta_seconds": status.eta_seconds
+    }
+
+def publish_status(status: InstallationStatus):
+    """Publish a status update to the subscribers of its installation
+
+    Finished installations are also announced on the global feed.
+    """
+    websocket_manager = get_websocket_manager()
+    message = _status_message(status)
+    websocket_manager.publish(
+        installation_topic(status.id),
+        message,
+        key=f"status:{status.id}"
+    )
+    if status.status in FINISHED_STATES:
+        websocket_manager.publish(GLOBAL_TOPIC, message)
+
+def publish_board_event(event: str, board: Board):
+    """Publish a board being connected or disconnected"""
+    get_websocket_manager().publish(BOARDS_TOPIC, {
+        "type": "board_event",
+        "event": event,
+        "board": asdict(board)
+    })
+
+def _send_snapshot(
+    websocket_manager: WebSocketManager,
+    installation_manager: InstallationManager,
+    websocket: WebSocket,
+    installation_id: str
+):
+    """Send the current status of an installation as a compact snapshot"""
+    status = installation_manager.get_status(installation_id)
+    if status:
+        topic = installation_topic(installation_id)
+        websocket_manager.send(websocket, {
+            **_status_message(status),
+            "topic": topic,
+            "seq": websocket_manager.topic_seq(topic)
+        })
+
+def _subscribe(
+    websocket_manager: WebSocketManager,
+    installation_manager: InstallationManager,
+    websocket: WebSocket,
+    topic: str,
+    last_seq: Optional[int]
+) -> bool:
+    """Subscribe a client and catch it up from its last sequence number"""
+    if not websocket_manager.subscribe(websocket, topic):
+        return False
+    if isinstance(last_seq, int) and websocket_manager.resume(websocket, topic, last_seq):
+        return True
+    if topic.startswith("installation:"):
+        _send_snapshot(
+            websocket_manager,
+            installation_manager,
+            websocket,
+            topic[len("installation:"):]
+        )
+    return True
+
 @router.websocket("/ws/installation/{installation_id}")
 async def installation_websocket(
     websocket: WebSocket,
     installation_id: str,
+    last_seq: Optional[int] = None,
     installation_manager: InstallationManager = Depends(),
-    websocket_manager: WebSocketManager = Depends()
+    websocket_manager: WebSocketManager = Depends(get_websocket_manager)
 ):
-    """WebSocket endpoint for installation status updates"""
+    """WebSocket endpoint for installation status updates.
+
+    The client is subscribed to its installation; further topics (other
+    installations, "boards" or "global") can be added with
+    ``{"type": "subscribe", "topic": ...}`` messages. Every message carries
+    its topic and sequence number. A reconnecting client passes
+    ``last_seq`` (query parameter, or in the subscribe message) and only
+    gets what it missed, or a snapshot if that is no longer buffered.
+    """
+    # One shared callback publishes every update to its topic
+    installation_manager.register_status_callback(publish_status)
+    installation_manager.board_manager.register_board_callback(publish_board_event)
     await websocket_manager.connect(websocket)
-    
+
     try:
-        def status_callback(status: InstallationStatus):
-            """Callback for installation status updates"""
-            websocket_manager.broadcast({
-                "type": "status_update",
-                "installation_id": status.id,
-                "status": status.status,
-                "progress": status.progress,
-                "message": status.message,
-                "error": status.error
-            })
-        
-        # Register callback
-        installation_manager.register_status_callback(status_callback)
-        
-        # Send initial status
-        status = installation_manager.get_status(installation_id)
-        if status:
-            await websocket.send_json({
-                "type": "status_update",
-                "installation_id": status.id,
-                "status": status.status,
-                "progress": status.progress,
-                "message": status.message,
-                "error": status.error
-            })
-        
+        _subscribe(
+            websocket_manager,
+            installation_manager,
+            websocket,
+            installation_topic(installation_id),
+            last_seq
+        )
+
         # Keep connection alive and handle messages
         while True:
             data = await websocket.receive_json()
-            
-            if data.get("type") == "ping":
-                await websocket.send_json({"type": "pong"})
-    
+            message_type = data.get("type")
+
+            if message_type == "ping":
+                websocket_manager.send(websocket, {"type": "pong"})
+            elif message_type == "subscribe":
+                topic = data.get("topic", "")
+                if not _subscribe(
+                    websocket_manager,
+                    installation_manager,
+                    websocket,
+                    topic,
+                    data.get("last_seq")
+                ):
+                    websocket_manager.send(websocket, {
+                        "type": "error",
+                        "message": f"Unknown topic: {topic}"
+                    })
+            elif message_type == "unsubscribe":
+                websocket_manager.unsubscribe(websocket, data.get("topic", ""))
+
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
-    
+
     finally:
-        installation_manager.status_callbacks.remove(status_callback)
-        await websocket_manager.disconnect(websocket)
+        websocket_manager.disconnect(websocket)
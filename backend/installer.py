@@ -1,14 +1,19 @@
 """Klipper Installer Modul"""
 import os
-import asyncio
+import hashlib
 import logging
+from datetime import datetime
 from typing import Dict, Optional, List
 from pathlib import Path
 
+from .app.core.process_runner import ResourceClass, process_runner
 from .board_detector import BoardDetector
 from .websocket_manager import WebSocketManager
 from .firmware_config import PRINTER_CONFIGS
 
+# Hash der aufgelösten .config des letzten erfolgreichen Builds
+BUILD_STAMP = ".config.build_hash"
+
 class KlipperInstaller:
     """Klasse für die Installation und Konfiguration von Klipper"""
 
@@ -16,6 +21,7 @@ class KlipperInstaller:
         self.ws_manager = websocket_manager
         self.board_detector = BoardDetector()
         self.current_step = ""
+        self.installation_id = f"install_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         self.install_path = Path.home() / "klipper"
         self.config_path = Path.home() / "printer_data" / "config"
         
@@ -32,19 +38,23 @@ class KlipperInstaller:
             "error": error
         })
 
-    async def run_command(self, command: List[str], cwd: str = None) -> bool:
+    async def run_command(
+        self,
+        command: List[str],
+        cwd: str = None,
+        resource: ResourceClass = ResourceClass.IO
+    ) -> bool:
         """Führt einen Shell-Befehl aus und gibt das Ergebnis zurück"""
         try:
-            process = await asyncio.create_subprocess_exec(
-                *command,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=cwd
+            result = await process_runner.run(
+                command,
+                resource,
+                cwd=cwd,
+                installation_id=self.installation_id
             )
-            stdout, stderr = await process.communicate()
             
-            if process.returncode != 0:
-                error_msg = stderr.decode() if stderr else "Unbekannter Fehler"
+            if result.returncode != 0:
+                error_msg = result.output or "Unbekannter Fehler"
                 self.logger.error(f"Befehl fehlgeschlagen: {error_msg}")
                 return False
                 
@@ -53,6 +63,12 @@ class KlipperInstaller:
             self.logger.error(f"Fehler beim Ausführen des Befehls: {str(e)}")
             return False
 
+    def _release_usage(self):
+        """Ressourcenverbrauch des Schritts protokollieren und freigeben"""
+        usage = process_runner.release(self.installation_id)
+        if usage:
+            self.logger.info(f"Ressourcenverbrauch ({self.current_step}): {usage}")
+
     async def compile_firmware(self, printer_model: str, board_config: Optional[Dict] = None) -> bool:
         """Kompiliert die Firmware für das spezifische Board"""
         self.current_step = "firmware"
@@ -65,19 +81,37 @@ class KlipperInstaller:
                     raise ValueError(f"Keine Konfiguration für {printer_model} gefunden")
                 board_config = PRINTER_CONFIGS[printer_model]
 
+            # .config deterministisch schreiben und mit olddefconfig auflösen
+            config_file = self.install_path / ".config"
+            config_file.write_text(self._render_kconfig(board_config["compiler_flags"]))
+            if not await self.run_command(["make", "olddefconfig"], str(self.install_path), ResourceClass.CPU):
+                raise RuntimeError("make olddefconfig fehlgeschlagen")
+
+            # Unveränderte Konfiguration und Quellen: vorhandene Firmware wiederverwenden
+            config_hash = hashlib.sha256(
+                config_file.read_bytes() + self._source_revision().encode()
+            ).hexdigest()
+            stamp_file = self.install_path / BUILD_STAMP
+            firmware_file = self.install_path / "out" / "klipper.bin"
+            if (
+                firmware_file.exists()
+                and stamp_file.exists()
+                and stamp_file.read_text().strip() == config_hash
+            ):
+                self.logger.info("Konfiguration unverändert, überspringe Kompilierung")
+                await self.send_status("Firmware ist aktuell", 60)
+                return True
+
             # make clean
-            if not await self.run_command(["make", "clean"], str(self.install_path)):
+            stamp_file.unlink(missing_ok=True)
+            if not await self.run_command(["make", "clean"], str(self.install_path), ResourceClass.CPU):
                 raise RuntimeError("make clean fehlgeschlagen")
 
-            # menuconfig generieren
-            config_commands = [f"{flag}=y" for flag in board_config["compiler_flags"]]
-            if not await self.run_command(["make", "menuconfig"] + config_commands, str(self.install_path)):
-                raise RuntimeError("make menuconfig fehlgeschlagen")
-
             # Firmware kompilieren
-            if not await self.run_command(["make"], str(self.install_path)):
+            if not await self.run_command(["make"], str(self.install_path), ResourceClass.CPU):
                 raise RuntimeError("make fehlgeschlagen")
 
+            stamp_file.write_text(config_hash)
             await self.send_status("Firmware erfolgreich kompiliert", 60)
             return True
 
@@ -86,6 +120,33 @@ class KlipperInstaller:
             self.logger.error(error_msg)
             await self.send_status("Kompilierung fehlgeschlagen", 50, error_msg)
             return False
+        finally:
+            self._release_usage()
+
+    @staticmethod
+    def _render_kconfig(compiler_flags: List[str]) -> str:
+        """Erzeugt den Inhalt der .config aus den Compiler-Flags"""
+        lines = []
+        for flag in compiler_flags:
+            lines.append(flag if "=" in flag else f"{flag}=y")
+        return "\n".join(lines) + "\n"
+
+    def _source_revision(self) -> str:
+        """Liefert den ausgecheckten Commit des Klipper-Repositorys"""
+        git_dir = self.install_path / ".git"
+        try:
+            head = (git_dir / "HEAD").read_text().strip()
+            if not head.startswith("ref: "):
+                return head
+            ref = head[5:]
+            if (git_dir / ref).exists():
+                return (git_dir / ref).read_text().strip()
+            for line in (git_dir / "packed-refs").read_text().splitlines():
+                if line.endswith(f" {ref}"):
+                    return line.split()[0]
+        except OSError as e:
+            self.logger.warning(f"Klipper-Revision nicht lesbar: {str(e)}")
+        return ""
 
     async def flash_firmware(self, printer_model: str, board_config: Optional[Dict] = None) -> bool:
         """Flasht die kompilierte Firmware auf das Board"""
@@ -110,7 +171,7 @@ class KlipperInstaller:
                     "dfu-util", "-d", f"{board_info['vid']}:{board_info['pid']}",
                     "-a", "0", "-s", "0x08000000:leave",
                     "-D", str(self.install_path / "out" / "klipper.bin")
-                ]):
+                ], resource=ResourceClass.USB):
                     raise RuntimeError("dfu-util fehlgeschlagen")
             else:
                 # Serieller Port
@@ -119,7 +180,7 @@ class KlipperInstaller:
                     str(self.install_path / "out" / "klipper.bin"),
                     "-v", "-S", "0x8008000",
                     board_info["port"]
-                ]):
+                ], resource=ResourceClass.USB):
                     raise RuntimeError("stm32flash fehlgeschlagen")
 
             await self.send_status("Firmware erfolgreich geflasht", 80)
@@ -130,3 +191,5 @@ class KlipperInstaller:
             self.logger.error(error_msg)
             await self.send_status("Flash fehlgeschlagen", 70, error_msg)
             return False
+        finally:
+            self._release_usage()
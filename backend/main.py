@@ -9,6 +9,7 @@ import logging
 from .installer import KlipperInstaller
 from .websocket_manager import WebSocketManager
 from .firmware_config import PRINTER_CONFIGS
+from .app.monitoring.middleware import RequestTimingMiddleware
 import serial.tools.list_ports
 
 # Logging konfigurieren
@@ -30,13 +31,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Antwortzeiten je Routen-Template erfassen
+app.add_middleware(RequestTimingMiddleware)
+
 # Statische Dateien
 app.mount("/static", StaticFiles(directory="../frontend/dist"), name="static")
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket-Endpunkt für Live-Updates"""
-    await ws_manager.connect(websocket)
+    """WebSocket-Endpunkt für Live-Updates
+
+    Wiederverbindende Clients übergeben ``?last_seq=<n>`` und erhalten nur
+    die verpassten Deltas.
+    """
+    last_seq = websocket.query_params.get("last_seq")
+    await ws_manager.connect(
+        websocket,
+        int(last_seq) if last_seq and last_seq.isdigit() else None
+    )
     try:
         while True:
             data = await websocket.receive_text()
@@ -28,6 +28,20 @@ def test_detect_boards(board_manager, mock_serial):
     assert board.board_type == 'BTT Octopus'
     assert board.serial_number == 'TEST123'
 
+def test_detect_boards_reports_changes(board_manager, mock_serial):
+    events = []
+    board_manager.register_board_callback(
+        lambda event, board: events.append((event, board.port))
+    )
+
+    board_manager.detect_boards()
+    board_manager.detect_boards()
+    assert events == [('connected', 'COM1')]
+
+    mock_serial.return_value = []
+    board_manager.detect_boards()
+    assert events == [('connected', 'COM1'), ('disconnected', 'COM1')]
+
 @pytest.mark.asyncio
 async def test_test_connection(board_manager):
     with patch('serial.Serial') as mock_serial:
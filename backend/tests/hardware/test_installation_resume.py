@@ -0,0 +1,67 @@
+import pytest
+import asyncio
+from unittest.mock import AsyncMock, Mock
+from backend.app.hardware.board_manager import Board
+from backend.app.hardware.installation_manager import InstallationManager
+
+@pytest.fixture
+def firmware_path(tmp_path):
+    path = tmp_path / "klipper.bin"
+    path.write_bytes(b"\x00" * 2048)
+    return path
+
+@pytest.fixture
+def board():
+    return Board(
+        port='COM1',
+        vid=0x1D50,
+        pid=0x6029,
+        serial_number='TEST123',
+        manufacturer='BTT',
+        description='BTT Octopus',
+        board_type='BTT Octopus'
+    )
+
+@pytest.fixture
+def installation_manager(tmp_path, firmware_path):
+    board_manager = Mock()
+    board_manager.get_board_config.return_value = {"mcu": "stm32f446", "flash_method": "dfu"}
+    board_manager.prepare_for_update = AsyncMock(return_value=True)
+    board_manager.flash_firmware = AsyncMock(side_effect=[False, True])
+
+    firmware_manager = Mock()
+    firmware_manager.firmware_dir = tmp_path
+    firmware_manager.get_cached_firmware.return_value = None
+    firmware_manager.download_firmware = AsyncMock(return_value=tmp_path)
+    firmware_manager.build_firmware = AsyncMock(return_value=firmware_path)
+    firmware_manager.verify_firmware = AsyncMock(return_value=True)
+
+    return InstallationManager(board_manager, firmware_manager, tmp_path)
+
+@pytest.mark.asyncio
+async def test_resume_skips_completed_stages(installation_manager, board):
+    installation_id = await installation_manager.start_installation(board, {}, "master")
+    await asyncio.sleep(0.1)
+    assert installation_manager.get_status(installation_id).status == "failed"
+
+    assert await installation_manager.resume_installation(installation_id) is True
+    await asyncio.sleep(0.1)
+
+    assert installation_manager.get_status(installation_id).status == "completed"
+    assert installation_manager.firmware_manager.build_firmware.await_count == 1
+    assert installation_manager.board_manager.flash_firmware.await_count == 2
+
+@pytest.mark.asyncio
+async def test_resume_rebuilds_modified_artifact(installation_manager, board, firmware_path):
+    installation_id = await installation_manager.start_installation(board, {}, "master")
+    await asyncio.sleep(0.1)
+
+    firmware_path.write_bytes(b"\x01" * 2048)
+    assert await installation_manager.resume_installation(installation_id) is True
+    await asyncio.sleep(0.1)
+
+    assert installation_manager.firmware_manager.build_firmware.await_count == 2
+
+@pytest.mark.asyncio
+async def test_resume_unknown_installation(installation_manager):
+    assert await installation_manager.resume_installation("install_unknown") is False
@@ -0,0 +1,43 @@
+import pytest
+from backend.app.hardware.stage_estimator import StageEstimator, DEFAULT_STAGE_DURATIONS
+
+STAGES = ["downloading", "building", "flashing"]
+
+@pytest.fixture
+def estimator(tmp_path):
+    return StageEstimator(tmp_path / "stage_durations.json", alpha=0.5)
+
+@pytest.fixture
+def key():
+    return StageEstimator.make_key("BTT Octopus", "stm32f446", "master", "dfu", False)
+
+def test_defaults_without_history(estimator, key):
+    assert estimator.estimate(key, "building") == DEFAULT_STAGE_DURATIONS["building"]
+
+def test_ewma_update(estimator, key):
+    estimator.record(key, "building", 100)
+    estimator.record(key, "building", 200)
+    assert estimator.estimate(key, "building") == 150
+
+def test_fallback_to_other_version(estimator, key):
+    estimator.record(key, "flashing", 12)
+    other = StageEstimator.make_key("BTT Octopus", "stm32f446", "v0.12.0", "dfu", False)
+    assert estimator.estimate(other, "flashing") == 12
+
+def test_persistence(tmp_path, key):
+    path = tmp_path / "stage_durations.json"
+    StageEstimator(path).record(key, "downloading", 42)
+    assert StageEstimator(path).estimate(key, "downloading") == 42
+
+def test_eta_and_progress(estimator, key):
+    for stage, duration in [("downloading", 10), ("building", 80), ("flashing", 10)]:
+        estimator.record(key, stage, duration)
+
+    remaining, progress = estimator.eta(key, STAGES, "building", 40)
+    assert remaining == 50
+    assert progress == 50
+
+    # Overrunning stages never report completion
+    remaining, progress = estimator.eta(key, STAGES, "flashing", 60)
+    assert remaining == 0
+    assert progress < 100
@@ -0,0 +1,139 @@
+import pytest
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+from backend.app.monitoring.analytics import UserAnalytics
+
+@pytest.mark.asyncio
+async def test_stats_come_from_rollups(tmp_path):
+    analytics = UserAnalytics(tmp_path)
+    await analytics.track_event("page_view", "u1")
+    await analytics.track_event("page_view", "u2")
+    await analytics.track_event("install_started", "u1")
+    await analytics.track_session("u1", "s1", "start")
+    await analytics.track_session("u1", "s1", "end")
+    await analytics.track_session("u2", "s2", "start")
+
+    # Raw records are no longer read once the rollups are loaded
+    for path in (tmp_path / "events").glob("*.log"):
+        path.unlink()
+
+    stats = await analytics.get_event_stats()
+    assert stats["total_events"] == 3
+    assert stats["event_types"] == {"page_view": 2, "install_started": 1}
+    assert stats["unique_users"] == 2
+    assert sum(stats["hourly_distribution"].values()) == 3
+
+    sessions = await analytics.get_session_stats()
+    assert sessions["total_sessions"] == 2
+    assert sessions["unique_users"] == 2
+    assert sessions["bounce_rate"] == 0.5
+    assert sessions["avg_session_duration"] >= 0
+
+@pytest.mark.asyncio
+async def test_old_buckets_are_outside_the_window(tmp_path):
+    analytics = UserAnalytics(tmp_path)
+    await analytics.track_event("page_view", "u1")
+    old = (datetime.utcnow() - timedelta(days=30)).isoformat()
+    analytics.rollups.add_event({"timestamp": old, "event_type": "old", "user_id": "u9"})
+
+    stats = await analytics.get_event_stats()
+    assert stats["event_types"] == {"page_view": 1}
+    stats = await analytics.get_event_stats(timedelta(days=60))
+    assert stats["total_events"] == 2
+
+@pytest.mark.asyncio
+async def test_records_after_checkpoint_are_replayed(tmp_path):
+    analytics = UserAnalytics(tmp_path)
+    await analytics.track_event("page_view", "u1")
+    await analytics.flush()
+    checkpoint = json.loads((tmp_path / "rollups.json").read_text())
+    assert checkpoint["events_through"]
+
+    # Written after the checkpoint, then the process dies
+    await analytics.track_event("install_started", "u2")
+    await analytics.events.flush()
+    analytics.rollups.close()
+
+    restarted = UserAnalytics(tmp_path)
+    stats = await restarted.get_event_stats()
+    assert stats["total_events"] == 2
+    assert stats["event_types"] == {"page_view": 1, "install_started": 1}
+
+@pytest.mark.asyncio
+async def test_rollups_are_built_from_existing_segments(tmp_path):
+    analytics = UserAnalytics(tmp_path)
+    record = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "event_type": "page_view",
+        "user_id": "u1",
+        "properties": {}
+    }
+    await analytics.events.append(record)
+    await analytics.writer.flush()
+
+    stats = await UserAnalytics(tmp_path).get_event_stats()
+    assert stats["total_events"] == 1
+
+@pytest.mark.asyncio
+async def test_buckets_beyond_retention_are_pruned(tmp_path):
+    analytics = UserAnalytics(tmp_path, retention=timedelta(days=7))
+    await analytics.track_event("page_view", "u1")
+    await analytics.track_session("u1", "s1", "start")
+    old = (datetime.utcnow() - timedelta(days=8)).isoformat()
+    analytics.rollups.add_event({"timestamp": old, "event_type": "old", "user_id": "u9"})
+    analytics.rollups.add_session({"timestamp": old, "session_id": "s9", "user_id": "u9"})
+    await analytics.flush()
+
+    assert len(analytics.rollups.events) == 1
+    assert len(analytics.rollups.sessions) == 1
+    checkpoint = json.loads((tmp_path / "rollups.json").read_text())
+    assert old[:13] not in checkpoint["events"]
+    await analytics.close()
+
+@pytest.mark.asyncio
+async def test_workers_merge_their_checkpoints(tmp_path):
+    first, second = UserAnalytics(tmp_path), UserAnalytics(tmp_path)
+    await first.track_event("page_view", "u1")
+    await first.track_event("page_view", "u2")
+    await second.track_event("install_started", "u3")
+    await second.track_session("u3", "s3", "start")
+    await first.flush()
+    await second.flush()
+
+    checkpoint = json.loads((tmp_path / "rollups.json").read_text())
+    assert sum(bucket["total"] for bucket in checkpoint["events"].values()) == 3
+    # The later checkpoint adopted the records of the earlier one
+    stats = await second.get_event_stats()
+    assert stats["event_types"] == {"page_view": 2, "install_started": 1}
+
+    await first.track_event("page_view", "u4")
+    await first.flush()
+    stats = await first.get_event_stats()
+    assert stats["total_events"] == 4
+    assert (await first.get_session_stats())["total_sessions"] == 1
+    await first.close()
+    await second.close()
+
+@pytest.mark.asyncio
+async def test_records_are_replayed_once_by_concurrent_workers(tmp_path):
+    crashed = UserAnalytics(tmp_path)
+    await crashed.track_event("page_view", "u1")
+    await crashed.flush()
+    await crashed.track_event("page_view", "u2")
+    await crashed.events.flush()
+    crashed.rollups.close()
+
+    first, second = UserAnalytics(tmp_path), UserAnalytics(tmp_path)
+    await asyncio.gather(
+        first.track_event("install_started", "u3"),
+        second.track_event("install_started", "u4")
+    )
+    await first.flush()
+    await second.flush()
+
+    checkpoint = json.loads((tmp_path / "rollups.json").read_text())
+    assert sum(bucket["total"] for bucket in checkpoint["events"].values()) == 4
+    await first.close()
+    await second.close()
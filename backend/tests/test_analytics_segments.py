@@ -0,0 +1,102 @@
+import pytest
+import json
+from datetime import datetime, timedelta
+
+from backend.app.monitoring.analytics import UserAnalytics
+from backend.app.monitoring.segments import SegmentLog
+
+def record(timestamp: datetime, **fields):
+    return {"timestamp": timestamp.isoformat(), **fields}
+
+@pytest.mark.asyncio
+async def test_segments_roll_daily_and_by_size(tmp_path):
+    log = SegmentLog(tmp_path, max_segment_bytes=200)
+    day = datetime(2024, 3, 1, 12)
+    for i in range(5):
+        await log.append(record(day, n=i))
+    await log.append(record(day + timedelta(days=1), n=5))
+    await log.flush()
+
+    names = [segment.path.name for segment in log.segments]
+    assert names[0] == "2024-03-01-000.log"
+    assert len([n for n in names if n.startswith("2024-03-01")]) > 1
+    assert names[-1] == "2024-03-02-000.log"
+    assert sum(segment.count for segment in log.segments) == 6
+
+    meta = json.loads((tmp_path / "2024-03-02-000.meta.json").read_text())
+    assert meta["count"] == 1
+    assert meta["min_ts"] == meta["max_ts"] == (day + timedelta(days=1)).isoformat()
+
+@pytest.mark.asyncio
+async def test_read_skips_segments_outside_range(tmp_path):
+    log = SegmentLog(tmp_path)
+    start = datetime(2024, 1, 1, 6)
+    for day in range(10):
+        await log.append(record(start + timedelta(days=day), n=day))
+        await log.append(record(start + timedelta(days=day, hours=12), n=day))
+    await log.flush()
+
+    # Remove a segment outside the window: it must not be opened
+    (tmp_path / "2024-01-02-000.log").unlink()
+
+    since = start + timedelta(days=7, hours=12)
+    records = [r async for r in log.read(start=since)]
+    assert [r["n"] for r in records] == [7, 8, 8, 9, 9]
+
+@pytest.mark.asyncio
+async def test_stale_sidecar_is_rebuilt(tmp_path):
+    log = SegmentLog(tmp_path, meta_interval=1000)
+    now = datetime(2024, 5, 5, 8)
+    await log.append(record(now, n=0))
+    await log.flush()
+    await log.append(record(now + timedelta(hours=1), n=1))
+    # Record written, but the sidecar still describes one record
+    await log.writer.flush()
+
+    reopened = SegmentLog(tmp_path)
+    records = [r async for r in reopened.read(start=now + timedelta(minutes=30))]
+    assert [r["n"] for r in records] == [1]
+    assert reopened.segments[0].count == 2
+
+@pytest.mark.asyncio
+async def test_analytics_adopts_legacy_log(tmp_path):
+    old = datetime.utcnow() - timedelta(days=30)
+    recent = datetime.utcnow() - timedelta(hours=1)
+    with open(tmp_path / "events.log", "w") as f:
+        for timestamp in (old, recent):
+            f.write(json.dumps({
+                "timestamp": timestamp.isoformat(),
+                "event_type": "page_view",
+                "user_id": "u1",
+                "properties": {}
+            }) + "\n")
+
+    analytics = UserAnalytics(tmp_path)
+    await analytics.track_event("install_started", "u2")
+
+    stats = await analytics.get_event_stats()
+    assert stats["total_events"] == 2
+    assert stats["event_types"] == {"page_view": 1, "install_started": 1}
+    assert stats["unique_users"] == 2
+    assert not (tmp_path / "events.log").exists()
+    assert len(await analytics.get_user_journey("u1")) == 2
+
+@pytest.mark.asyncio
+async def test_client_timestamps_are_bounded(tmp_path):
+    analytics = UserAnalytics(tmp_path)
+    now = datetime.utcnow()
+    events = [
+        {"event_type": "future", "timestamp": "2099-01-01T00:00:00"},
+        {"event_type": "ancient", "timestamp": (now - timedelta(days=365)).isoformat()},
+        {"event_type": "page_view", "timestamp": (now - timedelta(hours=1)).isoformat()}
+    ]
+    assert await analytics.track_events(events) == 2
+    await analytics.track_event("page_view", "u1")
+    await analytics.flush()
+
+    today = datetime.utcnow().strftime("%Y-%m-%d")
+    assert all(s.path.name[:10] <= today for s in analytics.events.segments)
+    assert analytics.rollups.events_through < "2099"
+    stats = await analytics.get_event_stats(timedelta(days=1))
+    assert stats["event_types"] == {"future": 1, "page_view": 2}
+    await analytics.close()
@@ -0,0 +1,67 @@
+import pytest
+import asyncio
+
+from backend.app.monitoring.batch_writer import BatchWriter, FsyncPolicy
+from backend.app.monitoring.error_tracking import ErrorTracker
+
+@pytest.mark.asyncio
+async def test_lines_are_written_in_batches(tmp_path):
+    writer = BatchWriter(max_batch=3, flush_interval=10.0)
+    path = tmp_path / "out.log"
+    writer.write(path, "a\n")
+    writer.write(path, "b\n")
+    await asyncio.sleep(0.01)
+    # Below max_batch and before flush_interval: nothing written yet
+    assert not path.exists()
+    assert writer.pending == 2
+
+    writer.write(path, "c\n")
+    writer.write(tmp_path / "other.log", "d\n")
+    await writer.flush()
+    assert path.read_text() == "a\nb\nc\n"
+    assert (tmp_path / "other.log").read_text() == "d\n"
+    assert writer.pending == 0
+    await writer.close()
+
+@pytest.mark.asyncio
+async def test_interval_flushes_small_batches(tmp_path):
+    writer = BatchWriter(flush_interval=0.05, fsync=FsyncPolicy.BATCH)
+    path = tmp_path / "out.log"
+    writer.write(path, "a\n")
+    await asyncio.sleep(0.2)
+    assert path.read_text() == "a\n"
+    await writer.close()
+
+@pytest.mark.asyncio
+async def test_close_writes_remaining_lines(tmp_path):
+    writer = BatchWriter(flush_interval=10.0, fsync=FsyncPolicy.NEVER)
+    path = tmp_path / "out.log"
+    for i in range(10):
+        writer.write(path, f"{i}\n")
+    await writer.close()
+    assert len(path.read_text().splitlines()) == 10
+    with pytest.raises(RuntimeError):
+        writer.write(path, "late\n")
+
+@pytest.mark.asyncio
+async def test_error_tracker_writes_through_batch_writer(tmp_path):
+    tracker = ErrorTracker(tmp_path)
+    await tracker._write_to_log([{
+        "timestamp": "2024-01-01T00:00:00",
+        "error_type": "ValueError",
+        "message": "boom",
+        "component": "installer",
+        "user_id": None
+    }])
+    errors = await tracker.get_recent_errors()
+    assert [e["message"] for e in errors] == ["boom"]
+    await tracker.writer.close()
+
+@pytest.mark.asyncio
+async def test_stop_without_processor_writes_queued_errors(tmp_path):
+    tracker = ErrorTracker(tmp_path)
+    await tracker.track_error(ValueError("boom"), "installer")
+    # Never started: stop() must not wait for a processor to drain the queue
+    await asyncio.wait_for(tracker.stop(), 1.0)
+    errors = await tracker.get_recent_errors()
+    assert [e["message"] for e in errors] == ["boom"]
@@ -0,0 +1,190 @@
+import pytest
+import asyncio
+import json
+from unittest.mock import AsyncMock
+
+from backend.app.core.websocket import (
+    BOARDS_TOPIC,
+    GLOBAL_TOPIC,
+    ClientConnection,
+    OverflowPolicy,
+    ReplayBuffer,
+    WebSocketManager,
+    installation_topic
+)
+
+class StalledWebSocket:
+    """Websocket whose sends block until released"""
+
+    def __init__(self):
+        self.sent = []
+        self.release = asyncio.Event()
+        self.close = AsyncMock()
+
+    async def send_json(self, data):
+        await self.release.wait()
+        self.sent.append(data)
+
+@pytest.mark.asyncio
+async def test_send_does_not_wait_for_client():
+    ws = StalledWebSocket()
+    client = ClientConnection(ws, max_queue=10, policy=OverflowPolicy.DROP)
+    client.start()
+
+    for i in range(5):
+        assert client.send({"i": i})
+    await asyncio.sleep(0)
+    assert client.metrics.queue_depth == 4
+
+    ws.release.set()
+    await client.drain()
+    assert [m["i"] for m in ws.sent] == [0, 1, 2, 3, 4]
+    assert client.metrics.sent == 5
+    client.close()
+
+@pytest.mark.asyncio
+async def test_drop_policy_discards_oldest():
+    ws = StalledWebSocket()
+    client = ClientConnection(ws, max_queue=3, policy=OverflowPolicy.DROP)
+
+    for i in range(5):
+        client.send({"i": i})
+
+    assert client.metrics.dropped == 2
+    ws.release.set()
+    client.start()
+    await client.drain()
+    assert [m["i"] for m in ws.sent] == [2, 3, 4]
+    client.close()
+
+@pytest.mark.asyncio
+async def test_coalesce_policy_replaces_keyed_message():
+    ws = StalledWebSocket()
+    client = ClientConnection(ws, max_queue=3, policy=OverflowPolicy.COALESCE)
+
+    client.send({"progress": 10}, key="status")
+    client.send({"log": "line"})
+    client.send({"progress": 20}, key="status")
+
+    assert client.metrics.coalesced == 1
+    ws.release.set()
+    client.start()
+    await client.drain()
+    assert ws.sent == [{"progress": 20}, {"log": "line"}]
+    client.close()
+
+@pytest.mark.asyncio
+async def test_disconnect_policy_evicts_client():
+    ws = StalledWebSocket()
+    closed = []
+    client = ClientConnection(
+        ws,
+        max_queue=2,
+        policy=OverflowPolicy.DISCONNECT,
+        on_close=closed.append
+    )
+
+    assert client.send({"i": 0})
+    assert client.send({"i": 1})
+    assert not client.send({"i": 2})
+    await asyncio.sleep(0)
+
+    assert client.closed
+    assert closed == [client]
+    ws.close.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_stalled_write_evicts_client():
+    ws = StalledWebSocket()
+    client = ClientConnection(ws, send_timeout=0.05)
+    client.start()
+
+    client.send({"i": 0})
+    await asyncio.sleep(0.1)
+
+    assert not client.send({"i": 1})
+    assert client.closed
+
+class RecordingWebSocket:
+    def __init__(self):
+        self.frames = []
+        self.accept = AsyncMock()
+        self.close = AsyncMock()
+
+    async def send_text(self, text):
+        self.frames.append(text)
+
+    async def send_json(self, data):
+        self.frames.append(data)
+
+@pytest.mark.asyncio
+async def test_publish_reaches_only_topic_subscribers():
+    manager = WebSocketManager()
+    first, second, watcher = RecordingWebSocket(), RecordingWebSocket(), RecordingWebSocket()
+    await manager.connect(first, topics=[installation_topic("a")])
+    await manager.connect(second, topics=[installation_topic("b")])
+    await manager.connect(watcher, topics=[GLOBAL_TOPIC])
+
+    assert manager.publish(installation_topic("a"), {"progress": 10}) == 1
+    for ws in (first, second, watcher):
+        await manager.clients[ws].drain()
+
+    assert [json.loads(f)["progress"] for f in first.frames] == [10]
+    assert second.frames == []
+    assert watcher.frames == []
+
+@pytest.mark.asyncio
+async def test_board_events_reach_board_subscribers():
+    manager = WebSocketManager()
+    boards, watcher = RecordingWebSocket(), RecordingWebSocket()
+    await manager.connect(boards, topics=[BOARDS_TOPIC])
+    await manager.connect(watcher, topics=[GLOBAL_TOPIC])
+
+    manager.publish(installation_topic("a"), {"progress": 10})
+    assert manager.publish(BOARDS_TOPIC, {"event": "connected"}) == 1
+    assert manager.publish(GLOBAL_TOPIC, {"status": "completed"}) == 1
+    for ws in (boards, watcher):
+        await manager.clients[ws].drain()
+
+    assert [json.loads(f)["topic"] for f in boards.frames] == [BOARDS_TOPIC]
+    assert [json.loads(f)["topic"] for f in watcher.frames] == [GLOBAL_TOPIC]
+
+@pytest.mark.asyncio
+async def test_disconnect_removes_subscriptions():
+    manager = WebSocketManager()
+    ws = RecordingWebSocket()
+    await manager.connect(ws, topics=[installation_topic("a"), BOARDS_TOPIC])
+    assert not manager.subscribe(ws, "unknown")
+
+    manager.disconnect(ws)
+
+    assert manager.topics == {}
+    assert manager.publish(installation_topic("a"), {"progress": 10}) == 0
+
+def test_replay_buffer_detects_evicted_gap():
+    buffer = ReplayBuffer(size=3)
+    start = buffer.seq
+    for i in range(5):
+        seq = buffer.next_seq()
+        buffer.append(seq, f"frame {i}")
+
+    assert buffer.since(start + 3) == ["frame 3", "frame 4"]
+    assert buffer.since(buffer.seq) == []
+    assert buffer.since(start) is None
+    assert buffer.since(buffer.seq + 1) is None
+
+@pytest.mark.asyncio
+async def test_resume_replays_topic_frames():
+    manager = WebSocketManager()
+    topic = installation_topic("a")
+    manager.publish(topic, {"progress": 10})
+    last_seq = manager.topic_seq(topic)
+    manager.publish(topic, {"progress": 20})
+
+    ws = RecordingWebSocket()
+    await manager.connect(ws, topics=[topic])
+    assert manager.resume(ws, topic, last_seq)
+    await manager.clients[ws].drain()
+
+    assert ws.frames == [f'{{"progress":20,"topic":"{topic}","seq":{last_seq + 1}}}']
+    assert not manager.resume(ws, topic, last_seq - 5)
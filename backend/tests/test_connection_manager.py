@@ -0,0 +1,109 @@
+import pytest
+import asyncio
+import json
+from unittest.mock import AsyncMock
+from prometheus_client import REGISTRY
+
+from app.websocket.connection import ConnectionManager
+from app.websocket.events import EventTypes
+
+class RecordingWebSocket:
+    def __init__(self):
+        self.frames = []
+        self.accept = AsyncMock()
+        self.close = AsyncMock()
+
+    async def send_text(self, text):
+        self.frames.append(json.loads(text))
+
+    async def send_json(self, data):
+        self.frames.append(data)
+
+    def types(self):
+        return [frame["type"] for frame in self.frames]
+
+def reaped_total() -> float:
+    return REGISTRY.get_sample_value("websocket_reaped_total") or 0.0
+
+@pytest.mark.asyncio
+async def test_reaper_evicts_silent_client_and_keeps_answering_one():
+    manager = ConnectionManager(heartbeat_interval=0.05, idle_timeout=0.2)
+    silent, answering = RecordingWebSocket(), RecordingWebSocket()
+    await manager.connect(silent)
+    await manager.connect(answering)
+    before = reaped_total()
+
+    manager.start_reaper()
+    try:
+        for _ in range(15):
+            await asyncio.sleep(0.03)
+            if EventTypes.PING.value in answering.types():
+                # Any message counts as a pong
+                manager.touch(answering)
+    finally:
+        manager.stop_reaper()
+
+    assert silent not in manager.clients
+    silent.close.assert_awaited_with(code=1001)
+    assert EventTypes.PING.value in silent.types()
+    assert answering in manager.clients
+    assert EventTypes.PING.value in answering.types()
+    assert manager.reaped_total == 1
+    assert reaped_total() == before + 1
+    manager.disconnect(answering)
+
+@pytest.mark.asyncio
+async def test_reap_pings_quiet_clients_before_evicting():
+    manager = ConnectionManager(heartbeat_interval=10, idle_timeout=30)
+    ws = RecordingWebSocket()
+    await manager.connect(ws)
+    client = manager.clients[ws]
+
+    client.last_seen -= 15
+    assert manager.reap() == 0
+    await client.drain()
+    assert ws.types() == [EventTypes.PING.value]
+
+    client.last_seen -= 20
+    assert manager.reap() == 1
+    assert ws not in manager.clients
+
+async def broadcast(manager, progress):
+    await manager.broadcast_json({
+        "type": EventTypes.INSTALLATION_STATUS.value,
+        "data": {"installation_id": "a", "progress": progress}
+    })
+
+@pytest.mark.asyncio
+async def test_reconnect_replays_missed_broadcasts():
+    manager = ConnectionManager(replay_size=10)
+    await broadcast(manager, 10)
+    last_seq = manager.replay.seq
+    await broadcast(manager, 20)
+    await broadcast(manager, 30)
+
+    ws = RecordingWebSocket()
+    await manager.connect(ws, last_seq=last_seq)
+    await manager.clients[ws].drain()
+
+    assert [frame["seq"] for frame in ws.frames] == [last_seq + 1, last_seq + 2]
+    assert [frame["data"]["progress"] for frame in ws.frames] == [20, 30]
+    manager.disconnect(ws)
+
+@pytest.mark.asyncio
+async def test_reconnect_after_eviction_gets_snapshot():
+    manager = ConnectionManager(replay_size=2)
+    manager.snapshot_provider = lambda: {"installations": {"a": {"progress": 40}}}
+    await broadcast(manager, 10)
+    last_seq = manager.replay.seq
+    for progress in (20, 30, 40):
+        await broadcast(manager, progress)
+
+    ws = RecordingWebSocket()
+    await manager.connect(ws, last_seq=last_seq)
+    await manager.clients[ws].drain()
+
+    assert ws.types() == [EventTypes.SNAPSHOT.value]
+    assert ws.frames[0]["seq"] == manager.replay.seq
+    assert ws.frames[0]["data"] == {"installations": {"a": {"progress": 40}}}
+    manager.disconnect(ws)
@@ -0,0 +1,98 @@
+import pytest
+import asyncio
+from aiohttp import web
+
+from backend.app.monitoring.error_tracking import ErrorTracker
+
+class SentryStub:
+    """Local HTTP server standing in for Sentry"""
+
+    def __init__(self, failures: int = 0, status: int = 503):
+        self.failures = failures
+        self.status = status
+        self.batches = []
+        self.attempts = 0
+        self.peers = set()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.attempts += 1
+        self.peers.add(request.transport.get_extra_info("peername"))
+        if self.failures > 0:
+            self.failures -= 1
+            return web.Response(status=self.status)
+        self.batches.append(await request.json())
+        return web.Response(status=200)
+
+    async def __aenter__(self) -> str:
+        app = web.Application()
+        app.router.add_post("/store", self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/store"
+
+    async def __aexit__(self, *exc):
+        await self.runner.cleanup()
+
+def make_errors(count: int):
+    errors = []
+    for i in range(count):
+        try:
+            raise ValueError(f"distinct {i}")
+        except ValueError as e:
+            errors.append(e)
+    return errors
+
+@pytest.mark.asyncio
+async def test_errors_are_forwarded_in_batches(tmp_path):
+    stub = SentryStub()
+    async with stub as url:
+        tracker = ErrorTracker(tmp_path, sentry_dsn=url, max_batch=50)
+        # Distinct components, so no error is folded into a group
+        for i, error in enumerate(make_errors(120)):
+            await tracker.track_error(error, f"component-{i}")
+        await tracker.start()
+        await tracker.stop()
+
+    assert sum(len(batch) for batch in stub.batches) == 120
+    assert [len(batch) for batch in stub.batches] == [50, 50, 20]
+    # One pooled connection for all batches
+    assert len(stub.peers) == 1
+    assert len((tmp_path / "errors.log").read_text().splitlines()) == 120
+
+@pytest.mark.asyncio
+async def test_failed_sends_are_retried_with_backoff(tmp_path):
+    stub = SentryStub(failures=2)
+    async with stub as url:
+        tracker = ErrorTracker(tmp_path, sentry_dsn=url, retry_backoff=0.01)
+        await tracker.start()
+        await tracker.track_error(ValueError("boom"), "installer")
+        await tracker.stop()
+
+    assert stub.attempts == 3
+    assert len(stub.batches) == 1
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried(tmp_path):
+    stub = SentryStub(failures=5, status=400)
+    async with stub as url:
+        tracker = ErrorTracker(tmp_path, sentry_dsn=url, retry_backoff=0.01)
+        await tracker.start()
+        await tracker.track_error(ValueError("boom"), "installer")
+        await tracker.stop()
+
+    assert stub.attempts == 1
+    assert stub.batches == []
+
+@pytest.mark.asyncio
+async def test_full_queue_drops_and_reports_depth(tmp_path):
+    tracker = ErrorTracker(tmp_path, max_queue=3)
+    for i, error in enumerate(make_errors(5)):
+        await tracker.track_error(error, f"component-{i}")
+
+    assert tracker.get_queue_stats() == {"depth": 3, "max_size": 3, "dropped": 2}
+    await tracker.start()
+    await tracker.stop()
+    assert tracker.get_queue_stats()["depth"] == 0
@@ -0,0 +1,73 @@
+import pytest
+
+from backend.app.monitoring.error_groups import ErrorGroups, fingerprint
+from backend.app.monitoring.error_tracking import ErrorTracker
+
+def poll_board(port: str):
+    raise OSError(f"could not open port {port}")
+
+def raise_from_poll(port: str) -> Exception:
+    try:
+        poll_board(port)
+    except OSError as e:
+        return e
+
+def test_fingerprint_ignores_line_numbers_and_numbers():
+    tracker = ErrorTracker.__new__(ErrorTracker)
+    first = tracker._prepare_error_data(raise_from_poll("/dev/ttyUSB0"), "boards", None, None)
+    second = tracker._prepare_error_data(raise_from_poll("/dev/ttyUSB1"), "boards", None, None)
+    assert "poll_board" in first["stacktrace"]
+    assert fingerprint(first) == fingerprint(second)
+    assert fingerprint(first) != fingerprint({**first, "component": "installer"})
+
+    # Without a stack, the message with numbers masked is used
+    bare = {"error_type": "OSError", "component": "boards", "stacktrace": None}
+    assert fingerprint({**bare, "message": "port 1"}) == fingerprint({**bare, "message": "port 2"})
+    assert fingerprint({**bare, "message": "port 1"}) != fingerprint({**bare, "message": "timeout"})
+
+def test_repeats_are_reported_as_counts():
+    groups = ErrorGroups(report_interval=3600)
+    error = {
+        "timestamp": "2024-01-01T00:00:00",
+        "error_type": "OSError",
+        "message": "could not open port",
+        "component": "boards",
+        "user_id": None
+    }
+    first = groups.record(error)
+    assert len(first) == 1 and first[0]["occurrences"] == 1
+    for i in range(99):
+        assert groups.record({**error, "user_id": f"u{i % 3}", "timestamp": f"2024-01-01T00:01:{i % 60:02d}"}) == []
+    assert groups.collect() == []
+
+    update, = groups.collect(force=True)
+    assert update["occurrences"] == 99
+    assert update["count"] == 100
+    assert update["users"] == ["u0", "u1", "u2"]
+    assert update["first_seen"] == "2024-01-01T00:00:00"
+    assert groups.collect(force=True) == []
+    assert groups.summary()[0]["count"] == 100
+
+def test_evicted_groups_report_pending_counts():
+    groups = ErrorGroups(max_groups=1)
+    error = {"timestamp": "t", "error_type": "A", "message": "a", "component": "c", "user_id": None}
+    groups.record(error)
+    groups.record(error)
+    records = groups.record({**error, "error_type": "B"})
+    assert [r["error_type"] for r in records] == ["B", "A"]
+    assert records[1]["occurrences"] == 1
+
+@pytest.mark.asyncio
+async def test_tracker_logs_first_occurrence_and_counts(tmp_path):
+    tracker = ErrorTracker(tmp_path)
+    await tracker.start()
+    for _ in range(5):
+        await tracker.track_error(raise_from_poll("/dev/ttyUSB0"), "boards")
+    await tracker.stop()
+
+    lines = (tmp_path / "errors.log").read_text().splitlines()
+    assert len(lines) == 2
+    stats = await tracker.get_error_stats()
+    assert stats["total_errors"] == 5
+    assert stats["components"] == {"boards": 5}
+    assert tracker.get_error_groups()[0]["count"] == 5
@@ -0,0 +1,59 @@
+from prometheus_client import REGISTRY
+
+from backend.app.monitoring.metrics import SlidingWindowCounter, metrics_collector
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+def test_counts_cover_only_the_window():
+    clock = FakeClock()
+    counter = SlidingWindowCounter(size=900, clock=clock)
+    for _ in range(10):
+        counter.increment()
+        clock.now += 30
+    # Events at t-300, t-270, ..., t-30
+    assert counter.count(60) == 1
+    assert counter.count(300) == 9
+    assert counter.count(301) == 10
+    assert counter.rate(60) == 1.0
+
+def test_stale_buckets_are_ignored_after_wrapping():
+    clock = FakeClock()
+    counter = SlidingWindowCounter(size=60, clock=clock)
+    counter.increment(5)
+    clock.now += 60
+    # Same bucket index, a full ring later
+    assert counter.count(60) == 0
+    counter.increment()
+    assert counter.count(60) == 1
+    clock.now += 3600
+    assert counter.count(60) == 0
+
+def test_error_rate_gauges_per_window_and_component():
+    # Other tests track errors on the same collector, so compare the
+    # overall rate before and after, and use components of our own
+    before = REGISTRY.get_sample_value("error_rate", {"window": "1m"})
+    metrics_collector.track_error("OSError", "rate-boards")
+    metrics_collector.track_error("OSError", "rate-boards")
+    metrics_collector.track_error("ValueError", "rate-installer")
+
+    rates = metrics_collector.get_error_rates()
+    assert set(rates) == {"1m", "5m", "15m"}
+    assert rates["1m"]["components"]["rate-boards"] == 2.0
+    assert rates["5m"]["components"]["rate-installer"] == 60 / 300
+
+    assert REGISTRY.get_sample_value("error_rate", {"window": "1m"}) >= before + 3.0
+    assert REGISTRY.get_sample_value(
+        "component_error_rate", {"window": "15m", "component": "rate-boards"}
+    ) == 2 * 60 / 900
+
+def test_error_rate_collector_is_registered_once():
+    collectors = [
+        collector for collector in REGISTRY._collector_to_names
+        if type(collector).__name__ == "ErrorRateCollector"
+    ]
+    assert len(collectors) == 1
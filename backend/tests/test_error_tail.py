@@ -0,0 +1,43 @@
+import pytest
+import json
+
+from backend.app.monitoring.error_tracking import ErrorTracker
+from backend.app.monitoring.log_tail import ComponentIndex, reverse_lines
+
+def write_errors(path, components):
+    with open(path, "a") as f:
+        for i, component in enumerate(components):
+            f.write(json.dumps({"n": i, "component": component, "message": f"error {i}"}) + "\n")
+
+def test_reverse_lines_skips_partial_last_line(tmp_path):
+    path = tmp_path / "errors.log"
+    path.write_bytes(b'{"n": 0}\n{"n": 1}\n{"n": 2')
+    lines = [line for _, line in reverse_lines(path)]
+    assert lines == [b'{"n": 1}\n', b'{"n": 0}\n']
+    assert list(reverse_lines(path, end=0)) == []
+
+@pytest.mark.asyncio
+async def test_recent_errors_are_newest_first(tmp_path):
+    tracker = ErrorTracker(tmp_path)
+    write_errors(tracker.error_log_path, ["installer"] * 10)
+    errors = await tracker.get_recent_errors(limit=3)
+    assert [e["n"] for e in errors] == [9, 8, 7]
+    assert await ErrorTracker(tmp_path / "empty").get_recent_errors() == []
+
+@pytest.mark.asyncio
+async def test_component_filter_uses_index_and_older_lines(tmp_path):
+    tracker = ErrorTracker(tmp_path)
+    tracker.component_index = ComponentIndex(max_entries=2)
+    # Written before the index exists: found by the backward scan
+    write_errors(tracker.error_log_path, ["installer", "boards", "installer"])
+    assert [e["n"] for e in await tracker.get_recent_errors(component="installer")] == [2, 0]
+
+    # Appended later: picked up by the index
+    with open(tracker.error_log_path, "a") as f:
+        for n, component in enumerate(["boards", "installer", "installer", "installer"], start=3):
+            f.write(json.dumps({"n": n, "component": component}) + "\n")
+    errors = await tracker.get_recent_errors(limit=4, component="installer")
+    assert [e["n"] for e in errors] == [6, 5, 4, 2]
+    assert len(tracker.component_index.offsets["installer"]) == 2
+    errors = await tracker.get_recent_errors(component="boards")
+    assert [e["n"] for e in errors] == [3, 1]
@@ -0,0 +1,90 @@
+import pytest
+import asyncio
+
+from backend.app.core.event_bus import EventBus, UnixSocketEventBus, create_event_bus
+
+async def wait_for_events(received, count, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while len(received) < count and asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(0.01)
+
+@pytest.mark.asyncio
+async def test_events_reach_every_worker_in_same_order(tmp_path):
+    path = str(tmp_path / "events.sock")
+    received = {"a": [], "b": []}
+    first = UnixSocketEventBus(path, reconnect_interval=0.05)
+    second = UnixSocketEventBus(path, reconnect_interval=0.05)
+    await first.start(lambda seq, event: received["a"].append((seq, event)))
+    await second.start(lambda seq, event: received["b"].append((seq, event)))
+
+    await first.publish({"n": 1})
+    await second.publish({"n": 2})
+    await first.publish({"n": 3})
+    await wait_for_events(received["a"], 3)
+    await wait_for_events(received["b"], 3)
+
+    assert received["a"] == received["b"]
+    seqs = [seq for seq, _ in received["a"]]
+    assert seqs == list(range(seqs[0], seqs[0] + 3))
+    assert sorted(event["n"] for _, event in received["a"]) == [1, 2, 3]
+
+    await first.close()
+    await second.close()
+
+@pytest.mark.asyncio
+async def test_worker_takes_over_when_broker_exits(tmp_path):
+    path = str(tmp_path / "events.sock")
+    received = []
+    broker = UnixSocketEventBus(path, reconnect_interval=0.05)
+    worker = UnixSocketEventBus(path, reconnect_interval=0.05)
+    await broker.start(lambda seq, event: None)
+    await worker.start(lambda seq, event: received.append(event))
+
+    await broker.close()
+    await asyncio.sleep(0.2)
+    await worker.publish({"n": 1})
+    await wait_for_events(received, 1)
+
+    assert received == [{"n": 1}]
+    await worker.close()
+
+def test_create_event_bus():
+    assert create_event_bus("") is None
+    assert isinstance(create_event_bus("unix:///tmp/events.sock"), UnixSocketEventBus)
+    with pytest.raises(ValueError):
+        create_event_bus("tcp://localhost")
+
+def test_bus_without_publish_cannot_be_created():
+    class IncompleteBus(EventBus):
+        async def start(self, handler):
+            await super().start(handler)
+
+        async def close(self):
+            pass
+
+    with pytest.raises(TypeError):
+        IncompleteBus()
+
+@pytest.mark.asyncio
+async def test_publish_while_disconnected_is_sent_on_reconnect(tmp_path):
+    path = str(tmp_path / "events.sock")
+    received = []
+    bus = UnixSocketEventBus(
+        path, reconnect_interval=0.05, connect_timeout=0.05, max_outbox=2
+    )
+    # Another process holds the broker lock but serves nothing yet
+    holder = UnixSocketEventBus(path)
+    assert holder._try_lock()
+    await bus.start(lambda seq, event: received.append(event))
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    for n in range(3):
+        await bus.publish({"n": n})
+    assert loop.time() - start < 0.1
+    assert bus.dropped == 1
+
+    await holder.close()
+    await wait_for_events(received, 2)
+    assert received == [{"n": 1}, {"n": 2}]
+    await bus.close()
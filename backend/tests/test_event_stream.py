@@ -0,0 +1,110 @@
+import pytest
+import asyncio
+import json
+from starlette.requests import Request
+
+from app.routers.installation import installation_events
+from app.websocket.connection import ConnectionManager
+from app.websocket.event_stream import sse_frame
+from app.websocket.events import EventTypes
+
+def parse(frame):
+    """Split an SSE frame into its id and decoded data"""
+    fields = dict(line.split(": ", 1) for line in frame.strip().split("\n"))
+    return int(fields["id"]), json.loads(fields["data"])
+
+async def read(frames, count):
+    """Next ``count`` frames of an event stream after the retry hint"""
+    result = []
+    while len(result) < count:
+        frame = await asyncio.wait_for(frames.__anext__(), 1)
+        if not frame.startswith(("retry:", ":")):
+            result.append(frame)
+    return result
+
+async def broadcast(manager, installation_id, progress):
+    await manager.broadcast_json({
+        "type": EventTypes.INSTALLATION_STATUS.value,
+        "data": {"installation_id": installation_id, "progress": progress}
+    })
+
+def test_sse_frame_format():
+    assert sse_frame(42, '{"type":"ping"}') == 'id: 42\ndata: {"type":"ping"}\n\n'
+
+@pytest.mark.asyncio
+async def test_stream_resumes_after_last_event_id():
+    manager = ConnectionManager(replay_size=10)
+    await broadcast(manager, "a", 10)
+    cursor = manager.replay.seq
+    await broadcast(manager, "a", 20)
+    await broadcast(manager, "a", 30)
+
+    stream = manager.open_event_stream(last_seq=cursor)
+    frames = [parse(f) for f in await read(stream.frames(keepalive=1), 2)]
+
+    assert [seq for seq, _ in frames] == [cursor + 1, cursor + 2]
+    assert [data["data"]["progress"] for _, data in frames] == [20, 30]
+    manager.close_event_stream(stream)
+
+@pytest.mark.asyncio
+async def test_stream_gets_snapshot_when_cursor_was_evicted():
+    manager = ConnectionManager(replay_size=2)
+    manager.snapshot_provider = lambda: {"installations": {"a": {"progress": 50}}}
+    await broadcast(manager, "a", 10)
+    cursor = manager.replay.seq
+    for progress in (20, 30, 40):
+        await broadcast(manager, "a", progress)
+
+    stream = manager.open_event_stream(last_seq=cursor)
+    seq, data = parse((await read(stream.frames(keepalive=1), 1))[0])
+
+    assert seq == manager.replay.seq
+    assert data["type"] == EventTypes.SNAPSHOT.value
+    assert data["data"]["installations"]["a"]["progress"] == 50
+    manager.close_event_stream(stream)
+
+@pytest.mark.asyncio
+async def test_stream_filters_by_installation():
+    manager = ConnectionManager()
+    await broadcast(manager, "a", 10)
+    cursor = manager.replay.seq
+    await broadcast(manager, "b", 10)
+    await broadcast(manager, "a", 20)
+
+    stream = manager.open_event_stream("a", last_seq=cursor)
+    frames = stream.frames(keepalive=1)
+    replayed = await read(frames, 1)
+    await broadcast(manager, "b", 20)
+    await broadcast(manager, "a", 30)
+    live = await read(frames, 1)
+
+    progress = [
+        (data["data"]["installation_id"], data["data"]["progress"])
+        for _, data in map(parse, replayed + live)
+    ]
+    assert progress == [("a", 20), ("a", 30)]
+    assert manager.watched_installations() == {"a"}
+    manager.close_event_stream(stream)
+
+@pytest.mark.asyncio
+async def test_endpoint_reads_last_event_id_header():
+    manager = ConnectionManager()
+    await broadcast(manager, "a", 10)
+    cursor = manager.replay.seq
+    await broadcast(manager, "a", 20)
+    request = Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/api/installation/events",
+        "query_string": b"",
+        "headers": [(b"last-event-id", str(cursor).encode())]
+    })
+
+    response = await installation_events(request, None, websocket_manager=manager)
+    body = response.body_iterator
+    seq, data = parse((await read(body, 1))[0])
+
+    assert response.media_type == "text/event-stream"
+    assert (seq, data["data"]["progress"]) == (cursor + 1, 20)
+    await body.aclose()
+    assert manager.event_streams == {}
@@ -86,3 +86,32 @@ async def test_websocket_callback():
         "message": "Test-Nachricht",
         "progress": 50
     })
+
+@pytest.mark.asyncio
+async def test_compile_firmware_skips_unchanged_config(tmp_path):
+    """
+    Test ob bei unveränderter Konfiguration nicht neu kompiliert wird
+    """
+    with patch('backend.installer.BoardDetector'):
+        installer = KlipperInstaller(MagicMock(broadcast=AsyncMock()))
+    installer.install_path = tmp_path
+
+    async def fake_make(command, cwd=None, resource=None):
+        if command == ["make"]:
+            (tmp_path / "out").mkdir(exist_ok=True)
+            (tmp_path / "out" / "klipper.bin").write_bytes(b"\x00")
+        return True
+
+    installer.run_command = AsyncMock(side_effect=fake_make)
+
+    assert await installer.compile_firmware('ender3') == True
+    assert ["make"] in [c.args[0] for c in installer.run_command.await_args_list]
+    assert "CONFIG_MACH_STM32F103=y\n" in (tmp_path / ".config").read_text()
+
+    installer.run_command.reset_mock()
+    assert await installer.compile_firmware('ender3') == True
+    assert [c.args[0] for c in installer.run_command.await_args_list] == [["make", "olddefconfig"]]
+
+    installer.run_command.reset_mock()
+    assert await installer.compile_firmware('voron2.4') == True
+    assert ["make", "clean"] in [c.args[0] for c in installer.run_command.await_args_list]
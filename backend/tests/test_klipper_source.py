@@ -0,0 +1,123 @@
+import pytest
+import asyncio
+import os
+import subprocess
+from app.core.config import settings
+from app.core.klipper_source import KlipperSource
+
+GIT = ["git", "-c", "user.name=test", "-c", "user.email=test@example.com"]
+
+def git(cwd, *args):
+    return subprocess.run(
+        GIT + list(args), cwd=cwd, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+class Runner:
+    """run_command that records every git invocation."""
+
+    def __init__(self):
+        self.commands = []
+
+    async def __call__(self, command, cwd):
+        self.commands.append(command)
+        proc = await asyncio.create_subprocess_exec(
+            *command,
+            cwd=cwd,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+        if await proc.wait() != 0:
+            raise RuntimeError(f"{command} failed")
+
+    def count(self, subcommand):
+        return sum(1 for c in self.commands if c[1] == subcommand)
+
+@pytest.fixture
+def upstream(tmp_path, monkeypatch):
+    """Bare repository standing in for the Klipper remote, plus a work clone."""
+    origin = tmp_path / "origin.git"
+    work = tmp_path / "work"
+    git(tmp_path, "init", "--bare", "-b", "master", str(origin))
+    git(tmp_path, "clone", str(origin), str(work))
+    git(work, "commit", "--allow-empty", "-m", "initial")
+    git(work, "tag", "v1")
+    git(work, "push", "origin", "master", "v1")
+    monkeypatch.setattr(settings, "KLIPPER_REPO", str(origin))
+    return work
+
+def commit(work, message):
+    git(work, "commit", "--allow-empty", "-m", message)
+    git(work, "push", "origin", "master")
+    return git(work, "rev-parse", "HEAD")
+
+def head(path):
+    return git(path, "rev-parse", "HEAD")
+
+@pytest.mark.asyncio
+async def test_create_clones_and_checks_out_branch(upstream, tmp_path):
+    source = KlipperSource(str(tmp_path / "firmware"), fetch_interval=3600)
+    runner = Runner()
+
+    path = await source.create_worktree("install_a", "master", runner)
+
+    assert path == source.worktree_path("install_a")
+    assert head(path) == head(upstream)
+    assert runner.count("clone") == 1
+
+@pytest.mark.asyncio
+async def test_fresh_clone_is_reused_without_fetch(upstream, tmp_path):
+    source = KlipperSource(str(tmp_path / "firmware"), fetch_interval=3600)
+    runner = Runner()
+    await source.create_worktree("install_a", "master", runner)
+    fetches = runner.count("fetch")
+
+    path = await source.create_worktree("install_b", "v1", runner)
+
+    assert head(path) == head(upstream)
+    assert runner.count("clone") == 1
+    assert runner.count("fetch") == fetches
+
+@pytest.mark.asyncio
+async def test_stale_clone_is_fetched(upstream, tmp_path):
+    source = KlipperSource(str(tmp_path / "firmware"), fetch_interval=0)
+    runner = Runner()
+    await source.create_worktree("install_a", "master", runner)
+    new_head = commit(upstream, "second")
+
+    path = await source.create_worktree("install_b", "master", runner)
+
+    assert head(path) == new_head
+    assert runner.count("clone") == 1
+
+@pytest.mark.asyncio
+async def test_ref_missing_from_fresh_clone_triggers_fetch(upstream, tmp_path):
+    source = KlipperSource(str(tmp_path / "firmware"), fetch_interval=3600)
+    runner = Runner()
+    await source.create_worktree("install_a", "master", runner)
+    new_head = commit(upstream, "release")
+    git(upstream, "tag", "v2")
+    git(upstream, "push", "origin", "v2")
+
+    path = await source.create_worktree("install_b", "v2", runner)
+
+    assert head(path) == new_head
+
+@pytest.mark.asyncio
+async def test_unknown_version_raises(upstream, tmp_path):
+    source = KlipperSource(str(tmp_path / "firmware"), fetch_interval=3600)
+
+    with pytest.raises(ValueError):
+        await source.create_worktree("install_a", "no-such-version", Runner())
+
+    assert not os.path.exists(source.worktree_path("install_a"))
+
+@pytest.mark.asyncio
+async def test_remove_worktree(upstream, tmp_path):
+    source = KlipperSource(str(tmp_path / "firmware"), fetch_interval=3600)
+    runner = Runner()
+    path = await source.create_worktree("install_a", "master", runner)
+
+    await source.remove_worktree("install_a", runner)
+
+    assert not os.path.exists(path)
+    assert path not in git(source.repo_dir, "worktree", "list")
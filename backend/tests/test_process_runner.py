@@ -0,0 +1,80 @@
+import pytest
+import asyncio
+import os
+import time
+from backend.app.core.process_runner import ProcessRunner, ResourceClass
+
+@pytest.fixture
+def runner(tmp_path):
+    return ProcessRunner(
+        limits={ResourceClass.USB: 1}, tail_lines=5, slot_dir=str(tmp_path)
+    )
+
+@pytest.mark.asyncio
+async def test_output_tail_is_bounded(runner):
+    lines = []
+    result = await runner.run(
+        ["sh", "-c", "seq 1 20; echo failed >&2; exit 3"],
+        ResourceClass.IO,
+        on_line=lambda line, is_stderr: lines.append((line, is_stderr))
+    )
+
+    assert result.returncode == 3
+    assert len(lines) == 21
+    assert ("failed", True) in lines
+    assert len(result.tail) == 5
+
+@pytest.mark.asyncio
+async def test_resource_class_limit(runner):
+    start = time.monotonic()
+    await asyncio.gather(
+        runner.run(["sleep", "0.2"], ResourceClass.USB),
+        runner.run(["sleep", "0.2"], ResourceClass.USB)
+    )
+    assert time.monotonic() - start >= 0.4
+
+@pytest.mark.asyncio
+async def test_limit_holds_across_runners(runner, tmp_path):
+    # A second runner stands in for another worker process
+    other = ProcessRunner(limits={ResourceClass.USB: 1}, slot_dir=str(tmp_path))
+    start = time.monotonic()
+    await asyncio.gather(
+        runner.run(["sleep", "0.2"], ResourceClass.USB),
+        other.run(["sleep", "0.2"], ResourceClass.USB)
+    )
+    assert time.monotonic() - start >= 0.4
+
+@pytest.mark.asyncio
+async def test_timeout_kills_process(runner):
+    result = await runner.run(["sleep", "5"], ResourceClass.IO, timeout=0.2)
+    assert result.timed_out is True
+    assert result.returncode != 0
+
+@pytest.mark.asyncio
+async def test_usage_accounting(runner):
+    await runner.run(["true"], ResourceClass.CPU, installation_id="install_1")
+    await runner.run(["true"], ResourceClass.IO, installation_id="install_1")
+
+    usage = runner.get_usage("install_1")
+    assert usage.processes == 2
+    assert usage.wall_time > 0
+    assert runner.release("install_1") is usage
+    assert runner.get_usage("install_1") is None
+
+@pytest.mark.asyncio
+async def test_cancel_kills_process(runner, tmp_path):
+    pid_file = tmp_path / "pid"
+    task = asyncio.create_task(runner.run(
+        ["sh", "-c", f"echo $$ > {pid_file}; exec sleep 5"],
+        ResourceClass.USB
+    ))
+    await asyncio.sleep(0.2)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    with pytest.raises(ProcessLookupError):
+        os.kill(int(pid_file.read_text()), 0)
+    # The semaphore is free again
+    result = await asyncio.wait_for(runner.run(["true"], ResourceClass.USB), 1.0)
+    assert result.returncode == 0
@@ -0,0 +1,64 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.app.monitoring.middleware import RequestTimingMiddleware
+from backend.app.monitoring.performance import PerformanceMonitor
+
+class RecordingMetrics:
+    def __init__(self):
+        self.requests = []
+
+    def track_request(self, method, endpoint, status, duration):
+        self.requests.append((method, endpoint, status))
+
+def make_client(max_routes: int = 100):
+    app = FastAPI()
+
+    @app.get("/api/install/{installation_id}/status")
+    async def status(installation_id: str):
+        return {"id": installation_id}
+
+    @app.get("/api/boards")
+    async def boards():
+        return []
+
+    @app.post("/api/boards/{port}/flash")
+    async def flash(port: str):
+        raise RuntimeError("flash failed")
+
+    metrics, performance = RecordingMetrics(), PerformanceMonitor()
+    app.add_middleware(
+        RequestTimingMiddleware,
+        metrics=metrics,
+        performance=performance,
+        max_routes=max_routes
+    )
+    return TestClient(app, raise_server_exceptions=False), metrics, performance
+
+def test_requests_are_labelled_by_route_template():
+    client, metrics, performance = make_client()
+    for i in range(20):
+        client.get(f"/api/install/{i}/status")
+    client.get("/does/not/exist")
+    client.post("/api/boards/ttyUSB0/flash")
+
+    template = "/api/install/{installation_id}/status"
+    assert metrics.requests.count(("GET", template, 200)) == 20
+    assert ("GET", RequestTimingMiddleware.UNMATCHED, 404) in metrics.requests
+    assert ("POST", "/api/boards/{port}/flash", 500) in metrics.requests
+    assert set(performance.endpoint_metrics) == {
+        template,
+        RequestTimingMiddleware.UNMATCHED,
+        "/api/boards/{port}/flash"
+    }
+
+def test_route_labels_are_capped():
+    client, metrics, _ = make_client(max_routes=1)
+    client.get("/api/install/1/status")
+    client.get("/api/boards")
+    client.get("/api/install/2/status")
+    assert [endpoint for _, endpoint, _ in metrics.requests] == [
+        "/api/install/{installation_id}/status",
+        RequestTimingMiddleware.OTHER,
+        "/api/install/{installation_id}/status"
+    ]
@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+from backend.app.monitoring.performance import PerformanceMonitor
+from backend.app.monitoring.timeseries import SampleRing, TimeSeries
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+def test_buckets_hold_count_sum_min_max():
+    clock = FakeClock()
+    series = TimeSeries(interval=10, buckets=6, clock=clock)
+    for value in (1.0, 5.0, 3.0):
+        series.add(value)
+    clock.now += 10
+    series.add(7.0)
+
+    summary = series.summary(60)
+    assert summary == {"count": 4, "sum": 16.0, "mean": 4.0, "min": 1.0, "max": 7.0}
+    assert series.summary(10)["count"] == 1
+    assert series.last == 7.0
+
+def test_wrapped_buckets_are_ignored():
+    clock = FakeClock()
+    series = TimeSeries(interval=10, buckets=6, clock=clock)
+    series.add(100.0)
+    clock.now += 60
+    series.add(1.0)
+    # Same slot a full ring later: the old value is gone
+    assert series.summary(60) == {"count": 1, "sum": 1.0, "mean": 1.0, "min": 1.0, "max": 1.0}
+    clock.now += 3600
+    assert series.summary(60)["count"] == 0
+
+def test_history_downsamples():
+    clock = FakeClock(1_000_000.0)
+    series = TimeSeries(interval=10, buckets=360, clock=clock)
+    start = clock.now
+    for second in range(0, 600, 5):
+        series.add(float(second), start + second)
+
+    points = series.history(start, start + 600, 6)
+    assert [p["count"] for p in points] == [20] * 6
+    assert points[0]["min"] == 0.0 and points[0]["max"] == 95.0
+    assert points[-1]["mean"] == sum(range(500, 600, 5)) / 20
+
+    fine = series.history(start, start + 600, 60)
+    assert [p["count"] for p in fine] == [2] * 60
+
+def test_sample_ring_keeps_latest():
+    ring = SampleRing(size=4)
+    for i in range(10):
+        ring.add(float(i), timestamp=float(i))
+    assert sorted(ring.since(5.5)) == [6.0, 7.0, 8.0, 9.0]
+    assert sorted(ring.since(7.5)) == [8.0, 9.0]
+
+def test_performance_monitor_uses_time_series():
+    monitor = PerformanceMonitor()
+    for i in range(20):
+        monitor.track_request("/api/boards", "GET", 0.01 * (i + 1), 200)
+    monitor.track_request("/api/boards", "POST", 0.5, 500)
+
+    current = monitor.get_current_metrics()
+    assert current["request_rate"] == 21 / 60
+    assert current["response_time"]["max"] == 0.5
+
+    endpoint = monitor.get_endpoint_metrics("/api/boards")
+    assert endpoint["status_codes"] == {"200": 20, "500": 1}
+    assert endpoint["methods"] == {"GET": 20, "POST": 1}
+
+    history = monitor.get_performance_history(timedelta(minutes=10), points=10)
+    assert len(history["data_points"]) == 10
+    assert sum(p["request_count"] for p in history["data_points"]) == 21
@@ -0,0 +1,41 @@
+import pytest
+from datetime import datetime, timedelta
+
+from backend.app.monitoring.analytics import UserAnalytics
+
+def event(timestamp: datetime, user_id, event_type="page_view"):
+    return {
+        "timestamp": timestamp.isoformat(),
+        "event_type": event_type,
+        "user_id": user_id,
+        "properties": {"n": timestamp.minute}
+    }
+
+@pytest.mark.asyncio
+async def test_journey_is_sorted_and_paginated(tmp_path):
+    analytics = UserAnalytics(tmp_path)
+    start = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(hours=1)
+    # Arrives out of order, interleaved with other users
+    events = [event(start + timedelta(minutes=m), "u1") for m in (5, 1, 3, 2, 4)]
+    events += [event(start, "u2"), event(start, None)]
+    assert await analytics.track_events(events) == 7
+
+    journey = await analytics.get_user_journey("u1")
+    assert [e["properties"]["n"] for e in journey] == [1, 2, 3, 4, 5]
+    page = await analytics.get_user_journey("u1", limit=2, offset=2)
+    assert [e["properties"]["n"] for e in page] == [3, 4]
+    assert await analytics.get_user_journey("nobody") == []
+    await analytics.close()
+
+@pytest.mark.asyncio
+async def test_index_is_rebuilt_from_segments(tmp_path):
+    analytics = UserAnalytics(tmp_path)
+    await analytics.track_event("page_view", "u1")
+    await analytics.track_event("install_started", "u1")
+    await analytics.close()
+
+    (tmp_path / "users.db").unlink()
+    restarted = UserAnalytics(tmp_path)
+    journey = await restarted.get_user_journey("u1")
+    assert [e["event_type"] for e in journey] == ["page_view", "install_started"]
+    await restarted.close()
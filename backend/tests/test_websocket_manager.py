@@ -0,0 +1,111 @@
+import pytest
+import json
+from unittest.mock import AsyncMock
+
+from backend.websocket_manager import WebSocketManager
+
+class RecordingWebSocket:
+    def __init__(self):
+        self.messages = []
+        self.accept = AsyncMock()
+        self.close = AsyncMock()
+
+    async def send_json(self, data):
+        self.messages.append(data)
+
+    async def send_text(self, text):
+        self.messages.append(json.loads(text))
+
+@pytest.fixture
+def mock_websocket():
+    return RecordingWebSocket()
+
+@pytest.mark.asyncio
+async def test_connect_sends_snapshot(mock_websocket):
+    manager = WebSocketManager()
+    await manager.send_installation_update("deps", "Installiere", 10, log="Start")
+
+    await manager.connect(mock_websocket)
+    await manager.clients[mock_websocket].drain()
+
+    message = mock_websocket.messages[-1]
+    assert message["type"] == "snapshot"
+    assert message["seq"] == manager.seq
+    assert message["data"]["progress"] == 10
+    assert message["data"]["log"] == ["Start"]
+
+@pytest.mark.asyncio
+async def test_broadcast_sends_only_changes(mock_websocket):
+    manager = WebSocketManager()
+    await manager.connect(mock_websocket)
+    await manager.send_installation_update("deps", "Installiere", 10)
+    seq = manager.seq
+
+    await manager.send_installation_update("deps", "Installiere", 20, log="Zeile")
+    await manager.clients[mock_websocket].drain()
+
+    message = mock_websocket.messages[-1]
+    assert message == {
+        "type": "delta",
+        "seq": seq + 1,
+        "changes": {"progress": 20},
+        "log": ["Zeile"]
+    }
+
+@pytest.mark.asyncio
+async def test_unchanged_update_is_not_sent(mock_websocket):
+    manager = WebSocketManager()
+    await manager.connect(mock_websocket)
+    await manager.send_installation_update("deps", "Installiere", 10)
+    await manager.clients[mock_websocket].drain()
+    calls = len(mock_websocket.messages)
+    seq = manager.seq
+
+    await manager.send_installation_update("deps", "Installiere", 10)
+    await manager.clients[mock_websocket].drain()
+
+    assert len(mock_websocket.messages) == calls
+    assert manager.seq == seq
+
+@pytest.mark.asyncio
+async def test_broadcast_encodes_once():
+    manager = WebSocketManager()
+    sockets = [RecordingWebSocket() for _ in range(3)]
+    for ws in sockets:
+        ws.send_text = AsyncMock()
+        await manager.connect(ws)
+
+    await manager.send_installation_update("deps", "Installiere", 10)
+    for ws in sockets:
+        await manager.clients[ws].drain()
+
+    frames = [ws.send_text.call_args.args[0] for ws in sockets]
+    assert all(frame is frames[0] for frame in frames)
+
+@pytest.mark.asyncio
+async def test_reconnect_replays_missed_deltas():
+    manager = WebSocketManager()
+    await manager.send_installation_update("deps", "Installiere", 10)
+    last_seq = manager.seq
+    await manager.send_installation_update("deps", "Installiere", 20)
+    await manager.send_installation_update("firmware", "Kompiliere", 30)
+
+    ws = RecordingWebSocket()
+    await manager.connect(ws, last_seq=last_seq)
+    await manager.clients[ws].drain()
+
+    assert [m["type"] for m in ws.messages] == ["delta", "delta"]
+    assert [m["seq"] for m in ws.messages] == [last_seq + 1, last_seq + 2]
+
+@pytest.mark.asyncio
+async def test_reconnect_after_reset_gets_snapshot():
+    manager = WebSocketManager()
+    await manager.send_installation_update("deps", "Installiere", 10)
+    last_seq = manager.seq
+    await manager.clear_status()
+
+    ws = RecordingWebSocket()
+    await manager.connect(ws, last_seq=last_seq)
+    await manager.clients[ws].drain()
+
+    assert [m["type"] for m in ws.messages] == ["snapshot"]
@@ -1,70 +1,140 @@
 import asyncio
-from typing import Dict, Set, Optional, Any
+from collections import deque
+from typing import Deque, Dict, List, Set, Optional, Any
 from fastapi import WebSocket
-import json
 import logging
 
+from .app.core.websocket import ClientConnection, OverflowPolicy, ReplayBuffer, encode_message
+
 logger = logging.getLogger(__name__)
 
+# Maximale Anzahl gepufferter Log-Einträge
+MAX_LOG_ENTRIES = 1000
+# Anzahl der Deltas, die für wiederverbindende Clients vorgehalten werden
+MAX_REPLAY_ENTRIES = 1000
+
 class WebSocketManager:
-    def __init__(self):
-        self.active_connections: Set[WebSocket] = set()
-        self.installation_status: Dict[str, Any] = {
+    """Verteilt den Installationsstatus als Snapshot plus Deltas.
+
+    Neue Clients erhalten einen vollständigen Snapshot mit der aktuellen
+    Sequenznummer. Danach wird pro Update nur ein Delta mit den geänderten
+    Feldern und neuen Log-Zeilen gesendet; die Sequenznummer steigt dabei
+    monoton, sodass Clients Lücken erkennen können. Ein wiederverbindender
+    Client übergibt seine letzte Sequenznummer und erhält nur die verpassten
+    Deltas, solange sie noch gepuffert sind, sonst einen Snapshot.
+    """
+
+    def __init__(self, max_queue: int = 256):
+        # Deltas können nicht zusammengefasst werden: Ein Client, der nicht
+        # mehr hinterherkommt, wird getrennt und erhält beim erneuten
+        # Verbinden einen frischen Snapshot.
+        self.max_queue = max_queue
+        self.clients: Dict[WebSocket, ClientConnection] = {}
+        self.replay = ReplayBuffer(MAX_REPLAY_ENTRIES)
+        self.installation_status: Dict[str, Any] = self._initial_status()
+        self.log: Deque[str] = deque(maxlen=MAX_LOG_ENTRIES)
+
+    @staticmethod
+    def _initial_status() -> Dict[str, Any]:
+        return {
             "progress": 0,
             "step": "",
             "message": "",
-            "error": None,
-            "log": []
+            "error": None
+        }
+
+    def _snapshot(self) -> Dict[str, Any]:
+        return {
+            "type": "snapshot",
+            "seq": self.seq,
+            "data": self.get_status()
         }
 
-    async def connect(self, websocket: WebSocket):
+    @property
+    def seq(self) -> int:
+        return self.replay.seq
+
+    @property
+    def active_connections(self) -> Set[WebSocket]:
+        return set(self.clients)
+
+    async def connect(self, websocket: WebSocket, last_seq: Optional[int] = None):
         """Neue WebSocket-Verbindung herstellen"""
         await websocket.accept()
-        self.active_connections.add(websocket)
-        # Aktuellen Status an den neuen Client senden
-        await self.send_personal_message(self.installation_status, websocket)
+        client = ClientConnection(
+            websocket,
+            max_queue=self.max_queue,
+            policy=OverflowPolicy.DISCONNECT,
+            on_close=self._on_client_closed
+        )
+        self.clients[websocket] = client
+        client.start()
+        missed = self.replay.since(last_seq) if last_seq is not None else None
+        if missed is not None:
+            # Nur die verpassten Deltas nachsenden
+            for frame in missed:
+                client.send(frame)
+        else:
+            # Aktuellen Status an den neuen Client senden
+            await self.send_personal_message(self._snapshot(), websocket)
 
     def disconnect(self, websocket: WebSocket):
         """WebSocket-Verbindung trennen"""
-        self.active_connections.remove(websocket)
+        client = self.clients.pop(websocket, None)
+        if client is not None:
+            client.close()
+
+    def _on_client_closed(self, client: ClientConnection):
+        # Schreibfehler oder volle Warteschlange
+        self.disconnect(client.websocket)
 
     async def broadcast(self, message: Dict[str, Any]):
-        """Nachricht an alle verbundenen Clients senden"""
+        """Änderungen als Delta an alle verbundenen Clients senden"""
+        changes = {
+            key: value
+            for key, value in message.items()
+            if key != "log" and self.installation_status.get(key) != value
+        }
+        appended = [message["log"]] if message.get("log") else []
+
+        if not changes and not appended:
+            return
+
         # Status aktualisieren
-        self.installation_status.update(message)
-        
-        # Log-Einträge verwalten
-        if "log" in message:
-            self.installation_status["log"].append(message["log"])
-            # Maximale Anzahl von Log-Einträgen begrenzen
-            if len(self.installation_status["log"]) > 1000:
-                self.installation_status["log"] = self.installation_status["log"][-1000:]
-
-        # Nachricht an alle Clients senden
-        disconnected = set()
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(self.installation_status)
-            except Exception as e:
-                logger.error(f"Fehler beim Senden der Nachricht: {str(e)}")
-                disconnected.add(connection)
-        
-        # Getrennte Verbindungen entfernen
-        for connection in disconnected:
-            self.disconnect(connection)
+        self.installation_status.update(changes)
+        self.log.extend(appended)
+        seq = self.replay.next_seq()
+
+        # Einmal kodieren, derselbe Text-Frame geht an alle Clients und in
+        # den Replay-Puffer
+        frame = encode_message({
+            "type": "delta",
+            "seq": seq,
+            "changes": changes,
+            "log": appended
+        })
+        self.replay.append(seq, frame)
+        self._send_to_all(frame)
+
+    def _send_to_all(self, frame: Any):
+        """Nachricht für alle verbundenen Clients einreihen"""
+        for client in list(self.clients.values()):
+            client.send(frame)
 
     async def send_personal_message(self, message: Dict[str, Any], websocket: WebSocket):
-        """Nachricht an einen spezifischen Client senden"""
-        try:
-            await websocket.send_json(message)
-        except Exception as e:
-            logger.error(f"Fehler beim Senden der persönlichen Nachricht: {str(e)}")
-            self.disconnect(websocket)
-
-    async def send_installation_update(self, 
-                                     step: str, 
-                                     message: str, 
-                                     progress: int, 
+        """Nachricht für einen spezifischen Client einreihen"""
+        client = self.clients.get(websocket)
+        if client is not None:
+            client.send(message)
+
+    def get_client_metrics(self) -> List[Dict[str, Any]]:
+        """Warteschlangenlänge und Sendelatenz je Client"""
+        return [client.get_metrics() for client in self.clients.values()]
+
+    async def send_installation_update(self,
+                                     step: str,
+                                     message: str,
+                                     progress: int,
                                      error: Optional[str] = None,
                                      log: Optional[str] = None):
         """Installation-Update senden"""
@@ -73,26 +143,25 @@ class WebSocketManager:
             "message": message,
             "progress": progress
         }
-        
+
         if error:
             update["error"] = error
-        
+
         if log:
             update["log"] = log
-        
+
         await self.broadcast(update)
 
     def get_status(self) -> Dict[str, Any]:
         """Aktuellen Installationsstatus abrufen"""
-        return self.installation_status.copy()
+        status = self.installation_status.copy()
+        status["log"] = list(self.log)
+        return status
 
     async def clear_status(self):
         """Installationsstatus zurücksetzen"""
-        self.installation_status = {
-            "progress": 0,
-            "step": "",
-            "message": "",
-            "error": None,
-            "log": []
-        }
-        await self.broadcast(self.installation_status)
+        self.installation_status = self._initial_status()
+        self.log.clear()
+        self.replay.reset()
+        # Nach einem Reset erhalten alle Clients einen neuen Snapshot
+        self._send_to_all(self._snapshot())
@@ -176,6 +176,46 @@ describe('WebSocketService', () => {
     expect(logHandler).toHaveBeenCalledWith(log.data)
   })
 
+  it('should request columnar log batches', () => {
+    expect(mockWs.url).toBe('ws://localhost:8000/ws?encoding=columnar')
+  })
+
+  it('should expand columnar log batches', () => {
+    const logHandler = vi.fn()
+    wsService.onInstallationLog(logHandler)
+
+    mockWs.simulateOpen()
+    mockWs.simulateMessage({
+      type: 'installation_log_batch',
+      encoding: 'columnar',
+      data: {
+        installation_id: 'install_1',
+        timestamp: '2025-01-03T17:00:00Z',
+        messages: ['CC a.o', 'CC b.o', 'failed'],
+        levels: [['info', 2], ['error', 1]]
+      }
+    })
+
+    expect(logHandler.mock.calls.map(call => call[0])).toEqual([
+      { message: 'CC a.o', level: 'info', timestamp: '2025-01-03T17:00:00Z' },
+      { message: 'CC b.o', level: 'info', timestamp: '2025-01-03T17:00:00Z' },
+      { message: 'failed', level: 'error', timestamp: '2025-01-03T17:00:00Z' }
+    ])
+  })
+
+  it('should resume from the last sequence number on reconnect', () => {
+    mockWs.simulateOpen()
+    mockWs.simulateMessage({
+      type: 'installation_status',
+      seq: 42,
+      data: { status: 'building', message: 'Building firmware' }
+    })
+
+    expect((wsService as any).connectionUrl()).toBe(
+      'ws://localhost:8000/ws?encoding=columnar&last_seq=42'
+    )
+  })
+
   it('should clean up resources on disconnect', () => {
     const closeSpy = vi.spyOn(mockWs, 'close')
     
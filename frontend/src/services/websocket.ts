@@ -7,6 +7,8 @@ export class WebSocketService {
   private reconnectTimer: number | null = null
   private messageQueue: WebSocketMessage[] = []
   private retryCount: number = 0
+  // Sequence number of the last broadcast, sent on reconnect to resume
+  private lastSeq: number | null = null
   private listeners: {
     message: ((data: any) => void)[]
     status: ((status: InstallationStatus) => void)[]
@@ -24,10 +26,25 @@ export class WebSocketService {
     this.options = {
       reconnectInterval: options.reconnectInterval || 1000,
       maxRetries: options.maxRetries || 5,
-      debug: options.debug || false
+      debug: options.debug || false,
+      compactLogs: options.compactLogs ?? true
     }
   }
 
+  private connectionUrl(): string {
+    if (!this.options.compactLogs && this.lastSeq === null) {
+      return this.url
+    }
+    const url = new URL(this.url, window.location.href)
+    if (this.options.compactLogs) {
+      url.searchParams.set('encoding', 'columnar')
+    }
+    if (this.lastSeq !== null) {
+      url.searchParams.set('last_seq', String(this.lastSeq))
+    }
+    return url.toString()
+  }
+
   async connect(): Promise<void> {
     if (this.ws?.readyState === WebSocket.OPEN) {
       return
@@ -35,7 +52,7 @@ export class WebSocketService {
 
     return new Promise((resolve, reject) => {
       try {
-        this.ws = new WebSocket(this.url)
+        this.ws = new WebSocket(this.connectionUrl())
 
         this.ws.onopen = () => {
           this.log('WebSocket connected')
@@ -145,22 +162,59 @@ export class WebSocketService {
   private handleMessage(message: WebSocketMessage) {
     this.log('Received message:', message)
 
+    if (typeof message.seq === 'number') {
+      this.lastSeq = message.seq
+    }
+
     // Notify general message listeners
     this.listeners.message.forEach(callback => callback(message))
 
     // Handle specific message types
     switch (message.type) {
+      case 'ping':
+        // Server heartbeat; connections that stop answering are closed
+        this.send({ type: 'pong', data: null }).catch(error => {
+          this.log('Failed to answer ping:', error)
+        })
+        break
+      case 'snapshot':
+        // Sent on reconnect when the missed events are no longer buffered
+        message.data.installations?.forEach((status: InstallationStatus) => {
+          this.listeners.status.forEach(callback => callback(status))
+        })
+        break
       case 'installation_status':
         this.listeners.status.forEach(callback => callback(message.data))
         break
       case 'installation_log':
         this.listeners.log.forEach(callback => callback(message.data))
         break
+      case 'installation_log_batch':
+        this.batchLines(message).forEach(line => {
+          const log = { ...line, timestamp: message.data.timestamp }
+          this.listeners.log.forEach(callback => callback(log))
+        })
+        break
       default:
         this.log('Unknown message type:', message.type)
     }
   }
 
+  private batchLines(message: WebSocketMessage): { message: string; level: string }[] {
+    if (message.encoding !== 'columnar') {
+      return message.data.lines
+    }
+    // Columnar batches carry a message column and run-length encoded levels
+    const lines: { message: string; level: string }[] = []
+    let index = 0
+    message.data.levels.forEach(([level, count]: [string, number]) => {
+      for (let i = 0; i < count; i++) {
+        lines.push({ message: message.data.messages[index++], level })
+      }
+    })
+    return lines
+  }
+
   private handleDisconnect() {
     if (this.retryCount >= this.options.maxRetries) {
       this.notifyError(new Error('Max reconnection attempts reached'))
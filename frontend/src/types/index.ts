@@ -106,4 +106,14 @@ export interface PaginatedResponse<T> {
 export interface WebSocketMessage {
   type: string
   data: any
+  encoding?: 'json' | 'columnar'
+  seq?: number
+}
+
+export interface WebSocketOptions {
+  reconnectInterval?: number
+  maxRetries?: number
+  debug?: boolean
+  // Request compact columnar log batches instead of one object per line
+  compactLogs?: boolean
 }
@@ -0,0 +1,90 @@
+import pytest
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from pathlib import Path
+
+from backend.app.monitoring.error_tracking import ErrorTracker
+
+# ERROR_LOG_BYTES=50000000 for a quicker run
+LOG_BYTES = int(os.environ.get("ERROR_LOG_BYTES", 1024 ** 3))
+COMPONENTS = ["installer", "boards", "config", "websocket", "firmware"]
+LIMIT = 100
+
+def write_error_log(path: Path):
+    """Fill the log with realistic records up to LOG_BYTES"""
+    template = {
+        "timestamp": "2024-01-01T00:00:00",
+        "error_type": "SerialException",
+        "message": "could not open port /dev/ttyUSB0",
+        "stacktrace": "Traceback (most recent call last):\n" + "  File \"x.py\", line 1\n" * 20,
+        "user_id": None,
+        "context": {},
+        "environment": "production"
+    }
+    chunk = "".join(
+        json.dumps({**template, "component": COMPONENTS[i % len(COMPONENTS)]}) + "\n"
+        for i in range(1000)
+    )
+    # A rare component only near the start of the file
+    rare = json.dumps({**template, "component": "rare"}) + "\n"
+    with open(path, "w") as f:
+        f.write(rare)
+        written = len(rare)
+        while written < LOG_BYTES:
+            f.write(chunk)
+            written += len(chunk)
+
+def forward_scan(path: Path, component=None):
+    """Newest LIMIT matches the way the previous code read the log: from the start"""
+    errors = deque(maxlen=LIMIT)
+    with open(path) as f:
+        for line in f:
+            error = json.loads(line)
+            if component and error["component"] != component:
+                continue
+            errors.append(error)
+    return list(reversed(errors))
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+@pytest.mark.performance
+def test_error_log_tail_benchmark(tmp_path):
+    tracker = ErrorTracker(tmp_path)
+    write_error_log(tracker.error_log_path)
+
+    async def recent(component=None):
+        return await tracker.get_recent_errors(LIMIT, component)
+
+    _, forward = timed(forward_scan, tracker.error_log_path, "firmware")
+    tail, tail_seconds = timed(asyncio.run, recent())
+    # First filtered call builds the index from the end of the file
+    filtered, filtered_seconds = timed(asyncio.run, recent("firmware"))
+    _, cached_seconds = timed(asyncio.run, recent("firmware"))
+    # Worst case: a component with fewer than LIMIT matches scans back to the start
+    rare, rare_seconds = timed(asyncio.run, recent("rare"))
+
+    print(
+        f"\n{LOG_BYTES / 1024 ** 2:.0f} MiB log: forward scan {forward * 1000:.1f} ms, "
+        f"tail {tail_seconds * 1000:.1f} ms, "
+        f"tail by component {filtered_seconds * 1000:.1f} ms, "
+        f"indexed {cached_seconds * 1000:.1f} ms, "
+        f"rare component {rare_seconds * 1000:.1f} ms"
+    )
+
+    assert len(tail) == LIMIT
+    assert [e["component"] for e in filtered] == ["firmware"] * LIMIT
+    assert len(rare) == 1
+    # Independent of file size: no more than a few milliseconds
+    assert tail_seconds < 0.5
+    assert filtered_seconds < 0.5
+
+if __name__ == "__main__":
+    import tempfile
+    with tempfile.TemporaryDirectory() as directory:
+        test_error_log_tail_benchmark(Path(directory))
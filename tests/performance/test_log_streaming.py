@@ -0,0 +1,158 @@
+import pytest
+import asyncio
+import json
+import time
+import zlib
+from datetime import datetime
+from typing import Dict
+
+from app.websocket.connection import ConnectionManager
+from app.websocket.events import EventTypes, LogLevel
+from app.websocket.log_stream import LogStream
+from backend.app.core.websocket import MessageEncoding
+
+LINES = 20000
+CLIENTS = 20
+
+class FakeWebSocket:
+    """Counts frames and encodes like starlette's WebSocket.send_json"""
+
+    def __init__(self):
+        self.frames = 0
+
+    async def send_json(self, data):
+        json.dumps(data, separators=(",", ":"))
+        self.frames += 1
+
+    async def send_text(self, text):
+        self.frames += 1
+
+    async def accept(self):
+        pass
+
+async def connect_clients(manager: ConnectionManager):
+    for _ in range(CLIENTS):
+        await manager.connect(FakeWebSocket())
+
+async def drain_clients(manager: ConnectionManager):
+    for client in manager.clients.values():
+        await client.drain()
+
+def make_manager() -> ConnectionManager:
+    # Queue every frame so both scenarios deliver the same log
+    return ConnectionManager(max_queue=LINES)
+
+async def per_line_broadcast(manager: ConnectionManager):
+    """Previous behaviour: one broadcast per output line"""
+    for i in range(LINES):
+        await manager.broadcast_json({
+            "type": EventTypes.INSTALLATION_LOG,
+            "data": {
+                "message": f"  CC out/src/file_{i}.o",
+                "level": LogLevel.INFO,
+                "timestamp": datetime.now().isoformat()
+            }
+        })
+
+async def batched_broadcast(manager: ConnectionManager):
+    log_stream = LogStream(manager, "install_bench")
+    log_stream.start()
+    for i in range(LINES):
+        log_stream.append(f"  CC out/src/file_{i}.o", LogLevel.INFO)
+        if i % 500 == 0:
+            # Let the flush task run like it would between subprocess reads
+            await asyncio.sleep(0)
+    await log_stream.close()
+
+def run_benchmark(scenario) -> Dict:
+    manager = make_manager()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+
+    async def run():
+        await connect_clients(manager)
+        await scenario(manager)
+        await drain_clients(manager)
+
+    asyncio.run(run())
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    frames = manager.active_connections[0].frames
+    return {
+        "frames_per_client": frames,
+        "frames_per_second": frames * CLIENTS / wall,
+        "cpu_seconds": cpu,
+    }
+
+@pytest.mark.performance
+def test_log_streaming_benchmark():
+    """Compare per-line broadcasts with batched log frames"""
+    before = run_benchmark(per_line_broadcast)
+    after = run_benchmark(batched_broadcast)
+
+    for name, result in [("per-line", before), ("batched", after)]:
+        print(
+            f"{name:>8}: {result['frames_per_client']:6d} frames/client, "
+            f"{result['frames_per_second']:10.0f} frames/s, "
+            f"{result['cpu_seconds']:.3f}s CPU"
+        )
+
+    assert after["frames_per_client"] * 10 < before["frames_per_client"]
+    assert after["cpu_seconds"] < before["cpu_seconds"]
+
+class RecordingWebSocket(FakeWebSocket):
+    def __init__(self):
+        super().__init__()
+        self.payloads = []
+
+    async def send_text(self, text):
+        self.payloads.append(text)
+
+def wire_bytes(payloads) -> Dict:
+    """Raw size and size with per-message deflate (context takeover)"""
+    compressor = zlib.compressobj(wbits=-15)
+    deflated = 0
+    for payload in payloads:
+        data = payload.encode()
+        deflated += len(compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH))
+    return {"raw": sum(len(p.encode()) for p in payloads), "deflated": deflated}
+
+async def record_encodings():
+    manager = ConnectionManager(max_queue=LINES)
+    json_client, columnar_client = RecordingWebSocket(), RecordingWebSocket()
+    await manager.connect(json_client)
+    await manager.connect(columnar_client, MessageEncoding.COLUMNAR)
+    await batched_broadcast(manager)
+    await drain_clients(manager)
+    return json_client.payloads, columnar_client.payloads
+
+@pytest.mark.performance
+def test_log_encoding_bandwidth():
+    """Compare bytes on the wire for JSON and columnar log batches"""
+    per_line = [
+        json.dumps({
+            "type": EventTypes.INSTALLATION_LOG.value,
+            "data": {
+                "message": f"  CC out/src/file_{i}.o",
+                "level": LogLevel.INFO.value,
+                "timestamp": datetime.now().isoformat()
+            }
+        })
+        for i in range(LINES)
+    ]
+    json_batches, columnar_batches = asyncio.run(record_encodings())
+
+    results = {
+        "per-line": wire_bytes(per_line),
+        "json": wire_bytes(json_batches),
+        "columnar": wire_bytes(columnar_batches),
+    }
+    for name, result in results.items():
+        print(f"{name:>8}: {result['raw']:9d} bytes raw, {result['deflated']:8d} bytes deflated")
+
+    assert results["columnar"]["raw"] < results["json"]["raw"] * 0.6
+    assert results["columnar"]["deflated"] < results["json"]["deflated"]
+
+if __name__ == "__main__":
+    test_log_streaming_benchmark()
+    test_log_encoding_bandwidth()
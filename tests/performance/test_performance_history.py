@@ -0,0 +1,74 @@
+import pytest
+import statistics
+import time
+import tracemalloc
+from collections import deque
+from datetime import timedelta
+
+from backend.app.monitoring.performance import PerformanceMonitor
+from backend.app.monitoring.timeseries import TimeSeries
+
+SAMPLES = 3600
+
+def fill_deque(now: float) -> deque:
+    """Previous storage: one (timestamp, value) tuple per sample"""
+    samples = deque(maxlen=SAMPLES)
+    for i in range(SAMPLES):
+        samples.append((now - SAMPLES + i, float(i % 100)))
+    return samples
+
+def fill_series(now: float) -> TimeSeries:
+    series = TimeSeries()
+    for i in range(SAMPLES):
+        series.add(float(i % 100), now - SAMPLES + i)
+    return series
+
+def deque_history(samples: deque, now: float):
+    """Previous query: every sample scanned for each of 60 points"""
+    start = now - 3600
+    points = []
+    for i in range(60):
+        low, high = start + i * 60, start + (i + 1) * 60
+        values = [v for t, v in samples if low <= t < high]
+        points.append(statistics.mean(values) if values else 0)
+    return points
+
+def allocated(factory, now: float) -> int:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = factory(now)
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del kept
+    return size
+
+@pytest.mark.performance
+def test_performance_history_benchmark():
+    # Aligned, so the hour of samples fills exactly the 360 buckets
+    now = time.time() // 10 * 10
+    samples, series = fill_deque(now), fill_series(now)
+
+    start = time.perf_counter()
+    old = deque_history(samples, now)
+    old_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    new = series.history(now - 3600, now, 60)
+    new_seconds = time.perf_counter() - start
+
+    old_bytes = allocated(fill_deque, now)
+    new_bytes = allocated(fill_series, now)
+    print(
+        f"\nhistory: tuples {old_seconds * 1000:.2f} ms, buckets {new_seconds * 1000:.3f} ms; "
+        f"memory: tuples {old_bytes / 1024:.0f} KiB, buckets {new_bytes / 1024:.1f} KiB"
+    )
+
+    assert sum(p["count"] for p in new) == SAMPLES
+    assert new_seconds * 10 < old_seconds
+    assert new_bytes < 16 * 1024
+    assert new_bytes * 10 < old_bytes
+
+    monitor = PerformanceMonitor()
+    assert len(monitor.get_performance_history(timedelta(hours=1))["data_points"]) == 60
+
+if __name__ == "__main__":
+    test_performance_history_benchmark()
@@ -0,0 +1,110 @@
+import pytest
+import asyncio
+import time
+from typing import Dict
+
+from app.websocket.connection import ConnectionManager
+from app.websocket.events import EventTypes
+from backend.app.core.websocket import OverflowPolicy
+
+MESSAGES = 2000
+FAST_CLIENTS = 50
+STALLED_CLIENTS = 5
+SEND_TIMEOUT = 0.001
+
+class FakeWebSocket:
+    """Counts frames; sends to a stalled client never complete"""
+
+    def __init__(self, stalled: bool = False):
+        self.stalled = stalled
+        self.frames = 0
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, data):
+        if self.stalled:
+            await asyncio.Event().wait()
+        self.frames += 1
+
+    async def send_text(self, text):
+        await self.send_json(text)
+
+    async def close(self, code: int = 1000):
+        pass
+
+async def sequential_broadcast(sockets, message):
+    """Previous behaviour: await every client in turn"""
+    for ws in sockets:
+        try:
+            await asyncio.wait_for(ws.send_json(message), SEND_TIMEOUT)
+        except asyncio.TimeoutError:
+            pass
+
+async def run_scenario(policy: OverflowPolicy) -> Dict:
+    manager = ConnectionManager(max_queue=100, policy=policy)
+    fast = [FakeWebSocket() for _ in range(FAST_CLIENTS)]
+    stalled = [FakeWebSocket(stalled=True) for _ in range(STALLED_CLIENTS)]
+    for ws in fast + stalled:
+        await manager.connect(ws)
+
+    start = time.perf_counter()
+    for i in range(MESSAGES):
+        await manager.broadcast_json(
+            {"type": EventTypes.INSTALLATION_STATUS, "data": {"progress": i}},
+            key="status"
+        )
+        if i % 50 == 0:
+            await asyncio.sleep(0)
+    broadcast_time = time.perf_counter() - start
+
+    for ws in fast:
+        await manager.clients[ws].drain()
+    delivery_time = time.perf_counter() - start
+
+    metrics = manager.get_client_metrics()
+    for ws in list(manager.clients):
+        manager.disconnect(ws)
+    return {
+        "broadcast_time": broadcast_time,
+        "delivery_time": delivery_time,
+        "connected": len(metrics),
+        "max_queue_depth": max(m["max_queue_depth"] for m in metrics),
+        "max_send_latency": max(m["max_send_latency"] for m in metrics),
+    }
+
+async def run_sequential(messages: int) -> float:
+    sockets = (
+        [FakeWebSocket() for _ in range(FAST_CLIENTS)]
+        + [FakeWebSocket(stalled=True) for _ in range(STALLED_CLIENTS)]
+    )
+    start = time.perf_counter()
+    for i in range(messages):
+        await sequential_broadcast(sockets, {"data": {"progress": i}})
+    return time.perf_counter() - start
+
+@pytest.mark.performance
+def test_stalled_clients_do_not_block_broadcast():
+    """Broadcasting to fast clients is unaffected by stalled ones"""
+    # Even with a 1ms send timeout, every stalled client costs the old
+    # loop a full timeout per message; measure a sample and extrapolate
+    sample = 50
+    sequential = asyncio.run(run_sequential(sample)) * MESSAGES / sample
+    print(f"sequential: {sequential:.3f}s for {MESSAGES} broadcasts (extrapolated)")
+
+    for policy in OverflowPolicy:
+        result = asyncio.run(run_scenario(policy))
+        print(
+            f"{policy.value:>10}: broadcast {result['broadcast_time']:.3f}s, "
+            f"delivered {result['delivery_time']:.3f}s, "
+            f"{result['connected']} clients left, "
+            f"max depth {result['max_queue_depth']}, "
+            f"max latency {result['max_send_latency'] * 1000:.1f}ms"
+        )
+        assert result["broadcast_time"] < sequential
+        assert result["max_queue_depth"] <= 100
+        if policy == OverflowPolicy.DISCONNECT:
+            assert result["connected"] == FAST_CLIENTS
+
+if __name__ == "__main__":
+    test_stalled_clients_do_not_block_broadcast()